@@ -0,0 +1,69 @@
+"""Reenvia payloads gravados de hooks do GitLab ao receptor do modo daemon.
+
+Uso (a partir do diretório Search/Gitlab, com `./run.sh daemon` em execução):
+    python -m hooks.replay                          # envia todos os hooks/*.json
+    python -m hooks.replay hooks/push_event.json --repeat 3 --interval 0.5
+    python -m hooks.replay --parse                  # só mostra o evento extraído de cada payload
+
+Endereço e token vêm de settings.txt (HOOK_HOST, HOOK_PORT, HOOK_SECRET_TOKEN) e
+podem ser sobrescritos por --url e --token. Repetir o mesmo push dentro de
+HOOK_COALESCE_SECONDS exercita o agrupamento de pushes na mesma branch.
+"""
+import argparse
+import json
+import sys
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+from src.config import HOOK_HOST, HOOK_PORT, HOOK_SECRET_TOKEN
+from src.daemon import parse_hook_event
+
+PAYLOAD_DIR = Path(__file__).resolve().parent
+
+
+def post(url: str, token: str, payload: bytes) -> tuple:
+    request = urllib.request.Request(url, data=payload, method='POST', headers={
+        'Content-Type': 'application/json',
+        'X-Gitlab-Token': token
+    })
+    try:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return response.status, response.read().decode()
+    except urllib.error.HTTPError as e:
+        return e.code, e.read().decode()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('payloads', nargs='*', type=Path, help='Arquivos JSON (padrão: hooks/*.json)')
+    parser.add_argument('--url', default=f"http://{HOOK_HOST}:{HOOK_PORT}/", help='Endereço do receptor')
+    parser.add_argument('--token', default=HOOK_SECRET_TOKEN, help='Valor do cabeçalho X-Gitlab-Token')
+    parser.add_argument('--repeat', type=int, default=1, help='Envios de cada payload')
+    parser.add_argument('--interval', type=float, default=0.0, help='Pausa entre envios (segundos)')
+    parser.add_argument('--parse', action='store_true', help='Não envia; mostra o evento que seria enfileirado')
+    args = parser.parse_args()
+
+    files = args.payloads or sorted(PAYLOAD_DIR.glob('*.json'))
+    failures = 0
+    for path in files:
+        body = path.read_bytes()
+        if args.parse:
+            print(f"{path.name}: {parse_hook_event(json.loads(body)) or 'ignorado'}")
+            continue
+        for attempt in range(args.repeat):
+            if attempt or path is not files[0]:
+                time.sleep(args.interval)
+            try:
+                status, reply = post(args.url, args.token, body)
+            except OSError as e:
+                print(f"{path.name}: falha ao enviar para {args.url}: {str(e)}", file=sys.stderr)
+                return 1
+            print(f"{path.name}: {status} {reply}")
+            failures += status >= 400
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
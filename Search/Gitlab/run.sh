@@ -102,7 +102,7 @@ principal() {
     
     mkdir -p output log checkpoints
     
-    PYTHONPATH="${DIR_SCRIPT}:${PYTHONPATH}" python3 -m src.main
+    PYTHONPATH="${DIR_SCRIPT}:${PYTHONPATH}" python3 -m src.main "$@"
     codigo_saida=$?
     
     if [ $codigo_saida -eq 0 ]; then
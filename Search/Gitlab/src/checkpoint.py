@@ -1,41 +1,57 @@
 import json
+import threading
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from datetime import datetime
 
 class CheckpointService:
     def __init__(self):
         self.file = Path('checkpoints/progress.json')
         self.file.parent.mkdir(exist_ok=True)
+        # Compartilhado pelas threads da varredura e, no modo daemon, pelas análises de push
+        self._lock = threading.RLock()
         self._data = self._load()
         
     def _load(self) -> Dict[str, Any]:
         if self.file.exists():
             with open(self.file, 'r') as f:
-                return json.load(f)
+                data = json.load(f)
+            # Arquivos concluídos são salvos como lista; em memória voltam a ser sets
+            for project_data in data.get('projects', {}).values():
+                for branch_data in project_data.get('branches', {}).values():
+                    branch_data['files'] = set(branch_data.get('files', []))
+            return data
         return {'projects': {}, 'last_update': None}
     
+    def reset(self):
+        """Descarta o progresso salvo para iniciar uma nova varredura completa"""
+        with self._lock:
+            self._data = {'projects': {}, 'last_update': None}
+            self.save()
+    
     def save(self):
-        # Converte sets para listas antes de salvar
-        data_to_save = {
-            'projects': {},
-            'last_update': datetime.now().isoformat()
-        }
-        
-        for project_id, project_data in self._data['projects'].items():
-            data_to_save['projects'][project_id] = {
-                'completed': project_data.get('completed', False),
-                'branches': {}
+        with self._lock:
+            # Converte sets para listas antes de salvar
+            data_to_save = {
+                'projects': {},
+                'last_update': datetime.now().isoformat()
             }
-            
-            for branch_name, branch_data in project_data.get('branches', {}).items():
-                data_to_save['projects'][project_id]['branches'][branch_name] = {
-                    'completed': branch_data.get('completed', False),
-                    'files': list(branch_data.get('files', set()))
+        
+            for project_id, project_data in self._data['projects'].items():
+                data_to_save['projects'][project_id] = {
+                    'completed': project_data.get('completed', False),
+                    'branches': {}
                 }
+            
+                for branch_name, branch_data in project_data.get('branches', {}).items():
+                    data_to_save['projects'][project_id]['branches'][branch_name] = {
+                        'completed': branch_data.get('completed', False),
+                        'cursor': branch_data.get('cursor'),
+                        'files': list(branch_data.get('files', set()))
+                    }
         
-        with open(self.file, 'w') as f:
-            json.dump(data_to_save, f)
+            with open(self.file, 'w') as f:
+                json.dump(data_to_save, f)
     
     def is_project_completed(self, project_id: str) -> bool:
         return str(project_id) in self._data['projects'] and \
@@ -53,32 +69,58 @@ class CheckpointService:
         files = branch_data.get('files', set())
         return file_path in files
     
+    def get_tree_cursor(self, project_id: str, branch: str) -> Optional[Dict[str, str]]:
+        project = self._data['projects'].get(str(project_id), {})
+        return project.get('branches', {}).get(branch, {}).get('cursor')
+    
+    def save_tree_cursor(self, project_id: str, branch: str, cursor: Dict[str, str]):
+        """Registra a próxima página da árvore a ser listada.
+
+        Os arquivos das páginas anteriores nunca serão listados de novo na retomada,
+        então o conjunto de arquivos concluídos da branch pode ser descartado.
+        """
+        with self._lock:
+            branch_data = self._branch_data(str(project_id), branch)
+            branch_data['cursor'] = cursor
+            branch_data['files'] = set()
+            self.save()
+    
+    def _branch_data(self, project_id: str, branch: str) -> Dict[str, Any]:
+        project = self._data['projects'].setdefault(project_id, {'branches': {}})
+        return project.setdefault('branches', {}).setdefault(branch, {'files': set()})
+    
     def mark_project_completed(self, project_id: str):
-        project_id = str(project_id)
-        if project_id not in self._data['projects']:
-            self._data['projects'][project_id] = {'branches': {}}
-        self._data['projects'][project_id]['completed'] = True
-        self.save()
+        with self._lock:
+            project_id = str(project_id)
+            if project_id not in self._data['projects']:
+                self._data['projects'][project_id] = {'branches': {}}
+            self._data['projects'][project_id]['completed'] = True
+            self.save()
     
     def mark_branch_completed(self, project_id: str, branch: str):
-        project_id = str(project_id)
-        if project_id not in self._data['projects']:
-            self._data['projects'][project_id] = {'branches': {}}
-        if 'branches' not in self._data['projects'][project_id]:
-            self._data['projects'][project_id]['branches'] = {}
-        if branch not in self._data['projects'][project_id]['branches']:
-            self._data['projects'][project_id]['branches'][branch] = {'files': set()}
-        self._data['projects'][project_id]['branches'][branch]['completed'] = True
-        self.save()
+        with self._lock:
+            project_id = str(project_id)
+            if project_id not in self._data['projects']:
+                self._data['projects'][project_id] = {'branches': {}}
+            if 'branches' not in self._data['projects'][project_id]:
+                self._data['projects'][project_id]['branches'] = {}
+            if branch not in self._data['projects'][project_id]['branches']:
+                self._data['projects'][project_id]['branches'][branch] = {'files': set()}
+            branch_data = self._data['projects'][project_id]['branches'][branch]
+            branch_data['completed'] = True
+            # Concluída, a branch não tem página pendente: uma nova varredura começa do início da árvore
+            branch_data.pop('cursor', None)
+            self.save()
     
     def mark_file_completed(self, project_id: str, branch: str, file_path: str):
-        project_id = str(project_id)
-        if project_id not in self._data['projects']:
-            self._data['projects'][project_id] = {'branches': {}}
-        if 'branches' not in self._data['projects'][project_id]:
-            self._data['projects'][project_id]['branches'] = {}
-        if branch not in self._data['projects'][project_id]['branches']:
-            self._data['projects'][project_id]['branches'][branch] = {'files': set()}
-        if 'files' not in self._data['projects'][project_id]['branches'][branch]:
-            self._data['projects'][project_id]['branches'][branch]['files'] = set()
-        self._data['projects'][project_id]['branches'][branch]['files'].add(file_path)
\ No newline at end of file
+        with self._lock:
+            project_id = str(project_id)
+            if project_id not in self._data['projects']:
+                self._data['projects'][project_id] = {'branches': {}}
+            if 'branches' not in self._data['projects'][project_id]:
+                self._data['projects'][project_id]['branches'] = {}
+            if branch not in self._data['projects'][project_id]['branches']:
+                self._data['projects'][project_id]['branches'][branch] = {'files': set()}
+            if 'files' not in self._data['projects'][project_id]['branches'][branch]:
+                self._data['projects'][project_id]['branches'][branch]['files'] = set()
+            self._data['projects'][project_id]['branches'][branch]['files'].add(file_path)
\ No newline at end of file
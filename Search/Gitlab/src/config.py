@@ -54,6 +54,27 @@ BINARY_EXTENSIONS: Set[str] = {
     ext.strip() for ext in SETTINGS.get('BINARY_EXTENSIONS', '').split(',')
 }
 
+# Path filter settings
+INCLUDE_PATHS: List[str] = [p.strip() for p in SETTINGS.get('INCLUDE_PATHS', '').split(',') if p.strip()]
+EXCLUDE_PATHS: List[str] = [p.strip() for p in SETTINGS.get('EXCLUDE_PATHS', '').split(',') if p.strip()]
+TREE_WALK_MODE = SETTINGS.get('TREE_WALK_MODE', 'auto').lower()
+
+# Daemon settings
+HOOK_HOST = SETTINGS.get('HOOK_HOST', '127.0.0.1')
+HOOK_PORT = int(SETTINGS.get('HOOK_PORT', 8085))
+HOOK_SECRET_TOKEN = os.environ.get('HOOK_SECRET_TOKEN') or SETTINGS.get('HOOK_SECRET_TOKEN', '')
+HOOK_COALESCE_SECONDS = float(SETTINGS.get('HOOK_COALESCE_SECONDS', 5))
+HOOK_MAX_THREADS = int(SETTINGS.get('HOOK_MAX_THREADS', 4))
+FULL_SCAN_INTERVAL = int(SETTINGS.get('FULL_SCAN_INTERVAL', 86400))
+
+# Sampling settings
+SAMPLE_FILES_PER_BRANCH = int(SETTINGS.get('SAMPLE_FILES_PER_BRANCH', 20))
+SAMPLE_MIN_PROJECTS = int(SETTINGS.get('SAMPLE_MIN_PROJECTS', 30))
+SAMPLE_TARGET_MARGIN = float(SETTINGS.get('SAMPLE_TARGET_MARGIN', 0.005))
+SAMPLE_TIME_BUDGET = int(SETTINGS.get('SAMPLE_TIME_BUDGET', 900))
+SAMPLE_SEED = int(SETTINGS['SAMPLE_SEED']) if SETTINGS.get('SAMPLE_SEED') else None
+SAMPLE_REPORT_FILE = Path(SETTINGS.get('SAMPLE_REPORT_FILE', 'output/estimativa.json'))
+
 # Text encodings
 TEXT_ENCODINGS: List[str] = SETTINGS.get('TEXT_ENCODINGS', '').split(',')
 
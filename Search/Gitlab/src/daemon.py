@@ -0,0 +1,251 @@
+import asyncio
+import hmac
+import json
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from time import monotonic
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+from src.config import (
+    HOOK_HOST, HOOK_PORT, HOOK_SECRET_TOKEN, HOOK_COALESCE_SECONDS,
+    HOOK_MAX_THREADS, FULL_SCAN_INTERVAL
+)
+
+NULL_SHA = '0' * 40
+
+
+@dataclass
+class PushEvent:
+    project_id: int
+    branch: str
+    before: str
+    after: str
+    paths: Set[str] = field(default_factory=set)
+    complete: bool = True
+
+    @property
+    def is_new_branch(self) -> bool:
+        return self.before == NULL_SHA
+
+    def merge(self, newer: 'PushEvent') -> 'PushEvent':
+        """Agrupa um push mais recente na mesma branch, mantendo o commit base original"""
+        return PushEvent(
+            project_id=self.project_id,
+            branch=self.branch,
+            before=self.before,
+            after=newer.after,
+            paths=self.paths | newer.paths,
+            complete=self.complete and newer.complete
+        )
+
+
+def parse_push_event(payload: Dict[str, Any]) -> Optional[PushEvent]:
+    """Extrai um PushEvent de um payload de project hook ou system hook do GitLab"""
+    if payload.get('object_kind', payload.get('event_name')) != 'push':
+        return None
+
+    ref = payload.get('ref', '')
+    after = payload.get('after', NULL_SHA)
+    if not ref.startswith('refs/heads/') or after == NULL_SHA:
+        return None
+
+    project_id = payload.get('project_id') or payload.get('project', {}).get('id')
+    if project_id is None:
+        return None
+
+    commits = payload.get('commits') or []
+    paths = set()
+    for commit in commits:
+        paths.update(commit.get('added', []))
+        paths.update(commit.get('modified', []))
+
+    # O GitLab limita a lista de commits do payload; nesse caso os arquivos vêm da API de compare
+    total_commits = payload.get('total_commits_count', len(commits))
+    return PushEvent(
+        project_id=int(project_id),
+        branch=ref[len('refs/heads/'):],
+        before=payload.get('before', NULL_SHA),
+        after=after,
+        paths=paths,
+        complete=len(commits) >= total_commits
+    )
+
+
+def parse_merge_request_event(payload: Dict[str, Any]) -> Optional[PushEvent]:
+    """Extrai um PushEvent da branch de origem de um evento de merge request.
+
+    Novos commits no MR ('update' com oldrev) são analisados pela API de compare,
+    já que o payload não traz os arquivos; um MR aberto a partir de um fork analisa
+    a branch inteira, pois o fork normalmente não tem hook próprio. MRs abertos na
+    mesma branch do projeto já foram cobertos pelo evento de push.
+    """
+    if payload.get('object_kind', payload.get('event_type')) != 'merge_request':
+        return None
+
+    attributes = payload.get('object_attributes') or {}
+    project_id = attributes.get('source_project_id')
+    branch = attributes.get('source_branch')
+    after = (attributes.get('last_commit') or {}).get('id')
+    if project_id is None or not branch or not after:
+        return None
+
+    action = attributes.get('action')
+    if action == 'update' and attributes.get('oldrev'):
+        before = attributes['oldrev']
+    elif action in ('open', 'reopen') and project_id != attributes.get('target_project_id'):
+        before = NULL_SHA
+    else:
+        return None
+
+    return PushEvent(project_id=int(project_id), branch=branch, before=before, after=after, complete=False)
+
+
+def parse_hook_event(payload: Dict[str, Any]) -> Optional[PushEvent]:
+    """Converte um payload de hook do GitLab no PushEvent a analisar, ou None se ignorado"""
+    return parse_push_event(payload) or parse_merge_request_event(payload)
+
+
+class HookReceiver:
+    """Servidor HTTP local que recebe eventos de push/system hooks do GitLab"""
+
+    def __init__(self, host: str, port: int, secret: str,
+                 on_payload: Callable[[Dict[str, Any]], bool], logger):
+        self.secret = secret
+        self.on_payload = on_payload
+        self.logger = logger
+        self.server = ThreadingHTTPServer((host, port), self._handler_class())
+        self.server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def address(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _handler_class(self):
+        receiver = self
+
+        class HookHandler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                token = self.headers.get('X-Gitlab-Token', '')
+                if receiver.secret and not hmac.compare_digest(token, receiver.secret):
+                    self._reply(401, 'token inválido')
+                    return
+                try:
+                    length = int(self.headers.get('Content-Length', 0))
+                    payload = json.loads(self.rfile.read(length) or b'{}')
+                except (ValueError, json.JSONDecodeError):
+                    self._reply(400, 'payload inválido')
+                    return
+                accepted = receiver.on_payload(payload)
+                self._reply(202 if accepted else 200, 'enfileirado' if accepted else 'ignorado')
+
+            def _reply(self, status: int, message: str):
+                body = json.dumps({'status': message}).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return HookHandler
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class ScannerDaemon:
+    """Modo contínuo: análises incrementais por push e varredura completa periódica de segurança"""
+
+    def __init__(self, scanner, checkpoint, logger):
+        self.scanner = scanner
+        self.checkpoint = checkpoint
+        self.logger = logger
+        self.executor = ThreadPoolExecutor(max_workers=HOOK_MAX_THREADS)
+        self._pending: Dict[Tuple[int, str], PushEvent] = {}
+        self._deadlines: Dict[Tuple[int, str], float] = {}
+        self._running: Set[Tuple[int, str]] = set()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.receiver: Optional[HookReceiver] = None
+
+    def _on_payload(self, payload: Dict[str, Any]) -> bool:
+        """Chamado pelas threads do servidor HTTP"""
+        event = parse_hook_event(payload)
+        if event is None:
+            return False
+        self._loop.call_soon_threadsafe(self.enqueue, event)
+        return True
+
+    def enqueue(self, event: PushEvent):
+        key = (event.project_id, event.branch)
+        if key in self._pending:
+            self._pending[key] = self._pending[key].merge(event)
+            self.logger.info(f"Projeto: {event.project_id} | Branch: {event.branch} | Push agrupado ao anterior")
+        else:
+            self._pending[key] = event
+            self._deadlines[key] = monotonic() + HOOK_COALESCE_SECONDS
+        self._wakeup.set()
+
+    def _finished(self, key: Tuple[int, str], _future):
+        self._running.discard(key)
+        self._wakeup.set()
+
+    async def _dispatch_loop(self):
+        while True:
+            now = monotonic()
+            for key, deadline in list(self._deadlines.items()):
+                if deadline > now or key in self._running:
+                    continue
+                event = self._pending.pop(key)
+                del self._deadlines[key]
+                self._running.add(key)
+                future = self._loop.run_in_executor(self.executor, self.scanner.scan_push_sync, event)
+                future.add_done_callback(partial(self._finished, key))
+
+            waiting = [d - now for k, d in self._deadlines.items() if k not in self._running]
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), max(0.0, min(waiting)) if waiting else None)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _sweep_loop(self):
+        if FULL_SCAN_INTERVAL <= 0:
+            return
+        # A primeira varredura retoma o checkpoint existente; as seguintes recomeçam do zero
+        first = True
+        while True:
+            if not first:
+                self.checkpoint.reset()
+            self.logger.info_blue("Iniciando varredura completa de segurança...")
+            await self.scanner.scan()
+            self.logger.info_blue(f"Varredura completa concluída. Próxima em {FULL_SCAN_INTERVAL}s")
+            first = False
+            await asyncio.sleep(FULL_SCAN_INTERVAL)
+
+    async def run(self):
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self.receiver = HookReceiver(HOOK_HOST, HOOK_PORT, HOOK_SECRET_TOKEN, self._on_payload, self.logger)
+        self.receiver.start()
+        self.logger.info_blue(f"Aguardando eventos de push em {self.receiver.address}")
+        try:
+            await asyncio.gather(self._dispatch_loop(), self._sweep_loop())
+        except Exception as e:
+            self.logger.error(f"Falha no modo daemon: {str(e)}\n{traceback.format_exc()}")
+            raise
+        finally:
+            self.receiver.stop()
+            self.executor.shutdown(wait=False)
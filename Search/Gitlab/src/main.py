@@ -2,21 +2,25 @@ import asyncio
 import gc
 from concurrent.futures import ThreadPoolExecutor
 from src.scanner import GitLabScanner
+from src.daemon import ScannerDaemon
+from src.sampling import SampleEstimator
 from src.checkpoint import CheckpointService
 from src.logger import LogObserver
 from time import time
 from urllib3.exceptions import ProtocolError
 from http.client import RemoteDisconnected
-from src.config import SETTINGS
+from src.config import SETTINGS, HOOK_HOST, HOOK_PORT
+
+MODES = ('scan', 'daemon', 'estimate')
 
 class ScannerApplication:
-    def __init__(self, url: str, token: str):
+    def __init__(self, url: str, tokens: list):
         self.logger = LogObserver()
         self.checkpoint = CheckpointService()
         self.executor = ThreadPoolExecutor(max_workers=int(SETTINGS.get('MAX_THREADS')))
-        self.scanner = GitLabScanner(url, token, self.checkpoint, self.logger, self.executor)
+        self.scanner = GitLabScanner(url, tokens, self.checkpoint, self.logger, self.executor)
 
-    async def run(self) -> int:
+    async def run(self, mode: str = 'scan') -> int:
         tempo_inicio = time()
         
         try:
@@ -30,11 +34,30 @@ class ScannerApplication:
             self.logger.info_blue("  - Palavras-chave: " + ", ".join(self.scanner.keywords))
             self.logger.info_blue("  - Timeout da API: " + str(self.scanner.gl.timeout) + "s")
             self.logger.info_blue("  - Itens por página: " + str(self.scanner.gl.per_page))
+            self.logger.info_blue("  - Tokens no pool: " + str(len(self.scanner.session.pool)))
+            if self.scanner.path_filter.active:
+                self.logger.info_blue("  - Incluir caminhos: " + (", ".join(self.scanner.path_filter.include_patterns) or "todos"))
+                self.logger.info_blue("  - Excluir caminhos: " + (", ".join(self.scanner.path_filter.exclude_patterns) or "nenhum"))
+                self.logger.info_blue("  - Listagem da árvore: " + ("por diretório" if self.scanner.walk_tree else "recursiva"))
+            self.logger.info_blue("  - Modo: " + mode)
+            if mode == 'daemon':
+                self.logger.info_blue(f"  - Receptor de webhooks: http://{HOOK_HOST}:{HOOK_PORT}")
+            if len(self.scanner.session.pool) > 1:
+                for identity in self.scanner.session.verify_tokens(self.scanner.gl.api_url):
+                    self.logger.info_blue(
+                        f"  - {identity['token']}: {identity['usuario']} "
+                        f"({identity['projetos_visiveis']} projetos visíveis)"
+                    )
             self.logger.info_blue("-" * 80)
             self.logger.info_blue("Iniciando scanner...")
             self.logger.info_blue("-" * 80)
             
-            await self.scanner.scan()
+            if mode == 'daemon':
+                await ScannerDaemon(self.scanner, self.checkpoint, self.logger).run()
+            elif mode == 'estimate':
+                await SampleEstimator(self.scanner, self.logger, self.executor).run()
+            else:
+                await self.scanner.scan()
             self.logger.info("=" * 80)
             self.logger.info(f"Scanner finalizado em {time() - tempo_inicio:.2f}s")
             self.logger.info("=" * 80)
@@ -50,20 +73,35 @@ class ScannerApplication:
             return 1
         finally:
             self.executor.shutdown(wait=True)
+            if len(self.scanner.session.pool) > 1:
+                for stats in self.scanner.session.pool.summary():
+                    self.logger.info(
+                        f"{stats['token']}: {stats['requisicoes']} requisições, "
+                        f"{stats['rate_limited']} rate limit, {stats['negadas']} negadas"
+                    )
             gc.collect()
 
 if __name__ == "__main__":
     import os
+    import sys
     from datetime import datetime
     
     url = os.environ.get('GITLAB_URL')
-    token = os.environ.get('PRIVATE_TOKEN')
+    # PRIVATE_TOKEN aceita vários tokens separados por vírgula (pool de identidades)
+    tokens = [t.strip() for t in os.environ.get('PRIVATE_TOKEN', '').split(',') if t.strip()]
+    mode = sys.argv[1] if len(sys.argv) > 1 else 'scan'
     
-    if not url or not token:
+    if not url or not tokens:
         print("[{}] GITLAB_URL e PRIVATE_TOKEN são obrigatórios".format(
             datetime.now().strftime("%d/%m/%Y %H:%M:%S")
         ))
         exit(1)
+    
+    if mode not in MODES:
+        print("[{}] Modo inválido: {} (opções: {})".format(
+            datetime.now().strftime("%d/%m/%Y %H:%M:%S"), mode, ", ".join(MODES)
+        ))
+        exit(1)
         
-    app = ScannerApplication(url, token)
-    exit(asyncio.run(app.run()))
\ No newline at end of file
+    app = ScannerApplication(url, tokens)
+    exit(asyncio.run(app.run(mode)))
\ No newline at end of file
@@ -0,0 +1,133 @@
+import re
+from typing import List, Optional, Pattern
+
+
+def _translate_segment(segment: str) -> str:
+    """Converte um segmento de glob (sem '/') em expressão regular"""
+    regex = ''
+    i = 0
+    while i < len(segment):
+        char = segment[i]
+        if char == '*':
+            regex += '[^/]*'
+        elif char == '?':
+            regex += '[^/]'
+        elif char == '[':
+            end = segment.find(']', i + 1)
+            if end == -1:
+                regex += re.escape(char)
+            else:
+                klass = segment[i + 1:end]
+                if klass.startswith('!'):
+                    klass = '^' + klass[1:]
+                regex += f"[{klass.replace(chr(92), chr(92) * 2)}]"
+                i = end
+        else:
+            regex += re.escape(char)
+        i += 1
+    return regex
+
+
+def _split_pattern(pattern: str) -> List[str]:
+    """Normaliza o padrão em segmentos, ancorando padrões sem '/' em qualquer profundidade"""
+    pattern = pattern.strip()
+    if '/' not in pattern.rstrip('/'):
+        return ['**', pattern.strip('/')]
+    return [s for s in pattern.strip('/').split('/') if s]
+
+
+def _translate(segments: List[str]) -> str:
+    regex = ''
+    for idx, segment in enumerate(segments):
+        last = idx == len(segments) - 1
+        if segment == '**':
+            if idx == 0:
+                regex += '.*' if last else '(?:.*/)?'
+            elif last:
+                # '**' no fim casa o próprio diretório e tudo abaixo dele
+                regex += '(?:/.*)?'
+            else:
+                regex += '/(?:.*/)?'
+            continue
+        if idx > 0 and segments[idx - 1] != '**':
+            regex += '/'
+        regex += _translate_segment(segment)
+    return regex
+
+
+class PathFilter:
+    """Filtro de caminhos por globs de inclusão/exclusão compilados em uma única expressão.
+
+    Padrões sem '/' (ex.: ``*.sh``, ``Jenkinsfile``) casam o nome do arquivo em
+    qualquer diretório; padrões com '/' (ex.: ``ci/**``) são ancorados na raiz.
+    """
+
+    def __init__(self, include: List[str], exclude: List[str]):
+        self.include_patterns = [p.strip() for p in include if p.strip()]
+        self.exclude_patterns = [p.strip() for p in exclude if p.strip()]
+        self._include = self._compile(self.include_patterns)
+        # Excluir um diretório exclui também todo o seu conteúdo
+        self._exclude = self._compile(self.exclude_patterns, suffix='(?:/.*)?')
+        self._include_segments = [
+            [None if s == '**' else re.compile(f"^{_translate_segment(s)}$") for s in _split_pattern(p)]
+            for p in self.include_patterns
+        ]
+
+    @staticmethod
+    def _compile(patterns: List[str], suffix: str = '') -> Optional[Pattern]:
+        if not patterns:
+            return None
+        alternatives = '|'.join(f"(?:{_translate(_split_pattern(p))}{suffix})" for p in patterns)
+        return re.compile(f"^(?:{alternatives})$")
+
+    @property
+    def active(self) -> bool:
+        return bool(self._include or self._exclude)
+
+    @property
+    def can_prune(self) -> bool:
+        """Indica se a travessia diretório a diretório tende a custar menos que a listagem recursiva.
+
+        Só vale quando todo padrão de inclusão está ancorado em um diretório
+        específico (ex.: ``ci/**``) ou em arquivos da raiz: as chamadas ficam
+        restritas a esses diretórios. Padrões que casam em qualquer profundidade
+        e exclusões sozinhas ainda exigem listar quase todos os diretórios, uma
+        chamada por diretório contra as poucas páginas da listagem recursiva.
+        """
+        if not self.include_patterns:
+            return False
+        for pattern in self.include_patterns:
+            segments = _split_pattern(pattern)
+            if segments[0] == '**':
+                return False
+            if len(segments) > 1 and re.search(r'[*?\[]', segments[0]):
+                return False
+        return True
+
+    def matches(self, path: str) -> bool:
+        """Verifica se o arquivo deve ser analisado"""
+        if self._exclude is not None and self._exclude.match(path):
+            return False
+        return self._include is None or bool(self._include.match(path))
+
+    def should_descend(self, dir_path: str) -> bool:
+        """Verifica se algum arquivo abaixo do diretório pode casar com os filtros"""
+        if self._exclude is not None and self._exclude.match(dir_path):
+            return False
+        if self._include is None:
+            return True
+        parts = dir_path.strip('/').split('/')
+        return any(self._prefix_compatible(segments, parts) for segments in self._include_segments)
+
+    @staticmethod
+    def _prefix_compatible(segments: List[Optional[Pattern]], parts: List[str]) -> bool:
+        # Segmentos None representam '**', que casa qualquer profundidade
+        for idx, part in enumerate(parts):
+            if idx >= len(segments) - 1:
+                # O último segmento do padrão só casa arquivos, a menos que seja '**'
+                return segments[-1] is None
+            if segments[idx] is None:
+                return True
+            if not segments[idx].match(part):
+                return False
+        return True
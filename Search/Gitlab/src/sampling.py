@@ -0,0 +1,378 @@
+import asyncio
+import json
+import math
+import random
+import threading
+import traceback
+from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from time import time
+from typing import Dict, List, Optional, Tuple
+from src.config import (
+    SAMPLE_FILES_PER_BRANCH, SAMPLE_MIN_PROJECTS, SAMPLE_TARGET_MARGIN,
+    SAMPLE_TIME_BUDGET, SAMPLE_SEED, SAMPLE_REPORT_FILE, SETTINGS
+)
+
+# Valor z do intervalo de confiança de 95%
+Z_95 = 1.96
+
+SIZE_BUCKETS = ((10 * 1024 ** 2, 'pequeno'), (100 * 1024 ** 2, 'medio'))
+
+
+@dataclass
+class ProjectSample:
+    project_id: int
+    stratum: Tuple[str, str]
+    branches: int = 0
+    eligible_files: int = 0
+    sampled_files: int = 0
+    hits: Dict[str, int] = field(default_factory=dict)
+    # Custos medidos para a projeção da varredura completa
+    branch_list_requests: int = 0
+    tree_requests: int = 0
+    tree_bytes: int = 0
+    file_bytes: int = 0
+
+    @property
+    def files_in_project(self) -> float:
+        """Arquivos a analisar em todas as branches relevantes (x_i do estimador de razão)"""
+        return float(self.branches * self.eligible_files)
+
+    def matching_files(self, keyword: str) -> float:
+        """Estimativa de arquivos com a palavra-chave em todas as branches relevantes (y_i)"""
+        if not self.sampled_files:
+            return 0.0
+        return self.files_in_project * self.hits.get(keyword, 0) / self.sampled_files
+
+    @property
+    def full_requests(self) -> float:
+        return self.branch_list_requests + self.branches * (self.tree_requests + self.eligible_files)
+
+    @property
+    def full_bytes(self) -> float:
+        mean_file = self.file_bytes / self.sampled_files if self.sampled_files else 0.0
+        return self.branches * (self.tree_bytes + self.eligible_files * mean_file)
+
+
+class RequestMeter:
+    """Conta requisições e bytes recebidos por thread através dos hooks da sessão HTTP"""
+
+    def __init__(self, session):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.bytes = 0
+        session.hooks.setdefault('response', []).append(self._on_response)
+
+    def _on_response(self, response, *args, **kwargs):
+        size = len(response.content or b'')
+        with self._lock:
+            self.requests += 1
+            self.bytes += size
+        if getattr(self._local, 'active', False):
+            self._local.requests += 1
+            self._local.bytes += size
+
+    @contextmanager
+    def measure(self):
+        self._local.active = True
+        self._local.requests = 0
+        self._local.bytes = 0
+        try:
+            yield self._local
+        finally:
+            self._local.active = False
+
+
+class SampleEstimator:
+    """Estimativa da prevalência das palavras-chave por amostragem estratificada.
+
+    Os projetos são estratificados por grupo e tamanho do repositório e sorteados
+    com alocação proporcional; de cada projeto sorteado é analisada uma branch
+    relevante e uma amostra aleatória dos seus arquivos, usando o mesmo pipeline
+    de busca e download da varredura completa.
+    """
+
+    def __init__(self, scanner, logger, executor):
+        self.scanner = scanner
+        self.logger = logger
+        self.executor = executor
+        self.workers = int(SETTINGS.get('MAX_THREADS'))
+        self.random = random.Random(SAMPLE_SEED)
+        self.meter = RequestMeter(scanner.gl.session)
+        self.samples: List[ProjectSample] = []
+        self.strata_sizes: Dict[Tuple[str, str], int] = {}
+
+    @staticmethod
+    def _stratum(project) -> Tuple[str, str]:
+        group = (getattr(project, 'namespace', None) or {}).get('full_path', '')
+        stats = getattr(project, 'statistics', None) or {}
+        size = stats.get('repository_size')
+        if size is None:
+            return group, 'desconhecido'
+        for limit, name in SIZE_BUCKETS:
+            if size < limit:
+                return group, name
+        return group, 'grande'
+
+    def _draw_order(self, strata: Dict[Tuple[str, str], list]):
+        """Gera projetos na ordem de sorteio: um por estrato, depois alocação proporcional ao tamanho.
+
+        A primeira rodada cobre todos os estratos (maiores primeiro), para que nenhum
+        fique fora das estimativas; a partir daí cada sorteio vai ao estrato com mais
+        projetos por amostra.
+        """
+        drawn = defaultdict(int)
+        for projects in strata.values():
+            self.random.shuffle(projects)
+        for key in sorted(strata, key=lambda k: (-len(strata[k]), self.random.random())):
+            yield key, strata[key][0]
+            drawn[key] = 1
+        while True:
+            open_strata = [k for k, v in strata.items() if drawn[k] < len(v)]
+            if not open_strata:
+                return
+            key = max(open_strata, key=lambda k: (len(strata[k]) / (drawn[k] + 1), self.random.random()))
+            yield key, strata[key][drawn[key]]
+            drawn[key] += 1
+
+    def _sample_project(self, project, stratum: Tuple[str, str], seed: float) -> ProjectSample:
+        rng = random.Random(seed)
+        sample = ProjectSample(project_id=project.id, stratum=stratum)
+
+        with self.meter.measure() as measured:
+            branches = [
+                b.name for b in project.branches.list(all=True)
+                if self.scanner._is_branch_relevant(b.name)
+            ]
+            sample.branch_list_requests = measured.requests
+            sample.branches = len(branches)
+            if not branches:
+                return sample
+
+            branch = rng.choice(branches)
+            before_tree = (measured.requests, measured.bytes)
+            eligible = [
+                item['path'] for item in self.scanner._iter_branch_files(project, branch)
+                if not self.scanner._is_binary_file(item['path'])
+            ]
+            sample.tree_requests = measured.requests - before_tree[0]
+            sample.tree_bytes = measured.bytes - before_tree[1]
+            sample.eligible_files = len(eligible)
+
+            before_files = measured.bytes
+            for path in rng.sample(eligible, min(SAMPLE_FILES_PER_BRANCH, len(eligible))):
+                try:
+                    content = self.scanner._fetch_content(project, branch, path)
+                except Exception as e:
+                    self.logger.error(f"Projeto: {project.name} | Arquivo: {path} | Erro: {str(e)}")
+                    continue
+                sample.sampled_files += 1
+                for keyword in self.scanner._find_matches(content):
+                    sample.hits[keyword] = sample.hits.get(keyword, 0) + 1
+            sample.file_bytes = measured.bytes - before_files
+
+        return sample
+
+    def _by_stratum(self) -> Dict[Tuple[str, str], List[ProjectSample]]:
+        grouped = defaultdict(list)
+        for sample in self.samples:
+            grouped[sample.stratum].append(sample)
+        return grouped
+
+    def _weight(self, stratum: Tuple[str, str], sampled: int) -> float:
+        return self.strata_sizes[stratum] / sampled
+
+    @property
+    def _all_strata_sampled(self) -> bool:
+        return len(self._by_stratum()) == len(self.strata_sizes)
+
+    def _total(self, value) -> float:
+        """Estimador de total estratificado (expansão pelo peso de cada estrato).
+
+        Estratos ainda sem amostra entram com a média de todos os projetos
+        amostrados, em vez de ficarem fora da projeção.
+        """
+        grouped = self._by_stratum()
+        total = sum(
+            self._weight(stratum, len(group)) * sum(value(s) for s in group)
+            for stratum, group in grouped.items()
+        )
+        unsampled = sum(size for stratum, size in self.strata_sizes.items() if stratum not in grouped)
+        if unsampled and self.samples:
+            total += unsampled * sum(value(s) for s in self.samples) / len(self.samples)
+        return total
+
+    def estimate(self, keyword: str) -> Tuple[float, Optional[float]]:
+        """Proporção estimada de arquivos com a palavra-chave e meia-largura do IC 95%.
+
+        A meia-largura é None (precisão indeterminada) enquanto houver estrato sem
+        amostra, ou estratos com um único projeto amostrado e nenhum estrato com
+        dois ou mais para estimar a variância dentro dos estratos.
+        """
+        total_files = self._total(lambda s: s.files_in_project)
+        if total_files <= 0:
+            return 0.0, None
+        ratio = self._total(lambda s: s.matching_files(keyword)) / total_files
+        if not self._all_strata_sampled:
+            return ratio, None
+
+        # Variância por linearização do estimador de razão, com correção de população finita:
+        # soma de N_h² (1 - n_h/N_h) s²_h / n_h sobre os estratos
+        variance = 0.0
+        squares = 0.0
+        degrees = 0
+        singletons = []
+        for stratum, group in self._by_stratum().items():
+            n, size = len(group), self.strata_sizes[stratum]
+            residuals = [s.matching_files(keyword) - ratio * s.files_in_project for s in group]
+            if n < 2:
+                if size > n:
+                    singletons.append(size)
+                continue
+            mean = sum(residuals) / n
+            within = sum((r - mean) ** 2 for r in residuals)
+            squares += within
+            degrees += n - 1
+            variance += size ** 2 * (1 - n / size) * within / (n - 1) / n
+
+        # Estratos com um só projeto amostrado usam a variância combinada dos demais
+        if singletons:
+            if not degrees:
+                return ratio, None
+            pooled = squares / degrees
+            variance += sum(size ** 2 * (1 - 1 / size) * pooled for size in singletons)
+
+        return ratio, Z_95 * math.sqrt(variance) / total_files
+
+    def _precision_reached(self) -> bool:
+        if len(self.samples) < SAMPLE_MIN_PROJECTS:
+            return False
+        margins = [self.estimate(keyword)[1] for keyword in self.scanner.keywords]
+        return all(margin is not None and margin <= SAMPLE_TARGET_MARGIN for margin in margins)
+
+    async def run(self) -> Dict:
+        start = time()
+        projects = self.scanner.gl.projects.list(all=True, statistics=True)
+        strata = defaultdict(list)
+        for project in projects:
+            strata[self._stratum(project)].append(project)
+        self.strata_sizes = {key: len(value) for key, value in strata.items()}
+        self.logger.info(f"Amostragem: {len(projects)} projetos em {len(strata)} estratos (grupo x tamanho)")
+
+        loop = asyncio.get_event_loop()
+        draws = self._draw_order(strata)
+        in_flight = {}
+        stop_reason = 'população esgotada'
+
+        def submit_next() -> bool:
+            draw = next(draws, None)
+            if draw is None:
+                return False
+            stratum, project = draw
+            future = loop.run_in_executor(
+                self.executor, self._sample_project, project, stratum, self.random.random()
+            )
+            in_flight[future] = project
+            return True
+
+        while len(in_flight) < self.workers and submit_next():
+            pass
+
+        while in_flight:
+            done, _ = await asyncio.wait(list(in_flight), return_when=asyncio.FIRST_COMPLETED)
+            for future in done:
+                project = in_flight.pop(future)
+                try:
+                    self.samples.append(future.result())
+                except Exception as e:
+                    self.logger.error(f"Projeto: {project.name} | Falha na amostragem: {str(e)}\n{traceback.format_exc()}")
+
+            if self._precision_reached():
+                stop_reason = 'precisão alvo atingida'
+                break
+            if time() - start >= SAMPLE_TIME_BUDGET:
+                stop_reason = 'orçamento de tempo esgotado'
+                break
+            while len(in_flight) < self.workers and submit_next():
+                pass
+
+        for future in in_flight:
+            future.cancel()
+
+        report = self._report(time() - start, stop_reason)
+        self._log_report(report)
+        SAMPLE_REPORT_FILE.parent.mkdir(parents=True, exist_ok=True)
+        SAMPLE_REPORT_FILE.write_text(json.dumps(report, indent=2, ensure_ascii=False))
+        self.logger.info(f"Relatório da estimativa salvo em {SAMPLE_REPORT_FILE}")
+        return report
+
+    def _report(self, elapsed: float, stop_reason: str) -> Dict:
+        total_files = self._total(lambda s: s.files_in_project)
+        keywords = {}
+        for keyword in self.scanner.keywords:
+            ratio, margin = self.estimate(keyword)
+            keywords[keyword] = {
+                'prevalencia': ratio,
+                # None: precisão indeterminada (estratos sem amostra ou sem variância estimável)
+                'ic95_inferior': max(0.0, ratio - margin) if margin is not None else None,
+                'ic95_superior': min(1.0, ratio + margin) if margin is not None else None,
+                'arquivos_estimados': ratio * total_files,
+                'projetos_com_ocorrencia_na_amostra': sum(1 for s in self.samples if s.hits.get(keyword))
+            }
+
+        # Projeção de custo: requisições e bytes extrapolados pelos pesos dos estratos,
+        # tempo pela vazão de requisições medida durante a amostragem
+        list_pages = math.ceil(sum(self.strata_sizes.values()) / max(1, self.scanner.gl.per_page))
+        full_requests = self._total(lambda s: s.full_requests) + list_pages
+        throughput = self.meter.requests / elapsed if elapsed > 0 else 0.0
+        return {
+            'motivo_parada': stop_reason,
+            'tempo_amostragem_s': elapsed,
+            'projetos_amostrados': len(self.samples),
+            'projetos_total': sum(self.strata_sizes.values()),
+            'estratos_amostrados': len(self._by_stratum()),
+            'estratos_total': len(self.strata_sizes),
+            'arquivos_amostrados': sum(s.sampled_files for s in self.samples),
+            'requisicoes_amostragem': self.meter.requests,
+            'bytes_amostragem': self.meter.bytes,
+            'palavras_chave': keywords,
+            'projecao_varredura_completa': {
+                'arquivos': total_files,
+                'requisicoes': full_requests,
+                'bytes': self._total(lambda s: s.full_bytes),
+                'tempo_s': full_requests / throughput if throughput else None,
+                'requisicoes_por_segundo': throughput
+            }
+        }
+
+    def _log_report(self, report: Dict):
+        projection = report['projecao_varredura_completa']
+        self.logger.info_blue("-" * 80)
+        self.logger.info_blue(
+            f"Estimativa concluída ({report['motivo_parada']}): "
+            f"{report['projetos_amostrados']} de {report['projetos_total']} projetos, "
+            f"{report['arquivos_amostrados']} arquivos em {report['tempo_amostragem_s']:.2f}s"
+        )
+        if report['estratos_amostrados'] < report['estratos_total']:
+            self.logger.warning(
+                f"Apenas {report['estratos_amostrados']} de {report['estratos_total']} estratos amostrados; "
+                "projeções usam a média geral para os demais e a precisão é indeterminada"
+            )
+        for keyword, data in report['palavras_chave'].items():
+            interval = (
+                f"IC 95%: {data['ic95_inferior']:.4%} - {data['ic95_superior']:.4%}"
+                if data['ic95_inferior'] is not None else "IC 95% indeterminado"
+            )
+            self.logger.info(
+                f"  - {keyword}: {data['prevalencia']:.4%} dos arquivos ({interval}), "
+                f"~{data['arquivos_estimados']:.0f} arquivos"
+            )
+        tempo = projection['tempo_s']
+        self.logger.info_blue(
+            f"Projeção da varredura completa: {projection['arquivos']:.0f} arquivos, "
+            f"{projection['requisicoes']:.0f} requisições, {projection['bytes'] / 1024 ** 2:.1f} MB, "
+            + (f"{tempo / 3600:.1f}h" if tempo is not None else "tempo indeterminado")
+        )
+        self.logger.info_blue("-" * 80)
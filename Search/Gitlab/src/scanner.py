@@ -2,7 +2,9 @@ import asyncio
 import gc
 import traceback
 import re
-from typing import List, Dict, Any, Set
+from collections import deque
+from urllib.parse import parse_qs, urlparse
+from typing import List, Dict, Any, Set, Iterator, Optional, Tuple
 from time import time
 import gitlab
 from concurrent.futures import ThreadPoolExecutor
@@ -14,12 +16,18 @@ from requests.exceptions import ConnectionError, ReadTimeout
 from src.config import (
     RETRY_ATTEMPTS, RETRY_WAIT_MULTIPLIER, RETRY_WAIT_MIN, RETRY_WAIT_MAX,
     TIMEOUT_API_GITLAB, PER_PAGE, KEYWORDS, CACHE_MAX_SIZE, BINARY_EXTENSIONS,
-    SETTINGS, BATCH_SIZE
+    SETTINGS, INCLUDE_PATHS, EXCLUDE_PATHS, TREE_WALK_MODE
 )
+from src.path_filter import PathFilter
+from src.token_pool import PooledSession
 
 class GitLabScanner:
-    def __init__(self, url: str, token: str, checkpoint, logger, executor):
-        self.gl = gitlab.Gitlab(url=url, private_token=token, per_page=PER_PAGE, timeout=TIMEOUT_API_GITLAB)
+    def __init__(self, url: str, tokens: List[str], checkpoint, logger, executor):
+        self.session = PooledSession(tokens, logger)
+        self.gl = gitlab.Gitlab(
+            url=url, private_token=tokens[0], per_page=PER_PAGE,
+            timeout=TIMEOUT_API_GITLAB, session=self.session
+        )
         self.checkpoint = checkpoint
         self.logger = logger
         self.executor = executor
@@ -27,6 +35,10 @@ class GitLabScanner:
         self.cache = OrderedDict()
         self.cache_size = CACHE_MAX_SIZE
         self.branch_patterns = [re.compile(pattern) for pattern in SETTINGS.get('BRANCH_PATTERNS', '').split(',')]
+        self.path_filter = PathFilter(INCLUDE_PATHS, EXCLUDE_PATHS)
+        self.walk_tree = TREE_WALK_MODE == 'walk' or (
+            TREE_WALK_MODE == 'auto' and self.path_filter.can_prune
+        )
 
     def _is_binary_file(self, file_path: str) -> bool:
         ext = file_path[file_path.rfind('.'):].lower() if '.' in file_path else ''
@@ -35,6 +47,73 @@ class GitLabScanner:
     def _is_branch_relevant(self, branch_name: str) -> bool:
         return any(pattern.match(branch_name) for pattern in self.branch_patterns)
 
+    def _iter_branch_files(self, project, branch: str) -> Iterator[Dict[str, Any]]:
+        """Lista os arquivos da branch que podem casar com os filtros de caminho"""
+        for files, _ in self._iter_branch_pages(project, branch):
+            yield from files
+
+    def _iter_branch_pages(self, project, branch: str,
+                           cursor: Optional[Dict[str, str]] = None) -> Iterator[Tuple[List[Dict[str, Any]], Optional[Dict[str, str]]]]:
+        """Entrega os arquivos da branch página a página, junto com o cursor da próxima página"""
+        if self.walk_tree:
+            # Na travessia por diretório o cursor não é retomável; cada listagem já é pequena
+            for files in self._walk_tree(project, branch):
+                yield files, None
+            return
+
+        for items, next_cursor in self._list_tree_pages(project, branch, recursive=True, cursor=cursor):
+            yield [
+                item for item in items
+                if item["type"] == "blob" and self.path_filter.matches(item["path"])
+            ], next_cursor
+
+    def _walk_tree(self, project, branch: str) -> Iterator[List[Dict[str, Any]]]:
+        """Percorre a árvore diretório a diretório, descartando subárvores que não podem casar"""
+        pending = deque([''])
+        while pending:
+            path = pending.popleft()
+            for items, _ in self._list_tree_pages(project, branch, path=path):
+                files = []
+                for item in items:
+                    if item["type"] == "tree":
+                        if self.path_filter.should_descend(item["path"]):
+                            pending.append(item["path"])
+                    elif item["type"] == "blob" and self.path_filter.matches(item["path"]):
+                        files.append(item)
+                yield files
+
+    def _list_tree_pages(self, project, branch: str, path: str = '', recursive: bool = False,
+                         cursor: Optional[Dict[str, str]] = None) -> Iterator[Tuple[List[Dict[str, Any]], Optional[Dict[str, str]]]]:
+        """Lista a árvore sob demanda com paginação keyset, sem carregar a listagem inteira em memória"""
+        query = {'ref': branch, 'per_page': PER_PAGE, 'pagination': 'keyset'}
+        if path:
+            query['path'] = path
+        if recursive:
+            query['recursive'] = True
+
+        while True:
+            response = self.gl.http_get(
+                f'/projects/{project.id}/repository/tree',
+                query_data={**query, **(cursor or {})},
+                raw=True
+            )
+            cursor = self._next_tree_cursor(response)
+            yield response.json(), cursor
+            if cursor is None:
+                return
+
+    @staticmethod
+    def _next_tree_cursor(response) -> Optional[Dict[str, str]]:
+        """Extrai o cursor da próxima página (page_token keyset ou página por offset em instâncias antigas)"""
+        next_url = response.links.get('next', {}).get('url')
+        if next_url:
+            params = parse_qs(urlparse(next_url).query)
+            for key in ('page_token', 'page'):
+                if key in params:
+                    return {key: params[key][0]}
+        next_page = response.headers.get('X-Next-Page')
+        return {'page': next_page} if next_page else None
+
     async def scan(self):
         try:
             projects = self.gl.projects.list(all=True)
@@ -95,16 +174,17 @@ class GitLabScanner:
             branch_start = time()
             self.logger.info(f"Projeto: {project.name} | Branch: {branch} | Iniciando análise...")
             
-            items = project.repository_tree(ref=branch, recursive=True, all=True)
-            files = [item for item in items if item["type"] == "blob"]
+            cursor = self.checkpoint.get_tree_cursor(project.id, branch)
+            if cursor:
+                self.logger.info(f"Projeto: {project.name} | Branch: {branch} | Retomando listagem a partir de {cursor}")
             
-            # Processa arquivos em lotes
-            for i in range(0, len(files), BATCH_SIZE):
-                file_batch = files[i:i + BATCH_SIZE]
-                
-                for file_info in file_batch:
+            # Processa a árvore página a página; o cursor só avança após a página inteira ser analisada
+            for files, next_cursor in self._iter_branch_pages(project, branch, cursor):
+                for file_info in files:
                     if not self.checkpoint.is_file_completed(project.id, branch, file_info['path']):
                         self._scan_file_sync(project, branch, file_info)
+                if next_cursor:
+                    self.checkpoint.save_tree_cursor(project.id, branch, next_cursor)
             
             self.checkpoint.mark_branch_completed(project.id, branch)
             self.logger.info(f"Projeto: {project.name} | Branch: {branch} | Análise concluída ({time() - branch_start:.2f}s)")
@@ -112,19 +192,68 @@ class GitLabScanner:
         except Exception as e:
             self.logger.error(f"Projeto: {project.name} | Branch: {branch} | Falha na análise: {str(e)}")
 
+    def scan_push_sync(self, event):
+        """Analisa apenas os arquivos alterados por um evento de push"""
+        try:
+            push_start = time()
+            project = self.gl.projects.get(event.project_id)
+
+            if not self._is_branch_relevant(event.branch):
+                return
+
+            if event.is_new_branch:
+                self.logger.info(f"Projeto: {project.name} | Branch: {event.branch} | Nova branch, análise completa")
+                self._scan_branch_sync(project, event.branch)
+                return
+
+            paths = event.paths if event.complete else self._compare_paths(project, event)
+            pending = sorted(path for path in paths if self.path_filter.matches(path))
+            self.logger.info(
+                f"Projeto: {project.name} | Branch: {event.branch} | "
+                f"Push {event.after[:8]}: {len(pending)} arquivo(s) alterado(s) para análise"
+            )
+
+            for path in pending:
+                self._scan_file_sync(project, event.branch, {'path': path})
+
+            self.logger.info(
+                f"Projeto: {project.name} | Branch: {event.branch} | "
+                f"Push {event.after[:8]} analisado ({time() - push_start:.2f}s)"
+            )
+
+        except Exception as e:
+            self.logger.error(
+                f"Projeto: {event.project_id} | Branch: {event.branch} | "
+                f"Falha na análise do push: {str(e)}\n{traceback.format_exc()}"
+            )
+
+    def _compare_paths(self, project, event) -> Set[str]:
+        """Obtém os arquivos alterados entre dois commits quando o payload vem truncado"""
+        comparison = project.repository_compare(event.before, event.after)
+        return {
+            diff['new_path'] for diff in comparison.get('diffs', [])
+            if not diff.get('deleted_file')
+        }
+
+    def _fetch_content(self, project, branch: str, path: str) -> str:
+        file_content = project.files.get(file_path=path, ref=branch)
+        content = file_content.decode()
+        
+        if isinstance(content, bytes):
+            content = content.decode('utf-8', errors='ignore')
+        return content
+
+    def _find_matches(self, content: str) -> List[str]:
+        return [keyword for keyword in self.keywords if keyword in content]
+
     def _scan_file_sync(self, project, branch, file_info):
         try:
             if self._is_binary_file(file_info['path']):
                 self.checkpoint.mark_file_completed(project.id, branch, file_info['path'])
                 return
 
-            file_content = project.files.get(file_path=file_info['path'], ref=branch)
-            content = file_content.decode()
-            
-            if isinstance(content, bytes):
-                content = content.decode('utf-8', errors='ignore')
-            
-            matches = [keyword for keyword in self.keywords if keyword in content]
+            content = self._fetch_content(project, branch, file_info['path'])
+            matches = self._find_matches(content)
             if matches:
                 self.logger.success(
                     f"Projeto: {project.name} | Branch: {branch} | "
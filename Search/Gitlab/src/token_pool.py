@@ -0,0 +1,196 @@
+import threading
+from time import time
+from typing import Dict, List, Optional
+import requests
+from requests.adapters import HTTPAdapter
+from src.config import POOL_CONSIZE, POOL_MAXSIZE
+
+# Status que indicam diferença de permissão entre identidades
+PERMISSION_STATUSES = (401, 403)
+
+
+class TokenState:
+    def __init__(self, token: str, index: int):
+        self.token = token
+        self.name = f"token#{index}"
+        self.limit: Optional[int] = None
+        self.remaining: Optional[int] = None
+        self.reset_at = 0.0
+        self.drained_until = 0.0
+        self.in_flight = 0
+        self.requests = 0
+        self.throttled = 0
+        self.denied = 0
+
+    def available(self, now: float) -> bool:
+        if now < self.drained_until:
+            return False
+        if self.remaining is not None and self.remaining <= 0 and now < self.reset_at:
+            return False
+        return True
+
+    def budget(self, now: float) -> float:
+        """Orçamento restante; sem cabeçalhos de rate limit, o balanceamento fica pelas requisições em andamento"""
+        if self.remaining is None or now >= self.reset_at:
+            remaining = self.limit if self.limit is not None else float('inf')
+        else:
+            remaining = self.remaining
+        return remaining - self.in_flight
+
+
+class TokenPool:
+    """Distribui requisições entre vários tokens conforme o orçamento de rate limit de cada identidade"""
+
+    def __init__(self, tokens: List[str]):
+        if not tokens:
+            raise ValueError("Nenhum token informado")
+        self.tokens = [TokenState(token, idx + 1) for idx, token in enumerate(tokens)]
+        self.condition = threading.Condition()
+
+    def __len__(self) -> int:
+        return len(self.tokens)
+
+    def acquire(self, exclude: Optional[TokenState] = None) -> TokenState:
+        """Seleciona o token com maior orçamento; aguarda o reset se todos estiverem esgotados"""
+        with self.condition:
+            while True:
+                now = time()
+                candidates = [t for t in self.tokens if t is not exclude and t.available(now)]
+                if not candidates and exclude is not None and exclude.available(now):
+                    candidates = [exclude]
+                if candidates:
+                    state = max(candidates, key=lambda t: (t.budget(now), -t.in_flight))
+                    state.in_flight += 1
+                    return state
+                wake_at = min(max(t.drained_until, t.reset_at) for t in self.tokens)
+                self.condition.wait(timeout=max(0.1, wake_at - now))
+
+    def pin(self, state: TokenState) -> TokenState:
+        """Reserva um token específico, independente do orçamento"""
+        with self.condition:
+            state.in_flight += 1
+            return state
+
+    def release(self, state: TokenState, response: Optional[requests.Response], sent: bool = True):
+        """Devolve a reserva; só conta a requisição quando o token foi de fato usado no envio"""
+        with self.condition:
+            state.in_flight -= 1
+            if sent:
+                state.requests += 1
+            if response is not None:
+                self._record(state, response)
+            self.condition.notify_all()
+
+    @staticmethod
+    def _record(state: TokenState, response: requests.Response):
+        headers = response.headers
+        if 'RateLimit-Limit' in headers:
+            state.limit = int(headers['RateLimit-Limit'])
+        if 'RateLimit-Remaining' in headers:
+            state.remaining = int(headers['RateLimit-Remaining'])
+        if 'RateLimit-Reset' in headers:
+            state.reset_at = float(headers['RateLimit-Reset'])
+
+        if response.status_code == 429:
+            state.throttled += 1
+            retry_after = headers.get('Retry-After')
+            reset_at = time() + float(retry_after) if retry_after else state.reset_at
+            # Sem indicação de reset, o token descansa por um intervalo curto antes de voltar ao pool
+            state.drained_until = max(reset_at, time() + 1)
+            state.remaining = 0
+        elif response.status_code in PERMISSION_STATUSES:
+            state.denied += 1
+
+    def summary(self) -> List[Dict]:
+        with self.condition:
+            return [
+                {
+                    'token': t.name,
+                    'requisicoes': t.requests,
+                    'rate_limited': t.throttled,
+                    'negadas': t.denied,
+                    'restante': t.remaining
+                }
+                for t in self.tokens
+            ]
+
+
+class PooledSession(requests.Session):
+    """Sessão HTTP que injeta, a cada requisição, o token do pool com mais orçamento disponível.
+
+    Respostas 429 drenam o token até o reset e a requisição é reenviada com outra
+    identidade; respostas 401/403 são confirmadas com outro token para detectar
+    diferenças de permissão entre as contas do pool.
+    """
+
+    def __init__(self, tokens: List[str], logger):
+        super().__init__()
+        self.pool = TokenPool(tokens)
+        self.logger = logger
+        self.permission_mismatches = 0
+        adapter = HTTPAdapter(pool_connections=POOL_CONSIZE, pool_maxsize=POOL_MAXSIZE)
+        self.mount('https://', adapter)
+        self.mount('http://', adapter)
+
+    def _send_with(self, state: TokenState, request, **kwargs) -> requests.Response:
+        request.headers['PRIVATE-TOKEN'] = state.token
+        response = None
+        try:
+            response = super().send(request, **kwargs)
+            return response
+        finally:
+            self.pool.release(state, response)
+
+    def send(self, request, **kwargs) -> requests.Response:
+        state = self.pool.acquire()
+        response = self._send_with(state, request, **kwargs)
+
+        # Cada token pode ser drenado uma vez antes de devolver o 429 ao python-gitlab
+        for _ in range(len(self.pool) - 1):
+            if response.status_code != 429:
+                break
+            self.logger.warning(f"Rate limit atingido com {state.name}; requisição redirecionada")
+            state = self.pool.acquire(exclude=state)
+            response = self._send_with(state, request, **kwargs)
+
+        if response.status_code in PERMISSION_STATUSES and len(self.pool) > 1 and request.method == 'GET':
+            other = self.pool.acquire(exclude=state)
+            if other is state:
+                self.pool.release(other, None, sent=False)
+            else:
+                retried = self._send_with(other, request, **kwargs)
+                if retried.status_code != response.status_code:
+                    self.permission_mismatches += 1
+                    self.logger.warning(
+                        f"Permissões diferentes entre {state.name} ({response.status_code}) e "
+                        f"{other.name} ({retried.status_code}) em {request.path_url.split('?')[0]}"
+                    )
+                    return retried
+        return response
+
+    def verify_tokens(self, api_url: str) -> List[Dict]:
+        """Valida cada token e compara a quantidade de projetos visíveis por identidade"""
+        identities = []
+        for state in self.pool.tokens:
+            user = self._send_with(self.pool.pin(state), self.prepare_request(
+                requests.Request('GET', f"{api_url}/user")
+            ))
+            projects = self._send_with(self.pool.pin(state), self.prepare_request(
+                requests.Request('GET', f"{api_url}/projects", params={'per_page': 1, 'simple': True})
+            ))
+            identities.append({
+                'token': state.name,
+                'usuario': user.json().get('username') if user.ok else None,
+                'projetos_visiveis': projects.headers.get('X-Total') if projects.ok else None
+            })
+
+        visible = {i['projetos_visiveis'] for i in identities}
+        for identity in identities:
+            if identity['usuario'] is None:
+                self.logger.error(f"{identity['token']} inválido ou sem acesso à API")
+        if len(visible) > 1:
+            self.logger.warning(
+                "Tokens com permissões diferentes: " +
+                ", ".join(f"{i['token']}={i['projetos_visiveis']}" for i in identities)
+            )
+        return identities
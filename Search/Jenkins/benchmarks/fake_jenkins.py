@@ -0,0 +1,269 @@
+"""Controller Jenkins sintético para benchmarks: serve /api/json (com `tree=`), pastas aninhadas e config.xml.
+
+Uso (a partir do diretório Search/Jenkins):
+    python -m benchmarks.fake_jenkins --jobs 5000 --depth 3 --width 4 --latency 0.02 --error-rate 0.01
+
+O conjunto de dados é gerado de forma determinística a partir de `--seed`: a mesma
+linha de comando produz sempre as mesmas pastas, jobs e conteúdos. Os config.xml
+são gerados sob demanda; jobs duplicados compartilham o mesmo conteúdo (e ETag).
+Ao ficar pronto, o servidor imprime `PORT <porta>` na saída padrão. Contadores
+de requisições por endpoint e status ficam em GET /__stats.
+"""
+import argparse
+import asyncio
+import hashlib
+import math
+import random
+import re
+from collections import Counter
+from dataclasses import dataclass, asdict
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+from xml.sax.saxutils import escape
+
+FOLDER_CLASS = 'com.cloudbees.hudson.plugins.folder.Folder'
+JOB_CLASS = 'org.jenkinsci.plugins.workflow.job.WorkflowJob'
+DEFAULT_KEYWORDS = ['gitauto', 'gitdev']
+# Conteúdos distintos usados pelos jobs duplicados
+DUPLICATE_POOL = 50
+
+@dataclass
+class DatasetSpec:
+    jobs: int = 1000
+    depth: int = 2
+    width: int = 5
+    config_size: int = 8192
+    config_sigma: float = 1.0
+    duplicate_ratio: float = 0.3
+    keyword_ratio: float = 0.1
+    keywords: Tuple[str, ...] = tuple(DEFAULT_KEYWORDS)
+    latency: float = 0.005
+    error_rate: float = 0.0
+    throttle_rate: float = 0.0
+    retry_after: int = 1
+    seed: int = 1
+
+    @classmethod
+    def add_arguments(cls, parser: argparse.ArgumentParser):
+        group = parser.add_argument_group('conjunto de dados e servidor')
+        group.add_argument('--jobs', type=int, default=cls.jobs, help="quantidade de jobs")
+        group.add_argument('--depth', type=int, default=cls.depth, help="níveis de pastas")
+        group.add_argument('--width', type=int, default=cls.width, help="subpastas por pasta")
+        group.add_argument('--config-size', type=int, default=cls.config_size,
+                           help="tamanho mediano do config.xml em bytes")
+        group.add_argument('--config-sigma', type=float, default=cls.config_sigma,
+                           help="dispersão (log-normal) do tamanho dos config.xml")
+        group.add_argument('--duplicate-ratio', type=float, default=cls.duplicate_ratio,
+                           help="fração de jobs com config.xml idêntico a outro")
+        group.add_argument('--keyword-ratio', type=float, default=cls.keyword_ratio,
+                           help="fração de config.xml contendo palavras-chave")
+        group.add_argument('--keywords', default=','.join(DEFAULT_KEYWORDS),
+                           help="palavras-chave inseridas nos config.xml (separadas por vírgula)")
+        group.add_argument('--latency', type=float, default=cls.latency,
+                           help="latência média (segundos, exponencial) de cada resposta")
+        group.add_argument('--error-rate', type=float, default=cls.error_rate, help="fração de respostas 503")
+        group.add_argument('--throttle-rate', type=float, default=cls.throttle_rate, help="fração de respostas 429")
+        group.add_argument('--retry-after', type=int, default=cls.retry_after, help="Retry-After das respostas 429")
+        group.add_argument('--seed', type=int, default=cls.seed)
+
+    @classmethod
+    def from_args(cls, args: argparse.Namespace) -> 'DatasetSpec':
+        return cls(
+            jobs=args.jobs, depth=args.depth, width=args.width,
+            config_size=args.config_size, config_sigma=args.config_sigma,
+            duplicate_ratio=args.duplicate_ratio, keyword_ratio=args.keyword_ratio,
+            keywords=tuple(k for k in args.keywords.split(',') if k),
+            latency=args.latency, error_rate=args.error_rate,
+            throttle_rate=args.throttle_rate, retry_after=args.retry_after, seed=args.seed
+        )
+
+    def to_args(self) -> List[str]:
+        """Linha de comando equivalente, para iniciar o servidor em outro processo."""
+        args = []
+        for key, value in asdict(self).items():
+            if key == 'keywords':
+                value = ','.join(value)
+            args += [f"--{key.replace('_', '-')}", str(value)]
+        return args
+
+class Node:
+    __slots__ = ('name', 'children', 'template')
+
+    def __init__(self, name: str, template: Optional[int] = None):
+        self.name = name
+        self.children: Optional[List['Node']] = None if template is not None else []
+        self.template = template
+
+class Dataset:
+    """Árvore de pastas com `width` subpastas por nível e os jobs distribuídos entre as folhas."""
+
+    def __init__(self, spec: DatasetSpec):
+        self.spec = spec
+        rng = random.Random(spec.seed)
+        self.root = Node('')
+        self.nodes: Dict[Tuple[str, ...], Node] = {(): self.root}
+
+        leaves = [((), self.root)]
+        for level in range(spec.depth):
+            next_leaves = []
+            for path, node in leaves:
+                for idx in range(spec.width):
+                    name = f"folder-{level}-{idx}"
+                    child = Node(name)
+                    node.children.append(child)
+                    self.nodes[path + (name,)] = child
+                    next_leaves.append((path + (name,), child))
+            leaves = next_leaves
+
+        for idx in range(spec.jobs):
+            # Jobs duplicados apontam para um conjunto pequeno de conteúdos compartilhados
+            template = rng.randrange(DUPLICATE_POOL) if rng.random() < spec.duplicate_ratio else DUPLICATE_POOL + idx
+            path, folder = leaves[idx % len(leaves)]
+            job = Node(f"job-{idx}", template)
+            folder.children.append(job)
+            self.nodes[path + (job.name,)] = job
+
+    def describe(self, node: Node, url: str, levels: int) -> Dict:
+        """Representação do nó no formato da API JSON, com `levels` níveis de filhos."""
+        if node.children is None:
+            return {'_class': JOB_CLASS, 'name': node.name, 'url': url}
+        data = {'_class': FOLDER_CLASS, 'name': node.name, 'url': url}
+        if levels > 0:
+            data['jobs'] = [
+                self.describe(child, f"{url}job/{child.name}/", levels - 1) for child in node.children
+            ]
+        return data
+
+    @lru_cache(maxsize=1024)
+    def config(self, template: int) -> Tuple[bytes, str]:
+        """config.xml do modelo e seu ETag; mesmo modelo, mesmo conteúdo."""
+        spec = self.spec
+        rng = random.Random(spec.seed * 1000003 + template)
+        size = max(256, int(rng.lognormvariate(math.log(spec.config_size), spec.config_sigma)))
+        lines = []
+        total = 0
+        while total < size:
+            line = f"        sh 'echo step {rng.getrandbits(48):012x} && make target-{rng.randrange(1000)}'"
+            lines.append(line)
+            total += len(line) + 1
+        if spec.keywords and rng.random() < spec.keyword_ratio:
+            lines.insert(rng.randrange(len(lines) + 1), f"        sh '{rng.choice(spec.keywords)} --deploy'")
+        # Conteúdo escapado como o Jenkins grava: o documento precisa ser XML válido
+        script = escape("\n".join(lines))
+        body = (
+            "<?xml version='1.1' encoding='UTF-8'?>\n"
+            f"<flow-definition plugin=\"workflow-job\">\n"
+            f"  <description>Job sintético {template}</description>\n"
+            "  <definition class=\"org.jenkinsci.plugins.workflow.cps.CpsFlowDefinition\" plugin=\"workflow-cps\">\n"
+            f"    <script>pipeline {{\n  stages {{\n{script}\n  }}\n}}</script>\n"
+            "    <sandbox>true</sandbox>\n"
+            "  </definition>\n"
+            "</flow-definition>\n"
+        ).encode()
+        return body, f'"{hashlib.sha1(body).hexdigest()}"'
+
+def tree_depth(tree: str) -> int:
+    """Níveis de `jobs[...]` aninhados na query `tree`."""
+    depth = 0
+    for match in re.finditer(r'jobs\[|\]', tree):
+        if match.group() == 'jobs[':
+            depth += 1
+        else:
+            break
+    return max(1, depth)
+
+class FakeJenkins:
+    def __init__(self, spec: DatasetSpec):
+        self.spec = spec
+        self.dataset = Dataset(spec)
+        self.stats = Counter()
+        self._rng = random.Random(spec.seed)
+
+    def app(self):
+        from aiohttp import web
+
+        app = web.Application()
+        app.router.add_get('/__stats', self.handle_stats)
+        app.router.add_get('/{path:.*}', self.handle)
+        return app
+
+    async def handle_stats(self, request):
+        from aiohttp import web
+        return web.json_response({'jobs': self.spec.jobs, **self.stats})
+
+    async def handle(self, request):
+        from aiohttp import web
+
+        path = request.path
+        endpoint = 'config.xml' if path.endswith('/config.xml') else 'api/json' if path.endswith('/api/json') else 'other'
+        self.stats[f'requests_{endpoint}'] += 1
+        self.stats['requests'] += 1
+
+        if self.spec.latency > 0:
+            await asyncio.sleep(self._rng.expovariate(1 / self.spec.latency))
+        roll = self._rng.random()
+        if roll < self.spec.error_rate:
+            self.stats['status_503'] += 1
+            return web.Response(status=503, text="Service Unavailable")
+        if roll < self.spec.error_rate + self.spec.throttle_rate:
+            self.stats['status_429'] += 1
+            return web.Response(status=429, headers={'Retry-After': str(self.spec.retry_after)})
+
+        base = path[:-len(endpoint) - 1] if endpoint != 'other' else path.rstrip('/')
+        parts = tuple(part for part in base.strip('/').split('/') if part)
+        if len(parts) % 2 or any(part != 'job' for part in parts[::2]):
+            return self._not_found()
+        node = self.dataset.nodes.get(parts[1::2])
+        if node is None:
+            return self._not_found()
+        url = f"{request.scheme}://{request.host}{base}/"
+
+        if endpoint == 'api/json':
+            levels = tree_depth(request.query.get('tree', 'jobs[name]'))
+            data = self.dataset.describe(node, url, levels)
+            self.stats['status_200'] += 1
+            return web.json_response(data)
+
+        if endpoint == 'config.xml' and node.template is not None:
+            body, etag = self.dataset.config(node.template)
+            if request.headers.get('If-None-Match') == etag:
+                self.stats['status_304'] += 1
+                return web.Response(status=304, headers={'ETag': etag})
+            self.stats['status_200'] += 1
+            self.stats['bytes_sent'] += len(body)
+            return web.Response(body=body, content_type='application/xml', headers={'ETag': etag})
+
+        return self._not_found()
+
+    def _not_found(self):
+        from aiohttp import web
+        self.stats['status_404'] += 1
+        return web.Response(status=404)
+
+async def serve(spec: DatasetSpec, host: str, port: int):
+    from aiohttp import web
+
+    server = FakeJenkins(spec)
+    runner = web.AppRunner(server.app(), access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    print(f"PORT {runner.addresses[0][1]}", flush=True)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=0, help="0 escolhe uma porta livre")
+    DatasetSpec.add_arguments(parser)
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(DatasetSpec.from_args(args), args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""Benchmark de varredura: executa src.main contra um controller Jenkins sintético e mede o desempenho.
+
+Uso (a partir do diretório Search/Jenkins):
+    python -m benchmarks.scan --jobs 2000 --output atual.json
+    python -m benchmarks.scan --jobs 2000 --compare atual.json   # código 1 se houver regressão
+    python -m benchmarks.scan --warm --error-rate 0.02 --throttle-rate 0.01
+    python -m benchmarks.scan --jobs 5000 --shard-workers 4 --shard-mode job
+
+O servidor (benchmarks.fake_jenkins) roda em outro processo, e a aplicação é
+executada sem alterações em um diretório temporário (JENKINS_SEARCH_HOME) com
+cache, checkpoint e logs próprios. Com `--warm` a varredura é repetida sobre o
+cache da primeira, sem o checkpoint, medindo o caminho de revalidação (304).
+As latências vêm do trace da execução; as requisições, do próprio servidor.
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+
+from benchmarks.fake_jenkins import DatasetSpec
+
+ROOT = Path(__file__).resolve().parent.parent
+# Métricas comparadas com --compare: True quando valores maiores são melhores
+COMPARED_METRICS = {
+    'wall_s': False,
+    'jobs_per_s': True,
+    'requests_per_job': False,
+    'http_p50_ms': False,
+    'http_p99_ms': False,
+    'job_p99_ms': False,
+    'peak_rss_mb': False
+}
+
+def _percentile(values: list, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+def start_server(spec: DatasetSpec) -> tuple:
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'benchmarks.fake_jenkins', *spec.to_args()],
+        cwd=ROOT, stdout=subprocess.PIPE, text=True
+    )
+    line = process.stdout.readline()
+    if not line.startswith('PORT '):
+        process.kill()
+        raise RuntimeError("Servidor sintético não iniciou")
+    return process, f"http://127.0.0.1:{int(line.split()[1])}/"
+
+def server_stats(base_url: str) -> dict:
+    with urllib.request.urlopen(f"{base_url}__stats") as response:
+        return json.loads(response.read())
+
+def write_settings(home: Path, base_url: str, spec: DatasetSpec, report_format: str,
+                   shard_workers: int = 0, shard_mode: str = 'server', match_mode: str = 'text'):
+    """settings.txt mínimo: os demais valores vêm dos padrões de src/config/settings.py."""
+    overrides = {
+        'JENKINS_SERVERS': [base_url],
+        'KEYWORDS': list(spec.keywords),
+        'USERNAME': 'benchmark',
+        'API_TOKEN': 'benchmark',
+        'TRACE_ENABLED': True,
+        'SCM_ENABLED': False,
+        # Sem validade local: a varredura com --warm revalida cada config.xml com GET condicional
+        'CACHE_DURATION': 0,
+        'REPORT_FORMAT': report_format,
+        'SHARD_WORKERS': shard_workers,
+        'SHARD_MODE': shard_mode,
+        'MATCH_MODE': match_mode
+    }
+    home.mkdir(parents=True, exist_ok=True)
+    (home / 'settings.txt').write_text(''.join(f"{key} = {value!r}\n" for key, value in overrides.items()))
+
+def run_scan(home: Path) -> dict:
+    """Executa a aplicação e retorna tempo de parede, pico de memória e código de saída."""
+    env = {k: v for k, v in os.environ.items() if k not in ('JENKINS_USERNAME', 'JENKINS_API_TOKEN')}
+    env['JENKINS_SEARCH_HOME'] = str(home)
+    with open(home / 'stdout.log', 'w') as output:
+        started = time.perf_counter()
+        process = subprocess.Popen(
+            [sys.executable, '-m', 'src.main'], cwd=ROOT, env=env,
+            stdout=output, stderr=subprocess.STDOUT
+        )
+        # wait4 traz o pico de memória do maior processo entre o filho e os processos que ele aguardou
+        _, status, usage = os.wait4(process.pid, 0)
+        elapsed = time.perf_counter() - started
+    process.returncode = os.waitstatus_to_exitcode(status)
+    return {
+        'wall_s': elapsed,
+        'peak_rss_mb': usage.ru_maxrss / 1024 if sys.platform != 'darwin' else usage.ru_maxrss / 1024 / 1024,
+        'exit_code': process.returncode
+    }
+
+def trace_durations(home: Path, since: float) -> dict:
+    """Durações (ms) por nome de span, lidas dos traces gravados pela execução (um por processo)."""
+    durations: dict = {}
+    for trace in (home / 'logs').glob('trace_*.json'):
+        if trace.stat().st_mtime < since:
+            continue
+        # Um evento por linha; o trace de um processo interrompido fica sem o fechamento do array
+        for line in trace.read_text().splitlines():
+            try:
+                event = json.loads(line.rstrip(','))
+            except ValueError:
+                continue
+            if isinstance(event, dict) and event.get('ph') == 'X':
+                durations.setdefault(event['name'], []).append(event['dur'] / 1000)
+    return durations
+
+def measure(home: Path, base_url: str) -> dict:
+    before = server_stats(base_url)
+    started = time.time()
+    run = run_scan(home)
+    after = server_stats(base_url)
+    spans = trace_durations(home, started)
+
+    http = [d for name, values in spans.items() if name.startswith('http.get') for d in values]
+    jobs = spans.get('job', [])
+    requests = after.get('requests', 0) - before.get('requests', 0)
+    job_count = len(jobs) or after['jobs']
+    return {
+        'wall_s': round(run['wall_s'], 3),
+        'jobs': len(jobs),
+        'jobs_per_s': round(len(jobs) / run['wall_s'], 1) if run['wall_s'] else 0.0,
+        'requests': requests,
+        'requests_per_job': round(requests / job_count, 3) if job_count else 0.0,
+        'http_p50_ms': round(_percentile(http, 50), 2),
+        'http_p99_ms': round(_percentile(http, 99), 2),
+        'job_p50_ms': round(_percentile(jobs, 50), 2),
+        'job_p99_ms': round(_percentile(jobs, 99), 2),
+        'peak_rss_mb': round(run['peak_rss_mb'], 1),
+        'responses': {
+            key: after.get(key, 0) - before.get(key, 0)
+            for key in after if key.startswith('status_')
+        },
+        'exit_code': run['exit_code']
+    }
+
+def reset_checkpoint(home: Path):
+    """Remove checkpoint e resultados para a próxima varredura reprocessar tudo, mantendo o cache."""
+    for name in ('checkpoint.json', 'checkpoint.journal', 'results.jsonl'):
+        (home / 'cache' / name).unlink(missing_ok=True)
+
+def compare(result: dict, baseline: dict, tolerance: float) -> list:
+    failures = []
+    for run in ('cold', 'warm'):
+        if run not in result or run not in baseline:
+            continue
+        for metric, higher_is_better in COMPARED_METRICS.items():
+            current, previous = result[run][metric], baseline[run][metric]
+            if not previous:
+                continue
+            change = (current - previous) / previous
+            if (change < -tolerance) if higher_is_better else (change > tolerance):
+                failures.append(f"{run}.{metric}: {previous} -> {current} ({change:+.1%})")
+    return failures
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--warm', action='store_true', help="repete a varredura com o cache da primeira")
+    parser.add_argument('--report-format', default='csv', choices=('xlsx', 'csv', 'parquet'))
+    parser.add_argument('--output', type=Path, help="grava o resultado em JSON")
+    parser.add_argument('--compare', type=Path, help="resultado anterior para detectar regressões")
+    parser.add_argument('--tolerance', type=float, default=0.15, help="piora relativa aceita em --compare")
+    parser.add_argument('--shard-workers', type=int, default=0, help="SHARD_WORKERS da aplicação")
+    parser.add_argument('--shard-mode', default='server', choices=('server', 'job'), help="SHARD_MODE da aplicação")
+    parser.add_argument('--match-mode', default='text', choices=('text', 'xml'), help="MATCH_MODE da aplicação")
+    parser.add_argument('--keep', action='store_true', help="mantém o diretório temporário da execução")
+    DatasetSpec.add_arguments(parser)
+    args = parser.parse_args()
+
+    spec = DatasetSpec.from_args(args)
+    server, base_url = start_server(spec)
+    home = Path(tempfile.mkdtemp(prefix='jenkins_search_bench_'))
+    try:
+        write_settings(home, base_url, spec, args.report_format, args.shard_workers, args.shard_mode,
+                       args.match_mode)
+        result = {'dataset': vars(spec), 'cold': measure(home, base_url)}
+        if args.warm:
+            reset_checkpoint(home)
+            result['warm'] = measure(home, base_url)
+    finally:
+        server.terminate()
+        server.wait()
+        if not args.keep:
+            shutil.rmtree(home, ignore_errors=True)
+        else:
+            print(f"Diretório da execução: {home}", file=sys.stderr)
+
+    print(json.dumps(result, indent=4))
+    if args.output:
+        args.output.write_text(json.dumps(result, indent=4) + "\n")
+
+    failures = [f"{run}: código de saída {result[run]['exit_code']}"
+                for run in ('cold', 'warm') if run in result and result[run]['exit_code'] != 0]
+    if args.compare:
+        failures += compare(result, json.loads(args.compare.read_text()), args.tolerance)
+    for failure in failures:
+        print(f"REGRESSÃO - {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+"""Benchmark de inicialização: mede o custo de importar src.main e falha se houver regressão.
+
+Uso (a partir do diretório Search/Jenkins):
+    python -m benchmarks.startup              # compara com benchmarks/startup_budget.json
+    python -m benchmarks.startup --update     # grava um novo orçamento a partir da medição atual
+
+Cada medição roda em um interpretador novo. São registrados o tempo total de
+importação informado por `-X importtime` e o tempo de parede descontado do
+interpretador vazio. Também é verificado que dependências pesadas só são carregadas
+quando a funcionalidade correspondente é usada.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+BUDGET_FILE = Path(__file__).resolve().parent / "startup_budget.json"
+TARGET = "src.main"
+# Módulos que não devem ser carregados apenas por importar a aplicação
+LAZY_MODULES = ['aiohttp', 'psutil', 'multiprocessing', 'urllib.request', 'xlsxwriter', 'pyarrow', 'pandas', 'openpyxl']
+# Folga aplicada sobre a medição ao gravar um novo orçamento
+UPDATE_MARGIN = 1.5
+
+def _run(code: str, *flags: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *flags, "-c", code],
+        cwd=ROOT, capture_output=True, text=True
+    )
+
+def _wall_time(code: str) -> float:
+    start = time.perf_counter()
+    result = _run(code)
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr)
+    return elapsed * 1000
+
+def _import_cost(module: str) -> float:
+    """Tempo cumulativo (ms) de importação do módulo segundo `-X importtime`."""
+    result = _run(f"import {module}", "-X", "importtime")
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr)
+    for line in result.stderr.splitlines():
+        parts = [p.strip() for p in line.split('|')]
+        if len(parts) == 3 and parts[2] == module:
+            return int(parts[1]) / 1000
+    raise RuntimeError(f"{module} não encontrado na saída de importtime")
+
+def _loaded_modules(module: str) -> list:
+    result = _run(f"import {module}, sys, json; print(json.dumps(sorted(sys.modules)))")
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr)
+    loaded = set(json.loads(result.stdout.strip().splitlines()[-1]))
+    return [name for name in LAZY_MODULES if name in loaded]
+
+def measure(runs: int) -> dict:
+    imports = [_import_cost(TARGET) for _ in range(runs)]
+    baseline = [_wall_time("pass") for _ in range(runs)]
+    walls = [_wall_time(f"import {TARGET}") for _ in range(runs)]
+    return {
+        'import_ms': round(statistics.median(imports), 1),
+        'startup_ms': round(max(0.0, statistics.median(walls) - statistics.median(baseline)), 1),
+        'eager_modules': _loaded_modules(TARGET)
+    }
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=7, help="execuções por medição (mediana)")
+    parser.add_argument('--update', action='store_true', help="grava o orçamento a partir da medição atual")
+    args = parser.parse_args()
+
+    result = measure(args.runs)
+    print(
+        f"importação de {TARGET}: {result['import_ms']:.1f} ms | "
+        f"inicialização: {result['startup_ms']:.1f} ms | "
+        f"módulos pesados carregados: {', '.join(result['eager_modules']) or 'nenhum'}"
+    )
+
+    if args.update:
+        budget = {
+            'import_ms': round(result['import_ms'] * UPDATE_MARGIN, 1),
+            'startup_ms': round(result['startup_ms'] * UPDATE_MARGIN, 1)
+        }
+        BUDGET_FILE.write_text(json.dumps(budget, indent=4) + "\n")
+        print(f"Orçamento atualizado em {BUDGET_FILE}")
+        return 0
+
+    if not BUDGET_FILE.exists():
+        print(f"Orçamento não encontrado em {BUDGET_FILE}; execute com --update para gravá-lo", file=sys.stderr)
+        return 2
+    budget = json.loads(BUDGET_FILE.read_text())
+    failures = []
+    for key in ('import_ms', 'startup_ms'):
+        if result[key] > budget[key]:
+            failures.append(f"{key}: {result[key]:.1f} ms acima do orçamento de {budget[key]:.1f} ms")
+    if result['eager_modules']:
+        failures.append(f"módulos carregados na importação: {', '.join(result['eager_modules'])}")
+
+    for failure in failures:
+        print(f"REGRESSÃO - {failure}")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,9 +1,8 @@
 import os
 from pathlib import Path
-import multiprocessing
-import psutil
 
-BASE_DIR = Path(__file__).resolve().parent.parent.parent
+# JENKINS_SEARCH_HOME permite usar outro diretório de settings.txt, cache, logs e resultados (ex.: benchmarks)
+BASE_DIR = Path(os.getenv("JENKINS_SEARCH_HOME") or Path(__file__).resolve().parent.parent.parent)
 
 # Carrega configurações do arquivo settings.txt
 def load_settings():
@@ -24,6 +23,14 @@ def load_settings():
     exec(settings_file.read_text(), settings)
     return settings
 
+def total_memory() -> int:
+    """Memória física total, sem carregar psutil quando o sistema expõe sysconf."""
+    try:
+        return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')
+    except (AttributeError, ValueError, OSError):
+        import psutil
+        return psutil.virtual_memory().total
+
 # Carrega configurações
 config = load_settings()
 
@@ -36,23 +43,86 @@ USERNAME = os.getenv("JENKINS_USERNAME") or config.get('USERNAME')
 API_TOKEN = os.getenv("JENKINS_API_TOKEN") or config.get('API_TOKEN')
 
 # Otimizações de CPU e Memória
-CPU_COUNT = config.get('CPU_COUNT', multiprocessing.cpu_count())
-MEMORY_LIMIT = int(psutil.virtual_memory().total * config.get('MEMORY_LIMIT', 0.8))
+CPU_COUNT = config.get('CPU_COUNT', os.cpu_count() or 1)
+MEMORY_LIMIT = int(total_memory() * config.get('MEMORY_LIMIT', 0.8))
+# Frações de MEMORY_LIMIT em que o processamento é reduzido (pressão) e pausado (crítico)
+MEMORY_SOFT_LIMIT = config.get('MEMORY_SOFT_LIMIT', 0.75)
+MEMORY_HARD_LIMIT = config.get('MEMORY_HARD_LIMIT', 0.9)
+MEMORY_SAMPLE_INTERVAL = config.get('MEMORY_SAMPLE_INTERVAL', 1.0)
 MAX_CONCURRENT_JOBS = config.get('MAX_CONCURRENT_JOBS', min(CPU_COUNT * 8, 64))
 MAX_WORKERS = config.get('MAX_WORKERS', min(CPU_COUNT * 4, 32))
 MAX_CONCURRENT_CONNECTIONS = config.get('MAX_CONCURRENT_CONNECTIONS', min(CPU_COUNT * 16, 128))
+# Teto de conexões simultâneas por servidor, dentro do orçamento global acima
+SERVER_MAX_CONNECTIONS = config.get('SERVER_MAX_CONNECTIONS', max(1, MAX_CONCURRENT_CONNECTIONS // 2))
 CHUNK_SIZE = config.get('CHUNK_SIZE', 2 * 1024 * 1024)
+# Busca em processos separados para textos acima do limite (caracteres); 0 processos desativa
+MATCH_PROCESSES = config.get('MATCH_PROCESSES', CPU_COUNT)
+MATCH_OFFLOAD_THRESHOLD = config.get('MATCH_OFFLOAD_THRESHOLD', 256 * 1024)
+# Resultados da busca por hash do conteúdo (configs idênticos entre jobs); 0 desativa
+MATCH_MEMO_SIZE = config.get('MATCH_MEMO_SIZE', 20000)
+# Regex de trechos voláteis ignorados no hash, para reaproveitar configs quase idênticos
+MATCH_MEMO_MASKS = config.get('MATCH_MEMO_MASKS', [])
+# 'text' busca no config.xml inteiro; 'xml' busca só nos elementos de MATCH_XML_PATHS
+MATCH_MODE = config.get('MATCH_MODE', 'text')
+MATCH_XML_PATHS = config.get('MATCH_XML_PATHS', [
+    'definition/script',
+    'hudson.plugins.git.UserRemoteConfig/url',
+    'hudson.tasks.Shell/command',
+    'hudson.tasks.BatchFile/command',
+    'javaposse.jobdsl.plugin.ExecuteDslScripts/scriptText',
+    'parameterDefinitions/*/defaultValue',
+    'parameterDefinitions/*/choices/a/string'
+])
+# Jobs descobertos aguardando processamento (backpressure da enumeração)
+JOB_QUEUE_SIZE = config.get('JOB_QUEUE_SIZE', MAX_CONCURRENT_JOBS * 4)
+# Processos de varredura, cada um com event loop e sessão próprios (0 ou 1: processo único)
+SHARD_WORKERS = config.get('SHARD_WORKERS', 0)
+# Partição dos jobs entre processos: 'server' (servidor inteiro) ou 'job' (hash da URL do job)
+SHARD_MODE = config.get('SHARD_MODE', 'server')
+# Reinícios de um processo de varredura que terminou com erro antes de desistir da partição
+SHARD_MAX_RESTARTS = config.get('SHARD_MAX_RESTARTS', 3)
+
+# Profundidade de pastas trazida por requisição na enumeração de jobs (API tree)
+JOB_TREE_DEPTH = config.get('JOB_TREE_DEPTH', 5)
 
 # Otimizações de Timeout e Retry
 MAX_RETRIES = config.get('MAX_RETRIES', 3)
 RETRY_DELAY = config.get('RETRY_DELAY', 0.5)
 CONNECTION_TIMEOUT = config.get('CONNECTION_TIMEOUT', 20)
 KEEPALIVE_TIMEOUT = config.get('KEEPALIVE_TIMEOUT', 30)
+# Disjuntor por servidor: falhas consecutivas até abrir e segundos até a requisição de teste
+BREAKER_FAILURE_THRESHOLD = config.get('BREAKER_FAILURE_THRESHOLD', 5)
+BREAKER_RESET_TIMEOUT = config.get('BREAKER_RESET_TIMEOUT', 30)
+BREAKER_MAX_REQUEUES = config.get('BREAKER_MAX_REQUEUES', 10)
+# Hedge: duplica o GET que passar do percentil de latência do servidor (no máximo HEDGE_MAX_RATIO das requisições)
+HEDGE_ENABLED = config.get('HEDGE_ENABLED', True)
+HEDGE_PERCENTILE = config.get('HEDGE_PERCENTILE', 95)
+HEDGE_MIN_DELAY = config.get('HEDGE_MIN_DELAY', 0.5)
+HEDGE_MAX_RATIO = config.get('HEDGE_MAX_RATIO', 0.05)
 
 # Otimizações de Cache
 CACHE_DIR = BASE_DIR / "cache"
 CACHE_DURATION = config.get('CACHE_DURATION', 7200)
 CACHE_MAX_SIZE = int(MEMORY_LIMIT * config.get('CACHE_MAX_SIZE', 0.3))
+CACHE_RETENTION = config.get('CACHE_RETENTION', 30 * 24 * 3600)
+CACHE_FLUSH_BATCH = config.get('CACHE_FLUSH_BATCH', 200)
+CACHE_FLUSH_INTERVAL = config.get('CACHE_FLUSH_INTERVAL', 5)
+# config.xml comprimidos e endereçados por hash, em segmentos de até CONTENT_SEGMENT_SIZE bytes
+CONTENT_STORE_DIR = CACHE_DIR / "blobs"
+CONTENT_SEGMENT_SIZE = config.get('CONTENT_SEGMENT_SIZE', 256 * 1024 * 1024)
+CONTENT_COMPRESSION_LEVEL = config.get('CONTENT_COMPRESSION_LEVEL', 6)
+
+# Configurações de Checkpoint
+CHECKPOINT_FSYNC_BATCH = config.get('CHECKPOINT_FSYNC_BATCH', 100)
+CHECKPOINT_FSYNC_INTERVAL = config.get('CHECKPOINT_FSYNC_INTERVAL', 2)
+CHECKPOINT_COMPACT_EVERY = config.get('CHECKPOINT_COMPACT_EVERY', 10000)
+
+# Jenkinsfiles de jobs "Pipeline script from SCM"
+SCM_ENABLED = config.get('SCM_ENABLED', True)
+SCM_MAX_PROCESSES = config.get('SCM_MAX_PROCESSES', 4)
+SCM_TIMEOUT = config.get('SCM_TIMEOUT', 60)
+SCM_URL_REWRITES = config.get('SCM_URL_REWRITES', {})
+SCM_RESOLVE_CACHE_SIZE = config.get('SCM_RESOLVE_CACHE_SIZE', 4096)
 
 # Configurações de Log
 LOG_DIR = BASE_DIR / "logs"
@@ -62,9 +132,15 @@ LOG_DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
 LOG_MAX_SIZE = config.get('LOG_MAX_SIZE', 5 * 1024 * 1024)
 LOG_BACKUP_COUNT = config.get('LOG_BACKUP_COUNT', 3)
 LOG_LEVEL = os.getenv("LOG_LEVEL") or config.get('LOG_LEVEL', "INFO")
+# Trace da execução (formato Chrome Trace) gravado em LOG_DIR
+TRACE_ENABLED = config.get('TRACE_ENABLED', True)
+TRACE_FLUSH_BATCH = config.get('TRACE_FLUSH_BATCH', 1000)
+TRACE_SLOWEST_JOBS = config.get('TRACE_SLOWEST_JOBS', 10)
 
 # Configurações de Resultados
 RESULTS_DIR = BASE_DIR / "results"
+REPORT_FORMAT = config.get('REPORT_FORMAT', 'xlsx')
+REPORT_BATCH_SIZE = config.get('REPORT_BATCH_SIZE', 10000)
 
 # Configurações de Contexto
 MAX_CONTEXT_LINES = config.get('MAX_CONTEXT_LINES', 5)
\ No newline at end of file
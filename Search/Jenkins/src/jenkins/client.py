@@ -1,42 +1,81 @@
-import urllib.request
-import urllib.error
 import base64
 import json
 import time
-import aiohttp
 import asyncio
 import gc
 import traceback
-from typing import Dict, List, Optional, Set
-from contextlib import asynccontextmanager
+import hashlib
+from dataclasses import asdict
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+from collections import deque, defaultdict
+from urllib.parse import quote, urlsplit
 from src.config.settings import (
-    USERNAME, API_TOKEN, MAX_CONCURRENT_CONNECTIONS,
+    USERNAME, API_TOKEN, SERVER_MAX_CONNECTIONS,
     CONNECTION_TIMEOUT, KEEPALIVE_TIMEOUT, CACHE_MAX_SIZE,
-    RETRY_DELAY, MAX_RETRIES
+    RETRY_DELAY, MAX_RETRIES, JOB_TREE_DEPTH,
+    CACHE_DURATION, CACHE_RETENTION, KEYWORDS, MAX_CONTEXT_LINES, HEDGE_ENABLED,
+    MATCH_MODE, MATCH_XML_PATHS, BREAKER_MAX_REQUEUES
 )
 from src.utils.logger import setup_logger
 from src.utils.cache import Cache
-from src.utils.memory import MemoryManager
+from src.utils.content_store import ContentStore
+from src.utils.tracing import tracer
 from src.utils.messages import MessageManager as msg
+from src.models.config_document import ConfigDocument
+from src.models.search_result import CodeMatch
+from src.jenkins.matcher import MATCHER_VERSION
+from src.jenkins.scheduler import FairScheduler
+from src.jenkins.resilience import CLOSED, CircuitOpenError, HostResilience, ResilienceRegistry
+
+# Campos pedidos para cada nível da hierarquia na API `tree`
+JOB_TREE_FIELDS = "name,url,_class"
+# Classes que contêm outros jobs (pastas, organization folders e multibranch)
+CONTAINER_CLASSES = ('Folder', 'WorkflowMultiBranchProject', 'MultiBranchProject')
+# Resultados de busca guardados só valem para as mesmas palavras-chave, contexto e elementos buscados
+MATCH_SIGNATURE = hashlib.sha1(json.dumps(
+    [sorted(KEYWORDS), MAX_CONTEXT_LINES, MATCHER_VERSION] + ([MATCH_XML_PATHS] if MATCH_MODE == 'xml' else [])
+).encode()).hexdigest()
 
 logger = setup_logger()
 cache = Cache(max_size=CACHE_MAX_SIZE)
-memory_manager = MemoryManager()
+# Corpos dos config.xml, comprimidos e sem repetição; o cache guarda só os metadados por URL
+store = ContentStore()
+# Orçamento de conexões compartilhado por todos os clientes (um por servidor)
+scheduler = FairScheduler()
+# Disjuntores e estatísticas de hedge por servidor
+resilience = ResilienceRegistry()
+
+class FetchedResponse:
+    """Resposta já lida por completo; permite descartar a requisição perdedora de um hedge."""
+    __slots__ = ('status', 'headers', 'body', 'charset')
+
+    def __init__(self, status: int, headers, body: bytes, charset: Optional[str]):
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.charset = charset
+
+    async def text(self) -> str:
+        return self.body.decode(self.charset or 'utf-8', errors='replace')
+
+    async def json(self):
+        return json.loads(self.body)
 
 class JenkinsClient:
     def __init__(self):
         auth_string = f"{USERNAME}:{API_TOKEN}"
         self.auth_header = f"Basic {base64.b64encode(auth_string.encode()).decode()}"
         self.session = None
-        self.connection_semaphore = asyncio.Semaphore(MAX_CONCURRENT_CONNECTIONS)
         self._server_jobs_cache = {}
         self._folder_jobs_cache = {}
-        self._config_cache = {}
+        self.stats = defaultdict(int)
         
     async def __aenter__(self):
+        # aiohttp só é carregado quando um cliente é aberto, mantendo a inicialização rápida
+        import aiohttp
         try:
             connector = aiohttp.TCPConnector(
-                limit=MAX_CONCURRENT_CONNECTIONS,
+                limit=SERVER_MAX_CONNECTIONS,
                 ttl_dns_cache=300,
                 keepalive_timeout=KEEPALIVE_TIMEOUT,
                 force_close=False,
@@ -61,6 +100,7 @@ class JenkinsClient:
             raise
         
     async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await cache.aflush()
         if self.session:
             try:
                 await self.session.close()
@@ -70,51 +110,80 @@ class JenkinsClient:
                 self.session = None
                 gc.collect()
     
-    @asynccontextmanager
-    async def _managed_request(self, url: str):
+    async def _fetch_once(self, url: str, headers: Optional[Dict[str, str]],
+                          health: HostResilience) -> FetchedResponse:
+        """Uma única requisição GET, lida por completo e registrada no disjuntor do servidor."""
+        import aiohttp
+        probe = health.breaker.before_request()
+        endpoint = 'config.xml' if urlsplit(url).path.endswith('/config.xml') else 'api/json'
+        try:
+            async with scheduler.slot(health.host) as ticket:
+                started = time.monotonic()
+                try:
+                    with tracer.span(f"http.get {endpoint}", url=url):
+                        async with self.session.get(url, headers=headers) as response:
+                            fetched = FetchedResponse(
+                                response.status, response.headers, await response.read(), response.charset
+                            )
+                except (aiohttp.ClientError, asyncio.TimeoutError):
+                    ticket.failed = True
+                    health.breaker.record_failure(probe)
+                    raise
+                health.requests += 1
+                if fetched.status >= 500:
+                    ticket.failed = True
+                    health.breaker.record_failure(probe)
+                else:
+                    ticket.failed = fetched.status == 429
+                    health.breaker.record_success(probe)
+                    health.latencies.add(time.monotonic() - started)
+                return fetched
+        finally:
+            # Sonda cancelada (ex.: perdeu o hedge) não deixa o circuito preso em meio-aberto
+            health.breaker.release_probe(probe)
+
+    async def _hedged_fetch(self, url: str, headers: Optional[Dict[str, str]],
+                            health: HostResilience) -> FetchedResponse:
+        """GET com hedge: se a resposta demorar mais que o percentil HEDGE_PERCENTILE do
+        servidor, uma cópia da requisição é disparada; vale a primeira resposta bem-sucedida
+        e a outra é cancelada."""
+        delay = health.hedge_delay() if HEDGE_ENABLED and health.breaker.state == CLOSED else None
+        if delay is None:
+            return await self._fetch_once(url, headers, health)
+
+        tasks = [asyncio.ensure_future(self._fetch_once(url, headers, health))]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done:
+                health.hedges += 1
+                tasks.append(asyncio.ensure_future(self._fetch_once(url, headers, health)))
+
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not tasks[0]:
+                            health.hedge_wins += 1
+                        return task.result()
+            # Todas as tentativas falharam: propaga o erro da requisição original
+            return tasks[0].result()
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    async def _request(self, url: str, headers: Optional[Dict[str, str]] = None) -> FetchedResponse:
+        """GET com novas tentativas; falha imediatamente se o circuito do servidor estiver aberto."""
+        import aiohttp
+        health = resilience.get(urlsplit(url).netloc)
         for attempt in range(MAX_RETRIES):
             try:
-                async with self.connection_semaphore:
-                    async with self.session.get(url) as response:
-                        if response.status == 401:
-                            error_msg = "Erro de autenticação. Verifique suas credenciais Jenkins."
-                            logger.error(error_msg)
-                            msg.error(error_msg)
-                            raise aiohttp.ClientError(error_msg)
-                            
-                        if response.status == 403:
-                            error_msg = "Acesso negado. Verifique suas permissões no Jenkins."
-                            logger.error(error_msg)
-                            msg.error(error_msg)
-                            raise aiohttp.ClientError(error_msg)
-                            
-                        if response.status == 404:
-                            error_msg = f"URL não encontrada: {url}"
-                            logger.error(error_msg)
-                            msg.error(error_msg)
-                            raise aiohttp.ClientError(error_msg)
-                            
-                        if response.status == 429:  # Rate limit
-                            retry_after = int(response.headers.get('Retry-After', RETRY_DELAY))
-                            msg.warning(f"Rate limit atingido. Aguardando {retry_after}s...")
-                            await asyncio.sleep(retry_after)
-                            continue
-                            
-                        if response.status >= 500:
-                            error_msg = f"Erro no servidor Jenkins: {response.status}"
-                            logger.error(error_msg)
-                            msg.error(error_msg)
-                            if attempt < MAX_RETRIES - 1:
-                                await asyncio.sleep(RETRY_DELAY * (attempt + 1))
-                                continue
-                            raise aiohttp.ClientError(error_msg)
-                            
-                        response.raise_for_status()
-                        yield response
-                        break
-                        
-            except aiohttp.ClientError as e:
-                error_msg = f"Erro de conexão em {url}: {str(e)}"
+                response = await self._hedged_fetch(url, headers, health)
+            except CircuitOpenError:
+                raise
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                error_msg = f"Erro de conexão em {url}: {str(e) or type(e).__name__}"
                 if attempt < MAX_RETRIES - 1:
                     msg.warning(f"{error_msg} - Tentativa {attempt + 1} de {MAX_RETRIES}")
                     await asyncio.sleep(RETRY_DELAY * (attempt + 1))
@@ -127,137 +196,295 @@ class JenkinsClient:
                 logger.error(error_msg)
                 msg.error(error_msg)
                 raise
+
+            if response.status == 401:
+                error_msg = "Erro de autenticação. Verifique suas credenciais Jenkins."
+                logger.error(error_msg)
+                msg.error(error_msg)
+                raise aiohttp.ClientError(error_msg)
+
+            if response.status == 403:
+                error_msg = "Acesso negado. Verifique suas permissões no Jenkins."
+                logger.error(error_msg)
+                msg.error(error_msg)
+                raise aiohttp.ClientError(error_msg)
+
+            if response.status == 404:
+                error_msg = f"URL não encontrada: {url}"
+                logger.error(error_msg)
+                msg.error(error_msg)
+                raise aiohttp.ClientError(error_msg)
+
+            if response.status == 429:  # Rate limit
+                retry_after = int(response.headers.get('Retry-After', RETRY_DELAY))
+                msg.warning(f"Rate limit atingido. Aguardando {retry_after}s...")
+                await asyncio.sleep(retry_after)
+                continue
+
+            if response.status >= 500:
+                error_msg = f"Erro no servidor Jenkins: {response.status}"
+                logger.error(error_msg)
+                msg.error(error_msg)
+                if attempt < MAX_RETRIES - 1:
+                    await asyncio.sleep(RETRY_DELAY * (attempt + 1))
+                    continue
+                raise aiohttp.ClientError(error_msg)
+
+            if response.status >= 400:
+                raise aiohttp.ClientError(f"HTTP {response.status} em {url}")
+            return response
+
+        raise aiohttp.ClientError(f"Tentativas esgotadas para {url}")
     
-    async def get_json(self, url: str) -> Dict:
-        cache_key = f"json_{url}"
+    @tracer.traced('jenkins.get_json')
+    async def get_json(self, url: str, tree: Optional[str] = None) -> Dict:
+        api_url = f"{url.rstrip('/')}/api/json"
+        if tree:
+            api_url = f"{api_url}?tree={quote(tree, safe=',[]')}"
+        cache_key = f"json_{api_url}"
         cached_data = await cache.aget(cache_key)
         
         if cached_data:
             return cached_data
             
         try:
-            async with self._managed_request(f"{url.rstrip('/')}/api/json") as response:
-                data = await response.json()
-                await cache.aset(cache_key, data)
-                return data
+            response = await self._request(api_url)
+            data = await response.json()
+            await cache.aset(cache_key, data)
+            return data
         except json.JSONDecodeError as e:
             error_msg = f"Erro ao decodificar JSON de {url}: {str(e)}"
             logger.error(error_msg)
             msg.error(error_msg)
             raise
-        finally:
-            await memory_manager.check_memory()
     
     async def get_config_xml(self, url: str) -> Optional[str]:
-        if url in self._config_cache:
-            return self._config_cache[url]
-            
-        cache_key = f"xml_{url}"
-        cached_data = await cache.aget(cache_key)
-        
-        if cached_data:
-            self._config_cache[url] = cached_data
-            return cached_data
-            
+        document = await self.get_config(url)
+        return document.body if document else None
+
+    @tracer.traced('jenkins.get_config')
+    async def get_config(self, url: str) -> Optional[ConfigDocument]:
+        """Obtém o config.xml revalidando a cópia em cache com ETag/Last-Modified.
+
+        Dentro de CACHE_DURATION a cópia local é usada sem requisição; depois disso
+        é feito um GET condicional e, em caso de 304 (ou de conteúdo com o mesmo
+        hash), o corpo e o resultado da busca anterior são reaproveitados. O corpo
+        fica no armazenamento por conteúdo, pelo hash registrado nos metadados.
+        """
+        meta_key = f"xmlmeta_{url}"
+        meta = await cache.aget(meta_key, max_age=CACHE_RETENTION)
+        body = await self._stored_body(url, meta['hash']) if meta else None
+        if body is None:
+            meta = None
+
+        if meta and time.time() - meta['checked_at'] <= CACHE_DURATION:
+            self.stats['config_cached'] += 1
+            return self._cached_document(url, body, meta)
+
+        headers = {}
+        if meta and meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta and meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+
         try:
-            async with self._managed_request(f"{url.rstrip('/')}/config.xml") as response:
-                data = await response.text()
-                if not data:
-                    logger.warning(f"Config XML vazio para {url}")
-                    return None
-                await cache.aset(cache_key, data)
-                self._config_cache[url] = data
-                return data
+            response = await self._request(f"{url.rstrip('/')}/config.xml", headers or None)
+            if response.status == 304 and meta:
+                self.stats['config_not_modified'] += 1
+                meta['checked_at'] = time.time()
+                await cache.aset(meta_key, meta)
+                return self._cached_document(url, body, meta)
+
+            data = await response.text()
+            if not data:
+                logger.warning(f"Config XML vazio para {url}")
+                return None
+            self.stats['config_downloaded'] += 1
+            self.stats['bytes_downloaded'] += len(data)
+
+            content_hash = hashlib.sha1(data.encode('utf-8', 'surrogatepass')).hexdigest()
+            unchanged = bool(meta) and meta['hash'] == content_hash
+            new_meta = {
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+                'hash': content_hash,
+                'checked_at': time.time(),
+                'match_signature': meta.get('match_signature') if unchanged else None,
+                'matches': meta.get('matches') if unchanged else None
+            }
+            if not unchanged:
+                store.put(content_hash, data)
+            await cache.aset(meta_key, new_meta)
+            return self._cached_document(url, data, new_meta) if unchanged else ConfigDocument(
+                url=url, body=data, content_hash=content_hash
+            )
+        except CircuitOpenError:
+            raise
         except Exception as e:
             error_msg = f"Erro ao obter config.xml de {url}: {str(e)}\nDetalhes: {traceback.format_exc()}"
             logger.error(error_msg)
             msg.error(error_msg)
             return None
-        finally:
-            await memory_manager.check_memory()
 
-    async def _get_folder_jobs(self, folder_url: str, parent_path: str = "") -> List[Dict]:
-        """Obtém recursivamente todos os jobs dentro de uma pasta Jenkins."""
-        if folder_url in self._folder_jobs_cache:
-            return self._folder_jobs_cache[folder_url]
+    @staticmethod
+    async def _stored_body(url: str, content_hash: str) -> Optional[str]:
+        body = store.get(content_hash)
+        if body is None:
+            # Cache anterior ao armazenamento por conteúdo: o corpo estava guardado por URL
+            legacy_key = f"xml_{url}"
+            body = await cache.aget(legacy_key, max_age=CACHE_RETENTION)
+            if body is not None:
+                store.put(content_hash, body)
+                await cache.adelete(legacy_key)
+        return body
+
+    @staticmethod
+    def _cached_document(url: str, body: str, meta: Dict) -> ConfigDocument:
+        matches = None
+        if meta.get('match_signature') == MATCH_SIGNATURE and meta.get('matches') is not None:
+            matches = [CodeMatch(**m) for m in meta['matches']]
+        return ConfigDocument(
+            url=url, body=body, content_hash=meta['hash'], unchanged=True, matches=matches
+        )
+
+    async def store_matches(self, document: ConfigDocument, matches: List[CodeMatch]):
+        """Guarda o resultado da busca junto aos validadores, para reuso enquanto o conteúdo não mudar."""
+        meta_key = f"xmlmeta_{document.url}"
+        meta = await cache.aget(meta_key, max_age=CACHE_RETENTION)
+        if not meta or meta['hash'] != document.content_hash:
+            return
+        meta['match_signature'] = MATCH_SIGNATURE
+        meta['matches'] = [asdict(m) for m in matches]
+        await cache.aset(meta_key, meta)
+
+    @staticmethod
+    def _tree_query(depth: int) -> str:
+        """Monta a query `tree` que traz `depth` níveis da hierarquia de jobs em uma única requisição."""
+        query = f"jobs[{JOB_TREE_FIELDS}]"
+        for _ in range(depth - 1):
+            query = f"jobs[{JOB_TREE_FIELDS},{query}]"
+        return query
+
+    @staticmethod
+    def _is_container(job: Dict) -> bool:
+        return 'jobs' in job or job.get('_class', '').endswith(CONTAINER_CLASSES)
 
+    async def _walk_folder(self, folder_url: str, emit: Callable[[Dict], Awaitable[None]],
+                           parent_path: str = "") -> int:
+        """Percorre a hierarquia abaixo de uma pasta entregando cada job a `emit` assim que é encontrado.
+
+        Cada requisição traz JOB_TREE_DEPTH níveis; pastas no limite de profundidade
+        são percorridas em paralelo. Retorna a quantidade de jobs entregues.
+        """
         try:
-            data = await self.get_json(folder_url)
-            jobs = []
+            for attempt in range(BREAKER_MAX_REQUEUES + 1):
+                try:
+                    data = await self.get_json(folder_url, tree=self._tree_query(JOB_TREE_DEPTH))
+                    break
+                except CircuitOpenError as e:
+                    # Circuito aberto: aguarda a requisição de teste em vez de perder a pasta
+                    if attempt == BREAKER_MAX_REQUEUES:
+                        raise
+                    await asyncio.sleep(e.retry_after)
 
             if not data or 'jobs' not in data:
                 logger.warning(f"Pasta vazia ou inválida: {folder_url}")
-                return []
+                return 0
 
-            for job in data['jobs']:
-                job_class = job.get('_class', '')
+            emitted = 0
+            truncated = []
+            pending = deque((job, parent_path) for job in data['jobs'])
+            while pending:
+                job, group = pending.popleft()
                 job_name = job.get('name', '')
-                job_url = job.get('url', '')
-
-                # Define o caminho completo do job
-                current_path = f"{parent_path}/{job_name}" if parent_path else job_name
+                current_path = f"{group}/{job_name}" if group else job_name
 
-                if job_class.endswith('WorkflowJob'):
-                    jobs.append({
+                if job.get('_class', '').endswith('WorkflowJob'):
+                    await emit({
                         'name': job_name,
-                        'url': job_url,
-                        'group': parent_path
+                        'url': job.get('url', ''),
+                        'group': group
                     })
-                elif job_class.endswith('Folder'):
-                    # Processa recursivamente os jobs da subpasta
-                    sub_jobs = await self._get_folder_jobs(job_url, current_path)
-                    jobs.extend(sub_jobs)
+                    emitted += 1
+                elif self._is_container(job):
+                    if 'jobs' in job:
+                        pending.extend((child, current_path) for child in job['jobs'] or [])
+                    else:
+                        # Pasta no limite de profundidade: seus filhos exigem nova requisição
+                        truncated.append((job.get('url', ''), current_path))
+            # Libera a resposta antes de descer nas subpastas
+            del data
 
-            self._folder_jobs_cache[folder_url] = jobs
-            return jobs
+            if truncated:
+                results = await asyncio.gather(
+                    *(self._walk_folder(url, emit, path) for url, path in truncated),
+                    return_exceptions=True
+                )
+                for result in results:
+                    if isinstance(result, Exception):
+                        error_msg = f"Erro ao processar pasta: {str(result)}"
+                        logger.error(error_msg)
+                        msg.error(error_msg)
+                    else:
+                        emitted += result
+
+            return emitted
 
         except Exception as e:
+            self.stats['folder_errors'] += 1
             error_msg = f"Erro ao processar pasta {folder_url}: {str(e)}\nDetalhes: {traceback.format_exc()}"
             logger.error(error_msg)
             msg.error(error_msg)
-            return []
-    
+            return 0
+
+    async def _get_folder_jobs(self, folder_url: str, parent_path: str = "") -> List[Dict]:
+        """Obtém todos os jobs abaixo de uma pasta como lista."""
+        if folder_url in self._folder_jobs_cache:
+            return self._folder_jobs_cache[folder_url]
+
+        jobs = []
+
+        async def collect(job: Dict):
+            jobs.append(job)
+
+        await self._walk_folder(folder_url, collect, parent_path)
+        self._folder_jobs_cache[folder_url] = jobs
+        return jobs
+
+    async def stream_jobs(self, server: str, emit: Callable[[Dict], Awaitable[None]]) -> int:
+        """Entrega os jobs do servidor a `emit` durante a enumeração, sem montar a lista completa.
+
+        Com `emit` sendo o `put` de uma fila limitada, a enumeração é pausada
+        enquanto os consumidores não liberam espaço.
+        """
+        import aiohttp
+        try:
+            total = await self._walk_folder(server, emit)
+            if not total:
+                error_msg = f"Nenhum job retornado do servidor {server}"
+                logger.error(error_msg)
+                msg.error(error_msg)
+            return total
+        except aiohttp.ClientError as e:
+            error_msg = f"Erro de conexão com {server}: {str(e)}\nDetalhes: {traceback.format_exc()}"
+            logger.error(error_msg)
+            msg.error(error_msg)
+            return 0
+
     async def get_jobs(self, server: str) -> List[Dict]:
+        import aiohttp
         if server in self._server_jobs_cache:
             return self._server_jobs_cache[server]
             
-        all_jobs = []
         try:
-            data = await self.get_json(server)
+            all_jobs = await self._get_folder_jobs(server)
             
-            if not data:
-                error_msg = f"Nenhum dado retornado do servidor {server}"
+            if not all_jobs:
+                error_msg = f"Nenhum job retornado do servidor {server}"
                 logger.error(error_msg)
                 msg.error(error_msg)
                 return []
             
-            if 'jobs' not in data:
-                error_msg = f"Estrutura de dados inválida do servidor {server}"
-                logger.error(error_msg)
-                msg.error(error_msg)
-                return []
-            
-            tasks = []
-            for job in data['jobs']:
-                if job.get('_class', '').endswith('WorkflowJob'):
-                    all_jobs.append({
-                        'name': job['name'],
-                        'url': job['url'],
-                        'group': ''
-                    })
-                elif job.get('_class', '').endswith('Folder'):
-                    tasks.append(self._get_folder_jobs(job['url']))
-            
-            if tasks:
-                folder_jobs_list = await asyncio.gather(*tasks, return_exceptions=True)
-                for result in folder_jobs_list:
-                    if isinstance(result, Exception):
-                        error_msg = f"Erro ao processar pasta: {str(result)}\nDetalhes: {traceback.format_exc()}"
-                        logger.error(error_msg)
-                        msg.error(error_msg)
-                    else:
-                        all_jobs.extend(result)
-            
             self._server_jobs_cache[server] = all_jobs
             return all_jobs
             
@@ -270,4 +497,4 @@ class JenkinsClient:
             error_msg = f"Erro ao obter projetos de {server}: {str(e)}\nDetalhes: {traceback.format_exc()}"
             logger.error(error_msg)
             msg.error(error_msg)
-            return []
\ No newline at end of file
+            return []
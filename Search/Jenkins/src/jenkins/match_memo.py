@@ -0,0 +1,94 @@
+import hashlib
+import re
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+from src.config.settings import MATCH_MEMO_SIZE, MATCH_MEMO_MASKS
+from src.jenkins.matcher import KeywordMatcher
+from src.models.search_result import CodeMatch
+
+# Ocorrência guardada no memo: (palavra-chave, linha, conteúdo da linha, contexto, elemento XML)
+MatchRecord = Tuple[str, int, str, str, Optional[str]]
+# Substitui os campos mascarados; não aparece em XML válido, então não colide com conteúdo real
+MASK_PLACEHOLDER = '\x00'
+
+def as_record(match: CodeMatch) -> MatchRecord:
+    return (match.keyword, match.line_number, match.line_content, match.context, match.element)
+
+class MatchMemo:
+    """Resultados da busca por hash do conteúdo, para configs repetidos entre jobs.
+
+    Jobs gerados do mesmo modelo (Job DSL, seed jobs) têm config.xml idênticos: a
+    busca é feita uma vez por conteúdo e os demais jobs reaproveitam as ocorrências.
+    Com MATCH_MEMO_MASKS, trechos voláteis (ex.: descrição com o nome do job) são
+    mascarados antes do hash e configs quase idênticos também compartilham o
+    resultado; nesse caso linha e contexto são recortados do texto do próprio job.
+    Um trecho mascarado só é ignorado se não contiver palavras-chave e não ocupar
+    mais de uma linha, então os números de linha e as ocorrências são os mesmos.
+    """
+
+    def __init__(self, matcher: KeywordMatcher, size: int = MATCH_MEMO_SIZE,
+                 masks: List[str] = MATCH_MEMO_MASKS):
+        self.matcher = matcher
+        self.size = size
+        self._mask = re.compile('|'.join(f"(?:{mask})" for mask in masks)) if masks else None
+        self._entries: 'OrderedDict[str, List[MatchRecord]]' = OrderedDict()
+        self.stats = {'lookups': 0, 'hits': 0, 'near_hits': 0}
+
+    @staticmethod
+    def _digest(text: str) -> str:
+        return hashlib.blake2b(text.encode('utf-8', 'surrogatepass'), digest_size=16).hexdigest()
+
+    def key(self, text: str, mask: bool = True) -> Tuple[str, bool]:
+        """Chave do conteúdo e se ela foi calculada sobre o texto mascarado."""
+        if self._mask is None or not mask:
+            return self._digest(text), False
+
+        masked: List[str] = []
+
+        def replace(match: re.Match) -> str:
+            value = match.group(0)
+            if '\n' in value:
+                return value
+            masked.append(value)
+            return MASK_PLACEHOLDER
+
+        normalized = self._mask.sub(replace, text)
+        if not masked or any(True for _ in self.matcher.iter_hits('\n'.join(masked))):
+            return self._digest(text), False
+        return 'm' + self._digest(normalized), True
+
+    def get(self, key: str) -> Optional[List[MatchRecord]]:
+        self.stats['lookups'] += 1
+        records = self._entries.get(key)
+        if records is not None:
+            self._entries.move_to_end(key)
+            self.stats['hits'] += 1
+            if key.startswith('m'):
+                self.stats['near_hits'] += 1
+        return records
+
+    def put(self, key: str, records: List[MatchRecord]):
+        if self.size <= 0:
+            return
+        self._entries[key] = records
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.size:
+            self._entries.popitem(last=False)
+
+    def rebase(self, text: str, records: List[MatchRecord]) -> List[MatchRecord]:
+        """Recorta linha e contexto de cada ocorrência do texto deste job (conteúdo quase idêntico)."""
+        if not records:
+            return records
+        offsets = self.matcher.line_offsets(text)
+        return [
+            (keyword, line, *self.matcher.line_context(text, offsets, line - 1), element)
+            for keyword, line, _, _, element in records
+        ]
+
+    def summary(self) -> str:
+        lookups, hits = self.stats['lookups'], self.stats['hits']
+        ratio = hits / lookups if lookups else 0.0
+        return (
+            f"Busca de palavras-chave: {lookups} textos, {lookups - hits} únicos buscados, "
+            f"{hits} reaproveitados do memo ({ratio:.1%}, {self.stats['near_hits']} com campos mascarados)"
+        )
@@ -0,0 +1,116 @@
+import re
+from bisect import bisect_right
+from typing import Dict, Iterable, List, Tuple
+from src.config.settings import MAX_CONTEXT_LINES
+from src.models.search_result import CodeMatch, CONFIG_SOURCE
+
+# Incrementar quando a semântica da busca mudar, invalidando resultados guardados em cache
+MATCHER_VERSION = 2
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """Gera uma alternância fatorada por prefixo (ex.: git(?:auto|dev)) a partir das palavras."""
+    trie: Dict = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = True
+
+    def build(node: Dict) -> str:
+        terminal = '' in node
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        if len(branches) > 1 or terminal:
+            body = f"(?:{'|'.join(branches)})"
+        else:
+            body = branches[0]
+        # Ramos opcionais são gulosos, então a palavra mais longa é tentada primeiro
+        return f"{body}?" if terminal else body
+
+    return build(trie)
+
+class KeywordMatcher:
+    """Busca todas as palavras-chave em uma única passada, sem diferenciar maiúsculas.
+
+    A expressão é compilada uma vez a partir de KEYWORDS. O texto não é copiado
+    nem convertido para minúsculas, e o índice de início de linhas só é montado
+    quando há ao menos uma ocorrência.
+    """
+
+    def __init__(self, keywords: List[str], context_lines: int = MAX_CONTEXT_LINES):
+        self.context_lines = context_lines
+        self._keywords_by_text: Dict[str, List[str]] = {}
+        for keyword in keywords:
+            if keyword:
+                self._keywords_by_text.setdefault(keyword.lower(), []).append(keyword)
+
+        # Palavras que são prefixo de outras casam na mesma posição que a mais longa
+        self._expansions: Dict[str, List[str]] = {
+            text: [k for other in self._keywords_by_text if text.startswith(other)
+                   for k in self._keywords_by_text[other]]
+            for text in self._keywords_by_text
+        }
+        self._pattern = re.compile(
+            f"(?=({_trie_pattern(self._keywords_by_text)}))", re.IGNORECASE
+        ) if self._keywords_by_text else None
+
+    def iter_hits(self, text: str) -> Iterable[Tuple[str, int]]:
+        """Gera (palavra-chave, posição) para cada ocorrência, inclusive sobrepostas."""
+        if self._pattern is None:
+            return
+        for match in self._pattern.finditer(text):
+            for keyword in self._expansions.get(match.group(1).lower(), ()):
+                yield keyword, match.start()
+
+    @staticmethod
+    def line_offsets(text: str) -> List[int]:
+        offsets = [0]
+        find = text.find
+        position = find('\n')
+        while position != -1:
+            offsets.append(position + 1)
+            position = find('\n', position + 1)
+        return offsets
+
+    def find(self, text: str, source: str = CONFIG_SOURCE) -> List[CodeMatch]:
+        """Retorna uma ocorrência por palavra-chave e linha, com o contexto ao redor."""
+        matches: List[CodeMatch] = []
+        offsets = None
+        seen = set()
+
+        for keyword, position in self.iter_hits(text):
+            if offsets is None:
+                offsets = self.line_offsets(text)
+            line_index = bisect_right(offsets, position) - 1
+            if (keyword, line_index) in seen:
+                continue
+            seen.add((keyword, line_index))
+            line_content, context = self.line_context(text, offsets, line_index)
+            matches.append(CodeMatch(
+                keyword=keyword,
+                line_number=line_index + 1,
+                line_content=line_content,
+                context=context,
+                source=source
+            ))
+
+        matches.sort(key=lambda m: (m.line_number, m.keyword))
+        return matches
+
+    def line_context(self, text: str, offsets: List[int], line_index: int) -> Tuple[str, str]:
+        """Conteúdo da linha (sem espaços nas pontas) e as linhas de contexto ao redor."""
+        return (
+            self._slice(text, offsets, line_index, line_index).strip(),
+            self._slice(
+                text, offsets,
+                max(0, line_index - self.context_lines),
+                min(len(offsets) - 1, line_index + self.context_lines)
+            )
+        )
+
+    @staticmethod
+    def _slice(text: str, offsets: List[int], first: int, last: int) -> str:
+        """Recorta as linhas [first, last] usando o índice de offsets, sem quebrar o texto inteiro."""
+        end = offsets[last + 1] - 1 if last + 1 < len(offsets) else len(text)
+        return text[offsets[first]:end]
@@ -0,0 +1,153 @@
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional
+from src.config.settings import (
+    BREAKER_FAILURE_THRESHOLD, BREAKER_RESET_TIMEOUT,
+    HEDGE_PERCENTILE, HEDGE_MIN_DELAY, HEDGE_MAX_RATIO
+)
+
+# Latências guardadas por servidor para o cálculo do percentil de hedge
+LATENCY_WINDOW = 200
+# Amostras mínimas antes de disparar requisições duplicadas
+MIN_HEDGE_SAMPLES = 20
+
+# Espera entre tentativas enquanto a requisição de teste está em andamento
+PROBE_WAIT = 1.0
+
+CLOSED = 'fechado'
+OPEN = 'aberto'
+HALF_OPEN = 'meio-aberto'
+
+class CircuitOpenError(Exception):
+    """Requisição recusada sem acessar a rede: o circuito do servidor está aberto.
+
+    `retry_after` indica quantos segundos esperar antes de tentar de novo.
+    """
+
+    def __init__(self, message: str, retry_after: float = 0.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class CircuitBreaker:
+    """Disjuntor por servidor.
+
+    Abre após `threshold` falhas consecutivas (erros de conexão, timeouts e 5xx) e
+    passa a recusar requisições imediatamente. Depois de `reset_timeout` segundos
+    uma única requisição de teste é liberada (meio-aberto): sucesso fecha o circuito,
+    falha o reabre por mais `reset_timeout` segundos.
+    """
+
+    def __init__(self, host: str, threshold: int = BREAKER_FAILURE_THRESHOLD,
+                 reset_timeout: float = BREAKER_RESET_TIMEOUT):
+        self.host = host
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+        self.opens = 0
+        self.rejected = 0
+        self.probes = 0
+
+    def before_request(self) -> bool:
+        """Libera a requisição ou lança CircuitOpenError; retorna True se ela for a sonda."""
+        if self.state == CLOSED:
+            return False
+        if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self.state = HALF_OPEN
+        if self.state == HALF_OPEN and not self._probing:
+            self._probing = True
+            self.probes += 1
+            return True
+        self.rejected += 1
+        raise CircuitOpenError(f"Circuito aberto para {self.host}", self.retry_after())
+
+    def retry_after(self) -> float:
+        """Tempo até a próxima requisição de teste; com o teste em andamento, uma espera curta."""
+        return max(PROBE_WAIT, self.opened_at + self.reset_timeout - time.monotonic())
+
+    def record_success(self, probe: bool = False):
+        self.failures = 0
+        if probe:
+            self._probing = False
+            self.state = CLOSED
+
+    def record_failure(self, probe: bool = False):
+        self.failures += 1
+        if probe:
+            # Sonda falhou: o servidor continua fora por mais um período
+            self._probing = False
+            self.state = OPEN
+            self.opened_at = time.monotonic()
+        elif self.state == CLOSED and self.failures >= self.threshold:
+            self.state = OPEN
+            self.opened_at = time.monotonic()
+            self.opens += 1
+
+    def release_probe(self, probe: bool):
+        """Sonda cancelada sem resultado: libera a próxima tentativa."""
+        if probe:
+            self._probing = False
+
+class LatencyWindow:
+    """Últimas latências de um servidor, para estimar o percentil usado no hedge."""
+
+    def __init__(self, size: int = LATENCY_WINDOW):
+        self.samples: Deque[float] = deque(maxlen=size)
+
+    def add(self, elapsed: float):
+        self.samples.append(elapsed)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        if len(self.samples) < MIN_HEDGE_SAMPLES:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+class HostResilience:
+    """Disjuntor, latências e contadores de hedge de um servidor."""
+
+    def __init__(self, host: str):
+        self.host = host
+        self.breaker = CircuitBreaker(host)
+        self.latencies = LatencyWindow()
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def hedge_delay(self) -> Optional[float]:
+        """Espera antes de duplicar uma requisição, ou None se o hedge não deve ocorrer.
+
+        O número de duplicatas é limitado a HEDGE_MAX_RATIO das requisições, para
+        que um servidor lento não receba o dobro da carga justamente quando sofre.
+        """
+        if HEDGE_MAX_RATIO <= 0 or self.hedges >= self.requests * HEDGE_MAX_RATIO:
+            return None
+        threshold = self.latencies.percentile(HEDGE_PERCENTILE)
+        if threshold is None:
+            return None
+        return max(threshold, HEDGE_MIN_DELAY)
+
+class ResilienceRegistry:
+    def __init__(self):
+        self.hosts: Dict[str, HostResilience] = {}
+
+    def get(self, host: str) -> HostResilience:
+        state = self.hosts.get(host)
+        if state is None:
+            state = self.hosts[host] = HostResilience(host)
+        return state
+
+    def summary(self) -> List[Dict]:
+        return [
+            {
+                'servidor': state.host,
+                'circuito': state.breaker.state,
+                'aberturas': state.breaker.opens,
+                'recusadas': state.breaker.rejected,
+                'hedges': state.hedges,
+                'hedges_vencedores': state.hedge_wins
+            }
+            for state in self.hosts.values()
+        ]
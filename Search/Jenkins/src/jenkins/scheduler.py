@@ -0,0 +1,156 @@
+import asyncio
+import itertools
+import time
+from contextlib import asynccontextmanager
+from collections import deque
+from typing import Deque, Dict, List, Optional
+from src.config.settings import MAX_CONCURRENT_CONNECTIONS, SERVER_MAX_CONNECTIONS
+from src.utils.tracing import tracer
+
+# Peso das novas amostras nas médias móveis de latência e de erros
+EWMA_ALPHA = 0.2
+# Latência inicial assumida (segundos) e piso usado no custo de cada requisição
+INITIAL_LATENCY = 0.5
+MIN_LATENCY = 0.01
+# Fração mínima de vazão mantida para um servidor com muitos erros
+MIN_HEALTH = 0.1
+
+class HostState:
+    def __init__(self, host: str):
+        self.host = host
+        self.in_flight = 0
+        self.waiters: Deque[asyncio.Future] = deque()
+        self.virtual_time = 0.0
+        self.latency = INITIAL_LATENCY
+        self.error_rate = 0.0
+        self.requests = 0
+        self.errors = 0
+        self.wait_time = 0.0
+
+    @property
+    def cost(self) -> float:
+        """Tempo de conexão esperado por requisição; servidores lentos ou com erros custam mais."""
+        return max(self.latency, MIN_LATENCY) / max(MIN_HEALTH, 1.0 - self.error_rate)
+
+    def record(self, elapsed: float, failed: bool):
+        self.requests += 1
+        self.errors += failed
+        self.latency += EWMA_ALPHA * (elapsed - self.latency)
+        self.error_rate += EWMA_ALPHA * (float(failed) - self.error_rate)
+
+class Ticket:
+    """Marca o resultado da requisição para a estatística do servidor."""
+    def __init__(self):
+        self.failed = False
+
+class FairScheduler:
+    """Distribui um orçamento global de conexões entre servidores com fila justa ponderada (WFQ).
+
+    Cada concessão avança o tempo virtual do servidor pelo custo esperado da
+    requisição (latência média dividida pela taxa de sucesso); a próxima vaga vai
+    para o servidor em espera com menor tempo virtual. Assim cada servidor recebe
+    uma fatia igual do tempo de conexão: um controller lento ou instável é
+    atendido com menos frequência em vez de ocupar o orçamento dos demais. Além do
+    limite global, cada servidor tem um teto próprio de conexões simultâneas.
+    """
+
+    def __init__(self, max_connections: int = MAX_CONCURRENT_CONNECTIONS,
+                 per_host: int = SERVER_MAX_CONNECTIONS):
+        self.max_connections = max_connections
+        self.per_host = per_host
+        self.in_flight = 0
+        self.hosts: Dict[str, HostState] = {}
+        self._virtual_clock = 0.0
+        self._order = itertools.count()
+
+    def _state(self, host: str) -> HostState:
+        state = self.hosts.get(host)
+        if state is None:
+            state = self.hosts[host] = HostState(host)
+        return state
+
+    def _eligible(self, state: HostState) -> bool:
+        return bool(state.waiters) and state.in_flight < self.per_host
+
+    def _dispatch(self):
+        """Concede vagas livres aos servidores elegíveis em ordem de tempo virtual."""
+        while self.in_flight < self.max_connections:
+            candidates = [
+                (state.virtual_time, next(self._order), state)
+                for state in self.hosts.values() if self._eligible(state)
+            ]
+            if not candidates:
+                return
+            _, _, state = min(candidates)
+            waiter = state.waiters.popleft()
+            if waiter.done():
+                continue
+            self._grant(state)
+            waiter.set_result(None)
+
+    def _grant(self, state: HostState):
+        # Servidor que volta a ficar ativo não acumula crédito pelo tempo ocioso
+        state.virtual_time = max(state.virtual_time, self._virtual_clock)
+        self._virtual_clock = state.virtual_time
+        state.virtual_time += state.cost
+        state.in_flight += 1
+        self.in_flight += 1
+
+    @asynccontextmanager
+    async def slot(self, host: str):
+        state = self._state(host)
+        waited = time.monotonic()
+        if not state.waiters and state.in_flight < self.per_host and self.in_flight < self.max_connections:
+            self._grant(state)
+        else:
+            waiter = asyncio.get_running_loop().create_future()
+            state.waiters.append(waiter)
+            self._dispatch()
+            try:
+                with tracer.span('scheduler.wait', host=host):
+                    await waiter
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    # A vaga foi concedida junto com o cancelamento: devolve
+                    self._release(state)
+                else:
+                    try:
+                        state.waiters.remove(waiter)
+                    except ValueError:
+                        pass
+                raise
+
+        started = time.monotonic()
+        state.wait_time += started - waited
+        ticket = Ticket()
+        cancelled = False
+        try:
+            yield ticket
+        except asyncio.CancelledError:
+            # Cancelamento (ex.: requisição que perdeu o hedge) não diz nada sobre o servidor
+            cancelled = True
+            raise
+        except BaseException:
+            ticket.failed = True
+            raise
+        finally:
+            if not cancelled:
+                state.record(time.monotonic() - started, ticket.failed)
+            self._release(state)
+
+    def _release(self, state: HostState):
+        state.in_flight -= 1
+        self.in_flight -= 1
+        self._dispatch()
+
+    def summary(self) -> List[Dict]:
+        return [
+            {
+                'servidor': state.host,
+                'requisicoes': state.requests,
+                'erros': state.errors,
+                'latencia_media': round(state.latency, 3),
+                'espera_total': round(state.wait_time, 1)
+            }
+            for state in self.hosts.values()
+        ]
@@ -0,0 +1,242 @@
+import asyncio
+import hashlib
+import os
+import shutil
+import xml.etree.ElementTree as ET
+from collections import OrderedDict
+from dataclasses import asdict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from src.config.settings import (
+    CACHE_DIR, CACHE_RETENTION, SCM_MAX_PROCESSES, SCM_TIMEOUT, SCM_URL_REWRITES, SCM_RESOLVE_CACHE_SIZE
+)
+from src.jenkins.client import cache, MATCH_SIGNATURE
+from src.jenkins.searcher import MatchEngine
+from src.models.search_result import CodeMatch, GitInfo
+from src.utils.logger import setup_logger
+from src.utils.tracing import tracer
+
+logger = setup_logger()
+
+SCM_DEFINITION_CLASS = 'org.jenkinsci.plugins.workflow.cps.CpsScmFlowDefinition'
+GIT_SCM_CLASS = 'hudson.plugins.git.GitSCM'
+DEFAULT_SCRIPT_PATH = 'Jenkinsfile'
+# Locks por repositório, distribuídos por hash da URL para não crescer com o número de repositórios
+REPO_LOCK_STRIPES = 64
+
+class ScmError(Exception):
+    pass
+
+def git_available() -> bool:
+    """Verifica se o executável git está no PATH; sem ele os Jenkinsfiles do SCM não são analisados."""
+    if shutil.which('git') is None:
+        logger.warning("git não encontrado no PATH: Jenkinsfiles de jobs \"Pipeline script from SCM\" não serão analisados")
+        return False
+    return True
+
+def parse_scm_definition(config_xml: str) -> Optional[GitInfo]:
+    """Extrai repositório, branch e script de um job "Pipeline script from SCM" com Git.
+
+    Retorna None para pipelines inline ou SCMs que não sejam Git.
+    """
+    # Evita o parse de XML para a grande maioria dos jobs, que não usa SCM
+    if SCM_DEFINITION_CLASS not in config_xml:
+        return None
+    try:
+        root = ET.fromstring(config_xml)
+    except ET.ParseError as e:
+        logger.warning(f"config.xml inválido ao ler definição SCM: {str(e)}")
+        return None
+
+    definition = root.find('definition')
+    if definition is None or definition.get('class') != SCM_DEFINITION_CLASS:
+        return None
+    scm = definition.find('scm')
+    if scm is None or scm.get('class') != GIT_SCM_CLASS:
+        return None
+
+    url = scm.findtext('userRemoteConfigs/hudson.plugins.git.UserRemoteConfig/url', '').strip()
+    if not url:
+        return None
+    branch = scm.findtext('branches/hudson.plugins.git.BranchSpec/name', '').strip()
+    script_path = (definition.findtext('scriptPath') or DEFAULT_SCRIPT_PATH).strip()
+
+    return GitInfo(
+        repository_url=url,
+        branch=branch,
+        sparse_checkout_paths=[script_path]
+    )
+
+def normalize_ref(branch: str) -> str:
+    """Converte o BranchSpec do Jenkins em uma referência para ls-remote/fetch.
+
+    `*/main`, `origin/main` e `main` viram `refs/heads/main`. Especificações com
+    curingas ou variáveis de build não podem ser resolvidas fora do Jenkins e
+    caem para o HEAD do repositório.
+    """
+    for prefix in ('*/', 'origin/'):
+        if branch.startswith(prefix):
+            branch = branch[len(prefix):]
+            break
+    if not branch or any(c in branch for c in '*?$['):
+        return 'HEAD'
+    return branch if branch.startswith('refs/') else f"refs/heads/{branch}"
+
+def rewrite_url(url: str) -> str:
+    """Aplica SCM_URL_REWRITES (prefixo -> substituto), por exemplo SSH -> HTTPS ou file:// em testes."""
+    for prefix, replacement in SCM_URL_REWRITES.items():
+        if url.startswith(prefix):
+            return replacement + url[len(prefix):]
+    return url
+
+class ScmFetcher:
+    """Obtém o Jenkinsfile de jobs "Pipeline script from SCM" a partir de espelhos Git locais.
+
+    O commit de cada (repositório, branch) é resolvido com `git ls-remote` uma vez
+    por execução (até SCM_RESOLVE_CACHE_SIZE referências, as menos usadas saem
+    primeiro). O resultado da busca é guardado por (repositório, commit, arquivo),
+    então centenas de jobs apontando para o mesmo repositório custam um único fetch.
+    Nas faltas, o espelho bare em CACHE_DIR/git recebe um fetch raso (--depth=1) e
+    sem blobs (--filter=blob:none), e apenas o blob do script é baixado.
+    """
+
+    def __init__(self, mirror_dir: Path = CACHE_DIR / "git"):
+        self.mirror_dir = mirror_dir
+        self._processes = asyncio.Semaphore(SCM_MAX_PROCESSES)
+        self._resolved: 'OrderedDict[Tuple[str, str], asyncio.Task]' = OrderedDict()
+        self._repo_locks = [asyncio.Lock() for _ in range(REPO_LOCK_STRIPES)]
+        # Apenas leituras em andamento; concluídas, o resultado fica no cache
+        self._scans: Dict[Tuple[str, str, str], asyncio.Task] = {}
+        self.stats = {'ls_remote': 0, 'fetches': 0, 'blobs': 0, 'cached': 0, 'errors': 0}
+
+    async def _git(self, *args: str, cwd: Optional[Path] = None) -> str:
+        env = {**os.environ, 'GIT_TERMINAL_PROMPT': '0'}
+        async with self._processes:
+            try:
+                process = await asyncio.create_subprocess_exec(
+                    'git', *args, cwd=str(cwd) if cwd else None, env=env,
+                    stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+                )
+            except OSError as e:
+                raise ScmError(f"git não pôde ser executado: {str(e)}") from e
+            try:
+                stdout, stderr = await asyncio.wait_for(process.communicate(), SCM_TIMEOUT)
+            except asyncio.TimeoutError:
+                process.kill()
+                await process.wait()
+                raise ScmError(f"git {args[0]} excedeu {SCM_TIMEOUT}s")
+        if process.returncode != 0:
+            raise ScmError(f"git {args[0]} falhou: {stderr.decode(errors='replace').strip()}")
+        return stdout.decode('utf-8', errors='replace')
+
+    async def resolve_commit(self, url: str, ref: str) -> str:
+        """Commit atual da referência no remoto, consultado uma única vez por execução."""
+        key = (url, ref)
+        task = self._resolved.get(key)
+        if task is None:
+            task = self._resolved[key] = asyncio.ensure_future(self._ls_remote(url, ref))
+            while len(self._resolved) > SCM_RESOLVE_CACHE_SIZE:
+                self._resolved.popitem(last=False)
+        else:
+            self._resolved.move_to_end(key)
+        try:
+            return await asyncio.shield(task)
+        except Exception:
+            # Falhas não ficam memorizadas, para a próxima consulta tentar de novo
+            self._resolved.pop(key, None)
+            raise
+
+    async def _ls_remote(self, url: str, ref: str) -> str:
+        self.stats['ls_remote'] += 1
+        output = await self._git('ls-remote', url, ref)
+        for line in output.splitlines():
+            commit, _, name = line.partition('\t')
+            if name == ref:
+                return commit
+        raise ScmError(f"Referência {ref} não encontrada em {url}")
+
+    def _mirror_path(self, url: str) -> Path:
+        return self.mirror_dir / hashlib.sha1(url.encode()).hexdigest()
+
+    async def _ensure_mirror(self, url: str) -> Path:
+        mirror = self._mirror_path(url)
+        if (mirror / 'HEAD').exists():
+            return mirror
+        mirror.parent.mkdir(parents=True, exist_ok=True)
+        await self._git('init', '--bare', '-q', str(mirror))
+        # Clone parcial: blobs ausentes são baixados sob demanda do remoto "origin"
+        for key, value in (
+            ('remote.origin.url', url),
+            ('remote.origin.promisor', 'true'),
+            ('remote.origin.partialclonefilter', 'blob:none'),
+            ('core.repositoryformatversion', '1'),
+            ('extensions.partialClone', 'origin')
+        ):
+            await self._git('config', key, value, cwd=mirror)
+        return mirror
+
+    async def _local_commit(self, mirror: Path, local_ref: str) -> Optional[str]:
+        """Commit da última busca da referência (consultar o objeto dispararia um fetch sob demanda)."""
+        try:
+            return (await self._git('rev-parse', '--verify', '-q', local_ref, cwd=mirror)).strip()
+        except ScmError:
+            return None
+
+    async def _read_file(self, url: str, ref: str, commit: str, path: str) -> Tuple[str, Optional[str]]:
+        """Lê o arquivo no commit, buscando no espelho apenas o necessário.
+
+        Retorna (commit, conteúdo); o commit pode ser mais novo se a branch andou
+        entre o ls-remote e o fetch. Conteúdo None indica arquivo inexistente.
+        """
+        lock = self._repo_locks[int(hashlib.sha1(url.encode()).hexdigest(), 16) % REPO_LOCK_STRIPES]
+        async with lock:
+            mirror = await self._ensure_mirror(url)
+            local_ref = f"refs/mirror/{hashlib.sha1(ref.encode()).hexdigest()}"
+            if await self._local_commit(mirror, local_ref) != commit:
+                self.stats['fetches'] += 1
+                await self._git(
+                    'fetch', '-q', '--depth=1', '--filter=blob:none', '--no-tags',
+                    'origin', f"+{ref}:{local_ref}", cwd=mirror
+                )
+                commit = (await self._git('rev-parse', local_ref, cwd=mirror)).strip()
+            try:
+                self.stats['blobs'] += 1
+                content = await self._git('cat-file', 'blob', f"{commit}:{path}", cwd=mirror)
+            except ScmError:
+                return commit, None
+        return commit, content
+
+    async def _scan_file(self, url: str, ref: str, commit: str, path: str,
+                         matcher: MatchEngine) -> Tuple[str, List[CodeMatch]]:
+        cached = await cache.aget(f"scm_{MATCH_SIGNATURE}_{url}@{commit}:{path}", max_age=CACHE_RETENTION)
+        if cached is not None:
+            self.stats['cached'] += 1
+            return commit, [CodeMatch(**m) for m in cached]
+
+        commit, content = await self._read_file(url, ref, commit, path)
+        if content is None:
+            logger.warning(f"{path} não encontrado em {url}@{commit[:12]}")
+            return commit, []
+        found = await matcher.find(content, source=path)
+        await cache.aset(f"scm_{MATCH_SIGNATURE}_{url}@{commit}:{path}", [asdict(m) for m in found])
+        return commit, found
+
+    @tracer.traced('scm.find_matches')
+    async def find_matches(self, git_info: GitInfo, matcher: MatchEngine) -> List[CodeMatch]:
+        """Busca as palavras-chave nos arquivos do job, preenchendo o commit em `git_info`."""
+        url = rewrite_url(git_info.repository_url)
+        ref = normalize_ref(git_info.branch)
+        commit = await self.resolve_commit(url, ref)
+        git_info.commit = commit
+
+        matches: List[CodeMatch] = []
+        for path in git_info.sparse_checkout_paths:
+            # Jobs simultâneos no mesmo (repositório, commit, arquivo) aguardam a mesma leitura
+            key = (url, commit, path)
+            task = self._scans.get(key)
+            if task is None:
+                task = self._scans[key] = asyncio.ensure_future(self._scan_file(url, ref, commit, path, matcher))
+                task.add_done_callback(lambda _, key=key: self._scans.pop(key, None))
+            git_info.commit, found = await asyncio.shield(task)
+            matches.extend(found)
+        return matches
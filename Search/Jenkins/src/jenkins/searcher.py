@@ -1,71 +1,159 @@
 import asyncio
-from typing import List, Dict
-from functools import partial
-import itertools
+from typing import Dict, List, Optional, Sequence, Union
 from src.config.settings import (
-    KEYWORDS, MAX_WORKERS, MAX_PROCESSES, 
-    CHUNK_SIZE, MAX_CONTEXT_LINES
+    KEYWORDS, MAX_CONTEXT_LINES, MATCH_PROCESSES, MATCH_OFFLOAD_THRESHOLD, MATCH_MODE, MATCH_XML_PATHS
 )
+from src.jenkins.matcher import KeywordMatcher
+from src.jenkins.match_memo import MatchMemo, MatchRecord, as_record
+from src.jenkins.xml_scanner import XmlScanner
+from src.models.search_result import CodeMatch, CONFIG_SOURCE
 from src.utils.logger import setup_logger
-from src.utils.timer import timer_decorator
-from src.utils.checkpoint import CheckpointManager
-from src.models.search_result import SearchResult, CodeMatch
-from src.jenkins.client import JenkinsClient
-
-logger = setup_logger(__name__)
-
-class JenkinsSearcher:
-    def __init__(self):
-        self.checkpoint = CheckpointManager()
-        self.lines_cache = []
-    
-    def _search_chunk(self, chunk: List[tuple], keywords: List[str]) -> List[Dict]:
-        matches = []
-        for i, line in chunk:
-            for keyword in keywords:
-                if keyword.lower() in line.lower():
-                    start_idx = max(0, i - MAX_CONTEXT_LINES)
-                    end_idx = i + MAX_CONTEXT_LINES + 1
-                    context_lines = self.lines_cache[start_idx:end_idx]
-                    matches.append(CodeMatch(
-                        keyword=keyword,
-                        line_number=i + 1,
-                        line_content=line.strip(),
-                        context='\n'.join(line.strip() for line in context_lines)
-                    ))
-        return matches
-    
-    @timer_decorator
-    async def process_job(self, server: str, group: str, job: dict, client: JenkinsClient) -> SearchResult:
+from src.utils.tracing import tracer
+
+logger = setup_logger()
+
+# Matchers de cada processo do pool (texto e, no modo XML, por elemento), criados na inicialização
+_worker_matchers: Dict[bool, Union[KeywordMatcher, XmlScanner]] = {}
+
+def _init_worker(keywords: List[str], context_lines: int, xml_paths: Optional[Sequence[str]]):
+    _worker_matchers[False] = KeywordMatcher(keywords, context_lines)
+    if xml_paths:
+        _worker_matchers[True] = XmlScanner(keywords, context_lines, xml_paths)
+
+def _match_shared(name: str, size: int, xml: bool) -> List[MatchRecord]:
+    """Executada no processo do pool: lê o texto direto da memória compartilhada."""
+    from multiprocessing import shared_memory
+
+    segment = shared_memory.SharedMemory(name=name)
+    try:
+        text = str(segment.buf[:size], 'utf-8', 'surrogatepass')
+    finally:
+        segment.close()
+    return [as_record(m) for m in _worker_matchers[xml].find(text)]
+
+class MatchEngine:
+    """Busca de palavras-chave que nunca bloqueia o event loop com textos grandes.
+
+    Textos até MATCH_OFFLOAD_THRESHOLD caracteres são buscados na própria thread,
+    onde o custo é menor que o da comunicação entre processos. Acima disso o texto
+    é gravado em um segmento de memória compartilhada e buscado em um pool de
+    MATCH_PROCESSES processos: o conteúdo não é serializado e apenas as ocorrências
+    voltam, como tuplas. O pool é criado no primeiro texto grande. Conteúdos
+    repetidos são buscados uma única vez (ver MatchMemo), inclusive quando chegam
+    ao mesmo tempo. Com `xml_paths` (MATCH_MODE = 'xml') o config.xml é buscado
+    apenas nesses elementos (ver XmlScanner); Jenkinsfiles continuam como texto.
+    """
+
+    def __init__(self, keywords: List[str] = KEYWORDS, context_lines: int = MAX_CONTEXT_LINES,
+                 processes: int = MATCH_PROCESSES, threshold: int = MATCH_OFFLOAD_THRESHOLD,
+                 xml_paths: Optional[Sequence[str]] = MATCH_XML_PATHS if MATCH_MODE == 'xml' else None):
+        self.keywords = keywords
+        self.context_lines = context_lines
+        self.processes = processes
+        self.threshold = threshold
+        self.xml_paths = list(xml_paths) if xml_paths else None
+        self.matcher = KeywordMatcher(keywords, context_lines)
+        self.xml_scanner = XmlScanner(keywords, context_lines, self.xml_paths) if self.xml_paths else None
+        self.memo = MatchMemo(self.matcher)
+        # Buscas em andamento por chave: textos iguais aguardam a primeira
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._pool = None
+        self.stats = {'inline': 0, 'offloaded': 0}
+
+    def _get_pool(self):
+        if self._pool is None:
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+
+            # spawn: o processo filho não herda threads nem conexões do processo principal
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.processes,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+                initargs=(self.keywords, self.context_lines, self.xml_paths)
+            )
+        return self._pool
+
+    async def find(self, text: str, source: str = CONFIG_SOURCE) -> List[CodeMatch]:
+        xml = self.xml_scanner is not None and source == CONFIG_SOURCE
+        records = await self._memoized(text, xml) if self.memo.size > 0 else await self._search(text, xml)
+        return [
+            CodeMatch(keyword=keyword, line_number=line, line_content=content, context=context,
+                      source=source, element=element)
+            for keyword, line, content, context, element in records
+        ]
+
+    async def _memoized(self, text: str, xml: bool) -> List[MatchRecord]:
+        # No modo XML o contexto vem do elemento, então trechos mascarados não são reaproveitados
+        key, masked = self.memo.key(text, mask=not xml)
+        if xml:
+            key += ':xml'
+        records = self.memo.get(key)
+        pending = self._pending.get(key) if records is None else None
+        if pending is not None:
+            try:
+                records = await asyncio.shield(pending)
+                self.memo.stats['hits'] += 1
+            except asyncio.CancelledError:
+                # Busca original falhou ou foi cancelada: este texto é buscado abaixo
+                if not pending.cancelled():
+                    raise
+        if records is not None:
+            # Conteúdo quase idêntico: as ocorrências são as mesmas, mas linha e contexto vêm deste texto
+            return self.memo.rebase(text, records) if masked else records
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending[key] = future
         try:
-            if not self.checkpoint.should_process_job(job['url']):
-                return None
-            
-            config = await client.get_config_xml(job['url'])
-            self.lines_cache = config.split('\n')
-            
-            chunks = list(zip(range(len(self.lines_cache)), self.lines_cache))
-            chunk_size = max(1, len(chunks) // MAX_PROCESSES)
-            chunks = [chunks[i:i + chunk_size] for i in range(0, len(chunks), chunk_size)]
-            
-            matches = []
-            for chunk in chunks:
-                chunk_matches = self._search_chunk(chunk, KEYWORDS)
-                matches.extend(chunk_matches)
-                
-            if matches:
-                logger.info(f"Encontradas {len(matches)} ocorrências em {job['name']}")
-                return SearchResult(
-                    server=server,
-                    group=group,
-                    project=job['name'],
-                    url=job['url'],
-                    matches=matches
-                )
-                
-            self.checkpoint.save_checkpoint(job=job['url'])
-            
-        except Exception as e:
-            logger.error(f"Erro ao processar projeto {job['name']}")
-        
-        return None
\ No newline at end of file
+            records = await self._search(text, xml)
+        except BaseException:
+            future.cancel()
+            raise
+        finally:
+            if self._pending.get(key) is future:
+                del self._pending[key]
+        self.memo.put(key, records)
+        future.set_result(records)
+        return records
+
+    async def _search(self, text: str, xml: bool) -> List[MatchRecord]:
+        if self.processes <= 0 or len(text) <= self.threshold:
+            self.stats['inline'] += 1
+            return [as_record(m) for m in (self.xml_scanner if xml else self.matcher).find(text)]
+
+        self.stats['offloaded'] += 1
+        with tracer.span('match.offload', size=len(text)):
+            return await self._offload(text, xml)
+
+    async def _offload(self, text: str, xml: bool) -> List[MatchRecord]:
+        from concurrent.futures.process import BrokenProcessPool
+        from multiprocessing import shared_memory
+
+        loop = asyncio.get_running_loop()
+        data = text.encode('utf-8', 'surrogatepass')
+        size = len(data)
+        segment = shared_memory.SharedMemory(create=True, size=max(1, size))
+        try:
+            segment.buf[:size] = data
+            del data
+            pool = self._get_pool()
+            try:
+                return await loop.run_in_executor(pool, _match_shared, segment.name, size, xml)
+            except BrokenProcessPool:
+                # Processo do pool morreu (ex.: OOM): encerra o pool quebrado, recria na próxima
+                # chamada e busca este texto em uma thread, ainda fora do event loop. Outra busca
+                # pode já ter recriado o pool; só o quebrado é descartado
+                if self._pool is pool:
+                    logger.error("Pool de busca interrompido; recriando")
+                    self._pool = None
+                pool.shutdown(wait=False, cancel_futures=True)
+                matches = await loop.run_in_executor(None, (self.xml_scanner if xml else self.matcher).find, text)
+                return [as_record(m) for m in matches]
+        finally:
+            segment.close()
+            segment.unlink()
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
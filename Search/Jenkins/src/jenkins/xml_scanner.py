@@ -0,0 +1,99 @@
+from typing import List, Sequence, Tuple
+from xml.parsers import expat
+from src.config.settings import KEYWORDS, MAX_CONTEXT_LINES, MATCH_XML_PATHS
+from src.jenkins.matcher import KeywordMatcher
+from src.models.search_result import CodeMatch, CONFIG_SOURCE
+from src.utils.logger import setup_logger
+
+logger = setup_logger()
+
+# Trecho do documento entregue ao parser por vez
+FEED_CHUNK = 64 * 1024
+
+# Caminho compilado: (ancorado na raiz, nomes dos elementos; '*' vale qualquer nome)
+PathPattern = Tuple[bool, Tuple[str, ...]]
+
+def compile_paths(patterns: Sequence[str]) -> List[PathPattern]:
+    """`definition/script` casa com qualquer elemento cujo caminho termine assim; `/raiz/...` exige o caminho completo."""
+    compiled = []
+    for pattern in patterns:
+        parts = tuple(part for part in pattern.strip('/').split('/') if part)
+        if parts:
+            compiled.append((pattern.startswith('/'), parts))
+    return compiled
+
+def path_matches(stack: List[str], patterns: List[PathPattern]) -> bool:
+    for anchored, parts in patterns:
+        if len(parts) > len(stack) or (anchored and len(parts) != len(stack)):
+            continue
+        if all(part == '*' or part == name for part, name in zip(parts, stack[-len(parts):])):
+            return True
+    return False
+
+class XmlScanner:
+    """Busca de palavras-chave restrita a elementos do config.xml (MATCH_MODE = 'xml').
+
+    O documento é lido incrementalmente pelo expat e apenas o texto dos elementos
+    em MATCH_XML_PATHS (script do pipeline, URLs de SCM, passos shell, parâmetros)
+    é acumulado e buscado; o restante é descartado pelo parser sem passar pela
+    busca, e a memória extra fica limitada ao maior texto selecionado. Cada
+    ocorrência traz o caminho do elemento, e a linha é a do documento inteiro.
+    Documentos sem nenhuma palavra-chave nem chegam ao parser, e um XML inválido
+    é buscado como texto.
+    """
+
+    def __init__(self, keywords: List[str] = KEYWORDS, context_lines: int = MAX_CONTEXT_LINES,
+                 paths: Sequence[str] = MATCH_XML_PATHS):
+        self.matcher = KeywordMatcher(keywords, context_lines)
+        self.paths = compile_paths(paths)
+
+    def find(self, text: str, source: str = CONFIG_SOURCE) -> List[CodeMatch]:
+        # Uma passada da expressão compilada descarta a maioria dos documentos
+        if next(iter(self.matcher.iter_hits(text)), None) is None:
+            return []
+        try:
+            return self._parse(text, source)
+        except expat.ExpatError as e:
+            logger.warning(f"config.xml inválido; buscando como texto: {str(e)}")
+            return self.matcher.find(text, source=source)
+
+    def _parse(self, text: str, source: str) -> List[CodeMatch]:
+        matches: List[CodeMatch] = []
+        stack: List[str] = []
+        # Por elemento aberto: partes do texto (None se o elemento não foi selecionado) e linha inicial
+        frames: List[List] = []
+        parser = expat.ParserCreate(encoding='utf-8')
+
+        def start(name: str, attrs):
+            stack.append(name)
+            frames.append([[] if path_matches(stack, self.paths) else None, 0])
+
+        def data(chunk: str):
+            frame = frames[-1] if frames else None
+            if frame is None or frame[0] is None:
+                return
+            if not frame[0]:
+                frame[1] = parser.CurrentLineNumber
+            frame[0].append(chunk)
+
+        def end(name: str):
+            parts, first_line = frames.pop()
+            if parts:
+                self._scan(''.join(parts), first_line, '/' + '/'.join(stack), source, matches)
+            stack.pop()
+
+        parser.StartElementHandler = start
+        parser.CharacterDataHandler = data
+        parser.EndElementHandler = end
+        for offset in range(0, len(text), FEED_CHUNK):
+            parser.Parse(text[offset:offset + FEED_CHUNK], False)
+        parser.Parse('', True)
+
+        matches.sort(key=lambda m: (m.line_number, m.keyword))
+        return matches
+
+    def _scan(self, node_text: str, first_line: int, element: str, source: str, matches: List[CodeMatch]):
+        for match in self.matcher.find(node_text, source=source):
+            match.line_number += first_line - 1
+            match.element = element
+            matches.append(match)
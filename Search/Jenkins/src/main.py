@@ -6,182 +6,312 @@ from typing import List, Dict, Optional
 from datetime import datetime
 from functools import partial
 
-from src.config.settings import JENKINS_SERVERS, BASE_DIR, MAX_CONCURRENT_JOBS, KEYWORDS
+from src.config.settings import (
+    JENKINS_SERVERS, BASE_DIR, MAX_CONCURRENT_JOBS, JOB_QUEUE_SIZE, KEYWORDS, SCM_ENABLED,
+    MEMORY_LIMIT, MATCH_PROCESSES, SHARD_WORKERS, BREAKER_MAX_REQUEUES
+)
 from src.factories.client_factory import ClientFactory
+from src.jenkins.client import cache, store, scheduler, resilience
+from src.jenkins.searcher import MatchEngine
+from src.jenkins.resilience import CircuitOpenError
+from src.jenkins.scm import ScmFetcher, ScmError, git_available, parse_scm_definition
 from src.models.search_result import SearchResult, CodeMatch, GitInfo, ProjectError
-from src.services.excel_service import ExcelService
+from src.services.report_service import ReportService
 from src.observers.progress_observer import ProgressObserver
 from src.utils.logger import setup_logger
 from src.utils.messages import MessageManager as msg
 from src.utils.checkpoint import CheckpointManager
-from src.utils.memory import MemoryManager
+from src.utils.memory import MemoryGovernor
+from src.utils.tracing import tracer
 
 logger = setup_logger()
-memory_manager = MemoryManager()
 
 class JenkinsSearchApp:
-    def __init__(self):
-        self.checkpoint = CheckpointManager()
-        self.excel_service = ExcelService(BASE_DIR / "results")
+    def __init__(self, checkpoint: Optional[CheckpointManager] = None, shards: int = 1):
+        self.checkpoint = checkpoint or CheckpointManager()
+        self.report_service = ReportService(BASE_DIR / "results")
         self.observers = [ProgressObserver()]
-        self.results: List[SearchResult] = []
-        self.semaphore = asyncio.Semaphore(MAX_CONCURRENT_JOBS)
+        self.spool = self.checkpoint.spool
+        # Em modo particionado cada processo recebe uma fração dos limites de jobs e memória
+        self.concurrency = max(1, MAX_CONCURRENT_JOBS // shards)
+        # Limita os jobs simultâneos e reduz o limite sob pressão de memória
+        self.memory_governor = MemoryGovernor(self.concurrency, cache=cache, limit=MEMORY_LIMIT // shards)
         self.keywords = KEYWORDS
+        # Configs grandes são buscados em processos separados, sem bloquear o event loop
+        self.matcher = MatchEngine(KEYWORDS, processes=MATCH_PROCESSES and max(1, MATCH_PROCESSES // shards))
+        self.scm = ScmFetcher() if SCM_ENABLED and git_available() else None
         self.processed_count = 0
+        # Jobs sem checkpoint por servidor; o servidor só é dado como concluído sem pendências
+        self.pending_jobs: Dict[str, int] = {}
     
     def notify_observers(self, event_type: str, data: dict) -> None:
         for observer in self.observers:
             observer.update(event_type, data)
     
-    async def process_job(self, server: str, job: dict, client) -> Optional[SearchResult]:
-        async with self.semaphore:
-            start_time = datetime.now()
-            try:
-                if not self.checkpoint.should_process_job(job['url']):
-                    return None
+    def owns_job(self, server: str, job: Dict) -> bool:
+        """Indica se o job é processado por esta instância (sobrescrito nos processos de partição)."""
+        return True
+    
+    async def process_job(self, server: str, job: dict, client, attempt: int = 0) -> Optional[SearchResult]:
+        """Processa um job; com o circuito do servidor aberto e tentativas restantes,
+        propaga CircuitOpenError para o consumidor esperar e tentar de novo."""
+        async with self.memory_governor.slot(server):
+            with tracer.span('job', server=server, project=job['name']):
+                start_time = datetime.now()
+                deferred = False
+                try:
+                    if not self.checkpoint.should_process_job(job['url']):
+                        return None
                 
-                config = await client.get_config_xml(job['url'])
-                if not config:
-                    return None
+                    document = await client.get_config(job['url'])
+                    if not document:
+                        self.pending_jobs[server] = self.pending_jobs.get(server, 0) + 1
+                        return None
                 
-                matches = []
-                for keyword in self.keywords:
-                    if keyword.lower() in config.lower():
-                        line_number = next(
-                            (i + 1 for i, line in enumerate(config.split('\n'))
-                            if keyword.lower() in line.lower()),
-                            0
+                    # Conteúdo inalterado desde a última execução: reaproveita o resultado anterior
+                    if document.matches is not None:
+                        matches = document.matches
+                    else:
+                        with tracer.span('match'):
+                            matches = await self.matcher.find(document.body)
+                        await client.store_matches(document, matches)
+                
+                    # Pipeline script from SCM: o script está no repositório, não no config.xml
+                    git_info = parse_scm_definition(document.body) if self.scm else None
+                    if git_info:
+                        try:
+                            matches = matches + await self.scm.find_matches(git_info, self.matcher)
+                        except ScmError as e:
+                            # Repositório inacessível (ex.: SSH privado sem credencial): o job é registrado
+                            # com as ocorrências do config.xml, sem perder o que já foi encontrado
+                            self.scm.stats['errors'] += 1
+                            logger.warning(
+                                f"Projeto {job['name']}: Jenkinsfile de {git_info.repository_url} não analisado: {str(e)}"
+                            )
+                
+                    result = None
+                    if matches:
+                        result = SearchResult(
+                            server=server,
+                            group=job.get('group', ''),
+                            project=job['name'],
+                            url=job['url'],
+                            matches=matches,
+                            git_info=git_info
                         )
-                        if line_number:
-                            lines = config.split('\n')
-                            start = max(0, line_number - 6)
-                            end = min(len(lines), line_number + 5)
-                            context = '\n'.join(lines[start:end])
-                            matches.append(CodeMatch(
-                                keyword=keyword,
-                                line_number=line_number,
-                                line_content=lines[line_number - 1].strip(),
-                                context=context
-                            ))
+                    
+                        self.notify_observers("keyword_found", {
+                            "server": server,
+                            "project": job['name'],
+                            "matches": matches
+                        })
                 
-                if matches:
-                    result = SearchResult(
+                    # Jobs com erro não são registrados, para serem tentados novamente na próxima execução
+                    self.checkpoint.save_checkpoint(job=job['url'], result=result)
+                    return result
+                
+                except Exception as e:
+                    if isinstance(e, CircuitOpenError) and attempt < BREAKER_MAX_REQUEUES:
+                        deferred = True
+                        raise
+                    self.pending_jobs[server] = self.pending_jobs.get(server, 0) + 1
+                    if isinstance(e, CircuitOpenError):
+                        # Servidor fora do ar: falha rápida, sem traceback para cada job
+                        logger.warning(
+                            f"Projeto {job['name']} adiado para a próxima execução após {attempt} esperas: {str(e)}"
+                        )
+                    else:
+                        error_msg = f"Erro ao processar projeto {job['name']}: {str(e)}\n{traceback.format_exc()}"
+                        logger.error(error_msg)
+                        msg.error(error_msg)
+                    return SearchResult(
                         server=server,
                         group=job.get('group', ''),
                         project=job['name'],
                         url=job['url'],
-                        matches=matches
+                        matches=[],
+                        error=ProjectError(
+                            project=job['name'],
+                            url=job['url'],
+                            error_type=type(e).__name__,
+                            error_message=str(e)
+                        )
                     )
-                    
-                    self.notify_observers("keyword_found", {
-                        "server": server,
-                        "project": job['name'],
-                        "matches": matches
-                    })
-                    
-                    return result
-                
+                finally:
+                    # Job devolvido ao consumidor: o progresso é contado na tentativa final
+                    if not deferred:
+                        elapsed = (datetime.now() - start_time).total_seconds()
+                        tracer.record_job(elapsed, job['url'])
+                        self.processed_count += 1
+                        self.notify_observers("project_complete", {
+                            "server": server,
+                            "project": job['name'],
+                            "url": job['url'],
+                            "processed": self.processed_count,
+                            "elapsed": elapsed
+                        })
+            
+                return None
+    
+    async def _consume_jobs(self, server: str, queue: asyncio.Queue, client) -> None:
+        """Consome jobs da fila continuamente até receber o sinal de fim (None)."""
+        while True:
+            await self.memory_governor.wait_for_intake()
+            job = await queue.get()
+            try:
+                if job is None:
+                    return
+                # O resultado já foi gravado no spool junto com o checkpoint do job
+                attempt = 0
+                while True:
+                    try:
+                        await self.process_job(server, job, client, attempt)
+                        break
+                    except CircuitOpenError as e:
+                        # Circuito aberto: o consumidor guarda o job e espera a requisição de teste.
+                        # Devolvê-lo à fila limitada poderia travar com a fila cheia e todos os
+                        # consumidores esperando espaço
+                        attempt += 1
+                        logger.debug(f"Projeto {job['name']}: {str(e)}; nova tentativa em {e.retry_after:.1f}s")
+                        await asyncio.sleep(e.retry_after)
             except Exception as e:
-                error_msg = f"Erro ao processar projeto {job['name']}: {str(e)}\n{traceback.format_exc()}"
+                error_msg = f"Erro ao processar job: {str(e)}\n{traceback.format_exc()}"
                 logger.error(error_msg)
                 msg.error(error_msg)
-                return SearchResult(
-                    server=server,
-                    group=job.get('group', ''),
-                    project=job['name'],
-                    url=job['url'],
-                    matches=[],
-                    error=ProjectError(
-                        project=job['name'],
-                        url=job['url'],
-                        error_type=type(e).__name__,
-                        error_message=str(e)
-                    )
-                )
             finally:
-                elapsed = (datetime.now() - start_time).total_seconds()
-                self.processed_count += 1
-                self.notify_observers("project_complete", {
-                    "server": server,
-                    "project": job['name'],
-                    "processed": self.processed_count,
-                    "elapsed": elapsed
-                })
-                await memory_manager.check_memory()
-            
-            return None
+                queue.task_done()
     
-    async def process_server(self, server: str) -> List[SearchResult]:
-        server_results = []
+    async def process_server(self, server: str) -> None:
         try:
             async with ClientFactory.create_client() as client:
-                jobs = await client.get_jobs(server)
-                total_jobs = len(jobs)
+                self.notify_observers("start_search", {"server": server})
                 
-                self.notify_observers("start_search", {
-                    "server": server,
-                    "total_items": total_jobs
-                })
+                # A enumeração alimenta uma fila limitada enquanto um conjunto fixo de
+                # consumidores processa os jobs; a fila cheia pausa a descoberta
+                queue: asyncio.Queue = asyncio.Queue(maxsize=JOB_QUEUE_SIZE)
+                consumers = [
+                    asyncio.create_task(self._consume_jobs(server, queue, client))
+                    for _ in range(self.concurrency)
+                ]
+                owned_jobs = 0
                 
-                # Processa jobs em lotes para melhor controle
-                batch_size = 10
-                for i in range(0, len(jobs), batch_size):
-                    batch = jobs[i:i + batch_size]
-                    tasks = [self.process_job(server, job, client) for job in batch]
-                    
-                    batch_results = await asyncio.gather(*tasks, return_exceptions=True)
-                    
-                    for result in batch_results:
-                        if isinstance(result, Exception):
-                            error_msg = f"Erro em lote: {str(result)}\n{traceback.format_exc()}"
-                            logger.error(error_msg)
-                            msg.error(error_msg)
-                        elif isinstance(result, SearchResult):
-                            server_results.append(result)
+                async def enqueue(job: Dict) -> None:
+                    nonlocal owned_jobs
+                    if self.owns_job(server, job):
+                        owned_jobs += 1
+                        await queue.put(job)
                 
-                self.checkpoint.save_checkpoint(server=server)
+                try:
+                    with tracer.span('jenkins.enumerate', server=server):
+                        await client.stream_jobs(server, enqueue)
+                    self.notify_observers("enumeration_complete", {
+                        "server": server,
+                        "total_items": owned_jobs
+                    })
+                    for _ in consumers:
+                        await queue.put(None)
+                    await asyncio.gather(*consumers)
+                finally:
+                    for consumer in consumers:
+                        consumer.cancel()
+                
+                pending = self.pending_jobs.get(server, 0) + client.stats['folder_errors']
+                if pending:
+                    msg.warning(
+                        f"{server}: {pending} jobs ou pastas com erro; o servidor será retomado na próxima execução"
+                    )
+                else:
+                    self.checkpoint.save_checkpoint(server=server)
+                
+                stats = client.stats
+                msg.info(
+                    f"{server}: config.xml {stats['config_downloaded']} baixados "
+                    f"({stats['bytes_downloaded'] / 1024 / 1024:.1f} MB), "
+                    f"{stats['config_not_modified']} não modificados (304), "
+                    f"{stats['config_cached']} do cache"
+                )
                 
         except Exception as e:
             error_msg = f"Erro ao processar servidor {server}: {str(e)}\n{traceback.format_exc()}"
             logger.error(error_msg)
             msg.error(error_msg)
-        
-        return server_results
     
-    async def search_servers(self) -> None:
+    async def scan(self, servers: List[str]) -> None:
+        """Processa os servidores neste processo, com o governor de memória ativo."""
+        self.memory_governor.start()
         try:
-            tasks = []
-            for server in JENKINS_SERVERS:
-                if self.checkpoint.should_process_server(server):
-                    tasks.append(self.process_server(server))
-            
-            if not tasks:
-                msg.info("Todos os servidores já foram processados")
-                return
-            
-            results = []
-            for task in asyncio.as_completed(tasks):
+            for task in asyncio.as_completed([self.process_server(server) for server in servers]):
                 try:
-                    server_results = await task
-                    results.extend(server_results)
+                    await task
                 except Exception as e:
                     error_msg = f"Erro ao processar resultados: {str(e)}\n{traceback.format_exc()}"
                     logger.error(error_msg)
                     msg.error(error_msg)
+        finally:
+            await self.memory_governor.stop()
+            msg.info(self.memory_governor.summary())
+    
+    def print_summary(self) -> None:
+        """Estatísticas de cache, busca, conexões, disjuntores e SCM deste processo."""
+        stats = cache.stats()
+        msg.info(
+            f"Cache: {stats['hits']} hits ({stats['hit_rate']:.1%}), {stats['misses']} misses, "
+            f"{stats['evictions']} remoções, {stats['size'] / 1024 / 1024:.1f} MB em memória"
+        )
+        msg.info(store.summary())
+        msg.info(self.matcher.memo.summary())
+        for host in scheduler.summary():
+            msg.info(
+                f"{host['servidor']}: {host['requisicoes']} requisições, {host['erros']} erros, "
+                f"latência média {host['latencia_media']:.2f}s, espera por conexão {host['espera_total']:.1f}s"
+            )
+        for host in resilience.summary():
+            msg.info(
+                f"{host['servidor']}: circuito {host['circuito']} ({host['aberturas']} aberturas, "
+                f"{host['recusadas']} requisições recusadas), {host['hedges']} hedges "
+                f"({host['hedges_vencedores']} mais rápidos que a original)"
+            )
+        if self.scm:
+            scm_stats = self.scm.stats
+            msg.info(
+                f"SCM: {scm_stats['ls_remote']} ls-remote, {scm_stats['fetches']} fetches, "
+                f"{scm_stats['blobs']} arquivos lidos, {scm_stats['cached']} resultados do cache, "
+                f"{scm_stats['errors']} jobs com repositório inacessível"
+            )
+    
+    async def search_servers(self) -> None:
+        tracer.start()
+        try:
+            # Resultados de execuções interrompidas continuam no spool e entram no relatório final
+            if len(self.spool):
+                msg.info(f"Retomando a partir do checkpoint: {len(self.spool)} resultados anteriores")
             
-            self.results = results
+            servers = [server for server in JENKINS_SERVERS if self.checkpoint.should_process_server(server)]
+            sharded = SHARD_WORKERS > 1 and bool(servers)
+            if not servers:
+                msg.info("Todos os servidores já foram processados")
+            elif sharded:
+                # Jobs distribuídos entre processos; cada um exibe as próprias estatísticas
+                from src.services.shard_service import ShardCoordinator
+                await ShardCoordinator(self).run(servers)
+            else:
+                await self.scan(servers)
             
-            if self.results:
+            if len(self.spool):
                 try:
-                    await self.excel_service.save_results(self.results)
+                    # O relatório é gerado lendo o spool em streaming
+                    self.checkpoint.sync()
+                    await self.report_service.save_results(self.spool)
                 except Exception as e:
                     error_msg = f"Erro ao salvar resultados: {str(e)}\n{traceback.format_exc()}"
                     logger.error(error_msg)
                     msg.error(error_msg)
             
             self.notify_observers("search_complete", {
-                "matches_found": sum(len(r.matches) for r in self.results)
+                "matches_found": self.spool.matches_count
             })
+            if not sharded:
+                self.print_summary()
             
         except KeyboardInterrupt:
             msg.warning("Pesquisa interrompida pelo usuário. Progresso salvo.")
@@ -191,6 +321,12 @@ class JenkinsSearchApp:
             logger.error(error_msg)
             msg.error(error_msg)
             sys.exit(1)
+        finally:
+            self.matcher.close()
+            tracer.close()
+            for line in tracer.summary():
+                msg.info(line)
+            self.checkpoint.close()
 
 async def main() -> None:
     try:
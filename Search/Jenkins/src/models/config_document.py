@@ -0,0 +1,13 @@
+from dataclasses import dataclass
+from typing import List, Optional
+from src.models.search_result import CodeMatch
+
+@dataclass
+class ConfigDocument:
+    url: str
+    body: str
+    content_hash: str
+    # True quando o conteúdo é o mesmo da última execução (cache válido, 304 ou hash igual)
+    unchanged: bool = False
+    # Resultado da busca anterior sobre este mesmo conteúdo, quando ainda válido
+    matches: Optional[List[CodeMatch]] = None
@@ -1,12 +1,16 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, asdict
 from datetime import datetime
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
+
+# Arquivo de origem das ocorrências encontradas na configuração do job
+CONFIG_SOURCE = 'config.xml'
 
 @dataclass
 class GitInfo:
     repository_url: str
     branch: str
     sparse_checkout_paths: List[str]
+    commit: Optional[str] = None
 
 @dataclass
 class CodeMatch:
@@ -14,6 +18,9 @@ class CodeMatch:
     line_number: int
     line_content: str
     context: str
+    source: str = CONFIG_SOURCE
+    # Caminho do elemento no config.xml, quando a busca é feita por elemento (MATCH_MODE = 'xml')
+    element: Optional[str] = None
 
 @dataclass
 class ProjectError:
@@ -32,4 +39,29 @@ class SearchResult:
     matches: List[CodeMatch]
     git_info: Optional[GitInfo] = None
     error: Optional[ProjectError] = None
-    timestamp: datetime = datetime.now()
\ No newline at end of file
+    timestamp: datetime = datetime.now()
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Serializa o resultado para JSON (datas em ISO 8601)."""
+        data = asdict(self)
+        data['timestamp'] = self.timestamp.isoformat()
+        if self.error:
+            data['error']['timestamp'] = self.error.timestamp.isoformat()
+        return data
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'SearchResult':
+        git_info = data.get('git_info')
+        error = data.get('error')
+        return cls(
+            server=data['server'],
+            group=data['group'],
+            project=data['project'],
+            url=data['url'],
+            matches=[CodeMatch(**m) for m in data.get('matches', [])],
+            git_info=GitInfo(**git_info) if git_info else None,
+            error=ProjectError(
+                **{**error, 'timestamp': datetime.fromisoformat(error['timestamp'])}
+            ) if error else None,
+            timestamp=datetime.fromisoformat(data['timestamp'])
+        )
\ No newline at end of file
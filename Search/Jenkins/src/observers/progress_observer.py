@@ -26,11 +26,22 @@ class ProgressObserver:
         
         if event_type == "start_search":
             server = data.get("server", "")
-            total = data.get("total_items", 0)
+            total = data.get("total_items")
             if server:
-                self.total_items[server] = total
                 self.server_start_times[server] = datetime.now()
-                msg.info(f"Iniciando busca em {server}: {total} projetos")
+                if total is None:
+                    # Jobs são processados durante a enumeração; o total chega em enumeration_complete
+                    msg.info(f"Iniciando busca em {server}")
+                else:
+                    self.total_items[server] = total
+                    msg.info(f"Iniciando busca em {server}: {total} projetos")
+        
+        elif event_type == "enumeration_complete":
+            server = data.get("server", "")
+            if server:
+                self.total_items[server] = data.get("total_items", 0)
+                msg.info(f"Enumeração concluída em {server}: {self.total_items[server]} projetos")
+                self._show_progress(server)
         
         elif event_type == "project_complete":
             server = data.get("server", "")
@@ -42,14 +53,7 @@ class ProgressObserver:
             
             if server and server not in self._progress_shown:
                 self.processed_items[server] += 1
-                current = self.processed_items[server]
-                total = self.total_items[server]
-                
-                if current == total:
-                    elapsed = datetime.now() - self.server_start_times[server]
-                    elapsed_seconds = elapsed.total_seconds()
-                    msg.progress(current, total, f"Projetos analisados em {server}", elapsed_seconds)
-                    self._progress_shown.add(server)
+                self._show_progress(server)
         
         elif event_type == "keyword_found":
             server = data.get('server', '')
@@ -99,4 +103,14 @@ class ProgressObserver:
             total_seconds = total_elapsed.total_seconds()
             msg.info("------------------------------------------------------------")
             msg.info(f"Tempo total de execução: {total_seconds:.2f}s")
-            msg.info("------------------------------------------------------------")
\ No newline at end of file
+            msg.info("------------------------------------------------------------")
+    
+    def _show_progress(self, server: str):
+        """Exibe o progresso final quando todos os projetos conhecidos do servidor foram analisados"""
+        current = self.processed_items[server]
+        total = self.total_items.get(server)
+        if server in self._progress_shown or not total or current != total:
+            return
+        elapsed = datetime.now() - self.server_start_times[server]
+        msg.progress(current, total, f"Projetos analisados em {server}", elapsed.total_seconds())
+        self._progress_shown.add(server)
\ No newline at end of file
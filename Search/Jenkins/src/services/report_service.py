@@ -0,0 +1,234 @@
+import asyncio
+import csv
+import importlib.util
+from typing import Dict, Iterable, Iterator, List, Tuple
+from pathlib import Path
+from datetime import datetime
+from collections import defaultdict
+from src.models.search_result import SearchResult
+from src.utils.logger import setup_logger
+from src.utils.tracing import tracer
+from src.config.settings import RESULTS_DIR, REPORT_FORMAT, REPORT_BATCH_SIZE
+
+logger = setup_logger(__name__)
+
+DETAIL_COLUMNS = ['Servidor', 'Grupo', 'Projeto', 'URL', 'Arquivo', 'Elemento', 'Palavra-chave', 'Linha', 'Trecho', 'Contexto']
+SUMMARY_COLUMNS = ['Servidor', 'Palavra-chave', 'Quantidade']
+REPORT_FORMATS = ('xlsx', 'csv', 'parquet')
+
+# Limites do formato XLSX
+XLSX_MAX_ROWS = 1048576
+XLSX_MAX_CELL = 32767
+MAX_COLUMN_WIDTH = 50
+
+class SummaryAccumulator:
+    """Contagem de ocorrências por servidor e palavra-chave, acumulada enquanto as linhas são gravadas."""
+
+    def __init__(self):
+        self.counts: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+
+    def add(self, server: str, keyword: str):
+        self.counts[server][keyword] += 1
+
+    def rows(self) -> Iterator[Tuple[str, str, int]]:
+        for server, keywords in self.counts.items():
+            for keyword, count in keywords.items():
+                yield server, keyword, count
+
+class ColumnWidths:
+    """Largura de cada coluna calculada de forma incremental, limitada a MAX_COLUMN_WIDTH."""
+
+    def __init__(self, columns: List[str]):
+        self.widths = [len(column) for column in columns]
+
+    def update(self, row: Tuple):
+        widths = self.widths
+        for idx, value in enumerate(row):
+            if widths[idx] < MAX_COLUMN_WIDTH:
+                length = len(value) if isinstance(value, str) else len(str(value))
+                if length > widths[idx]:
+                    widths[idx] = length
+
+    def final(self) -> List[int]:
+        return [min(width + 2, MAX_COLUMN_WIDTH) for width in self.widths]
+
+class ReportService:
+    """Grava os resultados da busca em streaming, sem montar a tabela inteira em memória.
+
+    Cada ocorrência vira uma linha assim que é lida. O resumo por servidor e as
+    larguras das colunas são acumulados durante a gravação. Formatos: XLSX (modo de
+    memória constante do XlsxWriter), CSV e Parquet (pyarrow, em lotes de REPORT_BATCH_SIZE).
+    """
+
+    def __init__(self, output_dir: Path = RESULTS_DIR, report_format: str = REPORT_FORMAT):
+        if report_format not in REPORT_FORMATS:
+            raise ValueError(f"Formato de relatório não suportado: {report_format}")
+        # O pyarrow só é importado na gravação; sem ele a falha apareceria apenas ao fim da busca
+        if report_format == 'parquet' and importlib.util.find_spec('pyarrow') is None:
+            raise ImportError(
+                'REPORT_FORMAT = "parquet" requer o pyarrow: pip install -r requirements-parquet.txt'
+            )
+        self.output_dir = output_dir
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.report_format = report_format
+
+    def _format_file_path(self, file_path: Path) -> str:
+        path_str = str(file_path)
+        width = len(path_str) + 4
+        timestamp = datetime.now().strftime("[%H:%M:%S]")
+
+        box = [
+            f"{timestamp} Relatório ({self.report_format}) disponível em:",
+            "+" + "-" * width + "+",
+            "|  " + path_str + "  |",
+            "+" + "-" * width + "+"
+        ]
+
+        return "\n".join(box)
+
+    @staticmethod
+    def _iter_rows(results: Iterable[SearchResult], summary: SummaryAccumulator) -> Iterator[Tuple]:
+        for result in results:
+            group = result.group.rstrip('/') if result.group else ''
+            for match in result.matches:
+                summary.add(result.server, match.keyword)
+                yield (
+                    result.server,
+                    group,
+                    result.project,
+                    result.url,
+                    match.source,
+                    match.element or '',
+                    match.keyword,
+                    match.line_number,
+                    match.line_content,
+                    match.context
+                )
+
+    async def save_results(self, results: Iterable[SearchResult]) -> Path:
+        """Gera o relatório em uma thread separada, sem bloquear o event loop."""
+        try:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            output_file = self.output_dir / f"jenkins_search_{timestamp}.{self.report_format}"
+            writer = getattr(self, f"_write_{self.report_format}")
+
+            with tracer.span('report.write', format=self.report_format):
+                rows = await asyncio.get_running_loop().run_in_executor(None, writer, results, output_file)
+            if not rows:
+                output_file.unlink(missing_ok=True)
+                raise ValueError("Nenhum dado para salvar")
+
+            # Exibe o caminho do arquivo em uma caixa ASCII
+            logger.info(self._format_file_path(output_file))
+            return output_file
+
+        except Exception as e:
+            logger.error(f"Erro ao criar relatório: {str(e)}")
+            raise
+
+    def _write_xlsx(self, results: Iterable[SearchResult], output_file: Path) -> int:
+        import xlsxwriter
+
+        summary = SummaryAccumulator()
+        # constant_memory grava cada linha em disco assim que a próxima começa
+        workbook = xlsxwriter.Workbook(str(output_file), {'constant_memory': True})
+        try:
+            sheets = []
+            rows = 0
+            sheet_row = XLSX_MAX_ROWS
+            for row in self._iter_rows(results, summary):
+                if sheet_row == XLSX_MAX_ROWS:
+                    # Limite de linhas do Excel: continua em uma nova planilha
+                    name = 'Detalhes' if not sheets else f'Detalhes {len(sheets) + 1}'
+                    worksheet = workbook.add_worksheet(name)
+                    worksheet.write_row(0, 0, DETAIL_COLUMNS)
+                    widths = ColumnWidths(DETAIL_COLUMNS)
+                    sheets.append((worksheet, widths))
+                    sheet_row = 1
+                row = tuple(v[:XLSX_MAX_CELL] if isinstance(v, str) else v for v in row)
+                worksheet.write_row(sheet_row, 0, row)
+                widths.update(row)
+                sheet_row += 1
+                rows += 1
+
+            if not rows:
+                return 0
+
+            for worksheet, widths in sheets:
+                self._format_sheet(worksheet, widths, len(DETAIL_COLUMNS))
+
+            worksheet = workbook.add_worksheet('Resumo')
+            worksheet.write_row(0, 0, SUMMARY_COLUMNS)
+            widths = ColumnWidths(SUMMARY_COLUMNS)
+            for idx, row in enumerate(summary.rows(), start=1):
+                worksheet.write_row(idx, 0, row)
+                widths.update(row)
+            self._format_sheet(worksheet, widths, len(SUMMARY_COLUMNS))
+            return rows
+        finally:
+            workbook.close()
+
+    @staticmethod
+    def _format_sheet(worksheet, widths: ColumnWidths, column_count: int):
+        """Ajusta larguras, congela o cabeçalho e adiciona filtros."""
+        for idx, width in enumerate(widths.final()):
+            worksheet.set_column(idx, idx, width)
+        worksheet.freeze_panes(1, 0)
+        worksheet.autofilter(0, 0, worksheet.dim_rowmax, column_count - 1)
+
+    def _write_csv(self, results: Iterable[SearchResult], output_file: Path) -> int:
+        summary = SummaryAccumulator()
+        rows = 0
+        with open(output_file, 'w', newline='', encoding='utf-8-sig') as f:
+            writer = csv.writer(f)
+            writer.writerow(DETAIL_COLUMNS)
+            for row in self._iter_rows(results, summary):
+                writer.writerow(row)
+                rows += 1
+
+        if rows:
+            summary_file = output_file.with_name(f"{output_file.stem}_resumo.csv")
+            with open(summary_file, 'w', newline='', encoding='utf-8-sig') as f:
+                writer = csv.writer(f)
+                writer.writerow(SUMMARY_COLUMNS)
+                writer.writerows(summary.rows())
+        return rows
+
+    def _write_parquet(self, results: Iterable[SearchResult], output_file: Path) -> int:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        schema = pa.schema([
+            (column, pa.int64() if column == 'Linha' else pa.string()) for column in DETAIL_COLUMNS
+        ])
+        summary = SummaryAccumulator()
+        rows = 0
+        batch: List[Tuple] = []
+
+        def flush(writer):
+            columns = list(zip(*batch))
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+                schema=schema
+            ))
+            batch.clear()
+
+        with pq.ParquetWriter(str(output_file), schema, compression='zstd') as writer:
+            for row in self._iter_rows(results, summary):
+                batch.append(row)
+                rows += 1
+                if len(batch) >= REPORT_BATCH_SIZE:
+                    flush(writer)
+            if batch:
+                flush(writer)
+
+        if rows:
+            summary_rows = list(summary.rows())
+            pq.write_table(
+                pa.Table.from_arrays(
+                    [pa.array([r[i] for r in summary_rows]) for i in range(len(SUMMARY_COLUMNS))],
+                    names=SUMMARY_COLUMNS
+                ),
+                str(output_file.with_name(f"{output_file.stem}_resumo.parquet"))
+            )
+        return rows
@@ -0,0 +1,250 @@
+import asyncio
+import signal
+import traceback
+import zlib
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Set, Tuple
+
+from src.config.settings import SHARD_WORKERS, SHARD_MODE, SHARD_MAX_RESTARTS
+from src.jenkins.client import cache, scheduler
+from src.main import JenkinsSearchApp
+from src.models.search_result import SearchResult
+from src.utils.logger import setup_logger
+from src.utils.messages import MessageManager as msg
+from src.utils.tracing import tracer
+
+logger = setup_logger()
+
+SHARD_MODES = ('server', 'job')
+
+def shard_of(key: str, workers: int) -> int:
+    """Partição estável de uma chave (igual em todos os processos e execuções)."""
+    return zlib.crc32(key.encode('utf-8')) % workers
+
+class ShardCheckpoint:
+    """Checkpoint do processo de varredura: consulta o estado recebido do coordenador
+    e envia cada job concluído para ser gravado por ele, no journal e no spool únicos."""
+
+    def __init__(self, conn, completed_jobs: Set[str]):
+        self.conn = conn
+        self.completed_jobs = completed_jobs
+        self.spool = None
+
+    def should_process_job(self, job: str) -> bool:
+        return job not in self.completed_jobs
+
+    def save_checkpoint(self, server: str = None, job: str = None, result: Optional[SearchResult] = None):
+        if job:
+            self.completed_jobs.add(job)
+            self.conn.send(('job', job, result))
+        if server:
+            self.conn.send(('server', server))
+
+class ForwardingObserver:
+    """Repassa os eventos de progresso ao coordenador, que os agrega entre os processos."""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def update(self, event_type: str, data: Dict):
+        self.conn.send(('event', event_type, data))
+
+class ShardApp(JenkinsSearchApp):
+    """Instância da aplicação em um processo de varredura, restrita à sua partição."""
+
+    def __init__(self, shard: int, workers: int, mode: str, checkpoint: ShardCheckpoint):
+        super().__init__(checkpoint=checkpoint, shards=workers)
+        self.shard = shard
+        self.workers = workers
+        self.mode = mode
+        self.observers = [ForwardingObserver(checkpoint.conn)]
+
+    def owns_job(self, server: str, job: Dict) -> bool:
+        return self.mode != 'job' or shard_of(job['url'], self.workers) == self.shard
+
+async def _run_worker(shard: int, workers: int, mode: str, servers: List[str],
+                      completed_jobs: Set[str], conn) -> None:
+    # Orçamentos globais de conexões e cache divididos entre os processos
+    scheduler.max_connections = max(1, scheduler.max_connections // workers)
+    scheduler.per_host = min(scheduler.per_host, scheduler.max_connections)
+    cache.resize(cache.max_size // workers)
+
+    app = ShardApp(shard, workers, mode, ShardCheckpoint(conn, completed_jobs))
+    tracer.start()
+    try:
+        await app.scan(servers)
+    finally:
+        app.matcher.close()
+        tracer.close()
+        msg.info(f"Processo de varredura {shard + 1}/{workers}:")
+        app.print_summary()
+        for line in tracer.summary():
+            msg.info(line)
+
+def run_worker(shard: int, workers: int, mode: str, servers: List[str],
+               completed_jobs: Set[str], conn) -> None:
+    """Ponto de entrada do processo de varredura (contexto spawn)."""
+    # Ctrl+C é tratado pelo coordenador, que encerra os processos
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    try:
+        asyncio.run(_run_worker(shard, workers, mode, servers, completed_jobs, conn))
+        conn.send(('done',))
+    finally:
+        conn.close()
+
+class ShardCoordinator:
+    """Distribui a varredura entre processos, cada um com event loop e sessão HTTP próprios.
+
+    Em SHARD_MODE 'server' cada processo recebe servidores inteiros; em 'job' todos
+    enumeram todos os servidores e processam apenas os jobs cujo hash da URL cai na
+    sua partição. Os processos enviam por pipe os jobs concluídos e os eventos de
+    progresso; o coordenador é o único a gravar checkpoint e spool e só marca um
+    servidor como concluído quando todas as partições o concluíram. Um processo que
+    termina sem sinalizar o fim é reiniciado (até SHARD_MAX_RESTARTS vezes) e retoma
+    a partição a partir do checkpoint, sem os servidores que já tinha concluído.
+    """
+
+    def __init__(self, app: JenkinsSearchApp, workers: int = SHARD_WORKERS, mode: str = SHARD_MODE):
+        if mode not in SHARD_MODES:
+            raise ValueError(f"SHARD_MODE inválido: {mode} (use {' ou '.join(SHARD_MODES)})")
+        self.app = app
+        self.checkpoint = app.checkpoint
+        self.workers = workers
+        self.mode = mode
+        self.processes: Dict[int, object] = {}
+        # Servidores concluídos por partição e partições que concluíram cada servidor
+        self.finished: Dict[int, Set[str]] = defaultdict(set)
+        self._server_reports: Dict[str, int] = defaultdict(int)
+        # Agregação dos eventos de progresso entre as partições
+        self._started: Set[str] = set()
+        self._enumerated: Dict[str, Dict[int, int]] = defaultdict(dict)
+        self._seen_jobs: Set[str] = set()
+        self._reporters = 1
+        # Processos efetivamente criados; os orçamentos são divididos entre eles
+        self.active = workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _assign(self, servers: List[str]) -> Dict[int, List[str]]:
+        if self.mode == 'job':
+            return {shard: list(servers) for shard in range(self.workers)}
+        # Servidores distribuídos em rodízio; processos sem servidor não são criados
+        assignment: Dict[int, List[str]] = defaultdict(list)
+        for index, server in enumerate(servers):
+            assignment[index % self.workers].append(server)
+        return dict(assignment)
+
+    async def run(self, servers: List[str]) -> None:
+        assignment = self._assign(servers)
+        self.active = len(assignment)
+        self._reporters = len(assignment) if self.mode == 'job' else 1
+        msg.info(f"Varredura em {len(assignment)} processos (partição por {self.mode})")
+        self._executor = ThreadPoolExecutor(max_workers=2 * len(assignment), thread_name_prefix='shard')
+        try:
+            await asyncio.gather(*(
+                self._supervise(shard, shard_servers) for shard, shard_servers in assignment.items()
+            ))
+        finally:
+            for process in self.processes.values():
+                if process.is_alive():
+                    process.terminate()
+            for process in self.processes.values():
+                process.join()
+            self._executor.shutdown(wait=True)
+
+    def _start(self, shard: int, servers: List[str]) -> Tuple[object, object]:
+        import multiprocessing
+
+        ctx = multiprocessing.get_context('spawn')
+        # Pipe novo a cada início: um processo morto não deixa travas compartilhadas para trás
+        reader, writer = ctx.Pipe(duplex=False)
+        completed = self.checkpoint.current_state['jobs_processed']
+        if self.mode == 'job':
+            completed = {job for job in completed if shard_of(job, self.workers) == shard}
+        pending = [server for server in servers if server not in self.finished[shard]]
+        process = ctx.Process(
+            target=run_worker,
+            args=(shard, self.active, self.mode, pending, set(completed), writer),
+            name=f"jenkins-search-shard-{shard}"
+        )
+        process.start()
+        writer.close()
+        self.processes[shard] = process
+        return process, reader
+
+    async def _supervise(self, shard: int, servers: List[str]) -> None:
+        loop = asyncio.get_running_loop()
+        restarts = 0
+        while True:
+            process, reader = self._start(shard, servers)
+            try:
+                done = await loop.run_in_executor(self._executor, self._read, shard, reader, loop)
+            finally:
+                reader.close()
+            await loop.run_in_executor(self._executor, process.join)
+            if done:
+                return
+            if restarts >= SHARD_MAX_RESTARTS:
+                msg.error(
+                    f"Processo de varredura {shard + 1} falhou {restarts + 1} vezes; "
+                    "a partição será retomada na próxima execução"
+                )
+                return
+            restarts += 1
+            msg.warning(
+                f"Processo de varredura {shard + 1} encerrado (código {process.exitcode}); "
+                f"reiniciando a partição ({restarts}/{SHARD_MAX_RESTARTS})"
+            )
+
+    def _read(self, shard: int, reader, loop) -> bool:
+        """Executada em thread: repassa as mensagens do processo ao event loop até o fim."""
+        try:
+            while True:
+                message = reader.recv()
+                if message[0] == 'done':
+                    return True
+                loop.call_soon_threadsafe(self._handle, shard, message)
+        except (EOFError, OSError):
+            return False
+
+    def _handle(self, shard: int, message: tuple) -> None:
+        try:
+            kind = message[0]
+            if kind == 'job':
+                _, job, result = message
+                self.checkpoint.save_checkpoint(job=job, result=result)
+            elif kind == 'server':
+                server = message[1]
+                if server not in self.finished[shard]:
+                    self.finished[shard].add(server)
+                    self._server_reports[server] += 1
+                    if self._server_reports[server] >= self._reporters:
+                        self.checkpoint.save_checkpoint(server=server)
+            elif kind == 'event':
+                self._forward_event(shard, message[1], message[2])
+        except Exception as e:
+            error_msg = f"Erro ao tratar mensagem do processo {shard + 1}: {str(e)}\n{traceback.format_exc()}"
+            logger.error(error_msg)
+            msg.error(error_msg)
+
+    def _forward_event(self, shard: int, event_type: str, data: Dict) -> None:
+        server = data.get('server', '')
+        if event_type == 'start_search':
+            if server in self._started:
+                return
+            self._started.add(server)
+        elif event_type == 'enumeration_complete':
+            # Total do servidor: soma dos jobs de cada partição, exibido uma única vez
+            totals = self._enumerated[server]
+            already_reported = len(totals) >= self._reporters
+            totals[shard] = data.get('total_items', 0)
+            if already_reported or len(totals) < self._reporters:
+                return
+            data = {**data, 'total_items': sum(totals.values())}
+        elif event_type == 'project_complete':
+            # Após um reinício os jobs já concluídos da partição voltam a ser anunciados
+            url = data.get('url')
+            if url in self._seen_jobs:
+                return
+            self._seen_jobs.add(url)
+        self.app.notify_observers(event_type, data)
@@ -1,130 +1,220 @@
 import json
 import time
-import asyncio
-import os
+import sqlite3
+from collections import OrderedDict
 from pathlib import Path
-from typing import Any, Dict, Optional
-from src.config.settings import CACHE_DIR, CACHE_DURATION, CACHE_MAX_SIZE
+from typing import Any, Dict, NamedTuple, Optional
+from src.config.settings import (
+    CACHE_DIR, CACHE_DURATION, CACHE_MAX_SIZE, CACHE_RETENTION,
+    CACHE_FLUSH_BATCH, CACHE_FLUSH_INTERVAL
+)
 from src.utils.logger import setup_logger
+from src.utils.tracing import tracer
 
 logger = setup_logger()
 
+class CacheEntry(NamedTuple):
+    timestamp: float
+    value: Any
+    size: int
+    kind: str
+    payload: str
+
 class Cache:
-    def __init__(self, max_size: int = CACHE_MAX_SIZE):
+    """Cache LRU limitado em bytes, com persistência em um único arquivo SQLite.
+
+    Todas as operações em memória são O(1) (OrderedDict) e não possuem pontos de
+    espera, portanto dispensam lock dentro do event loop. O tamanho de cada item
+    é calculado uma única vez na inserção e as gravações em disco são agrupadas
+    (write-behind) em transações de até CACHE_FLUSH_BATCH itens.
+    """
+
+    def __init__(self, max_size: int = CACHE_MAX_SIZE, store_file: Optional[Path] = None):
         self.max_size = max_size
         self.current_size = 0
-        self.cache: Dict[str, Dict[str, Any]] = {}
-        self.lock = asyncio.Lock()
-        self._ensure_cache_dir()
-        
-    def _ensure_cache_dir(self):
-        """Garante que o diretório de cache existe."""
+        self.cache: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self.store_file = store_file or CACHE_DIR / "cache.sqlite3"
+        self._pending_writes: Dict[str, Optional[CacheEntry]] = {}
+        self._last_flush = time.monotonic()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_hits = 0
+        self._store: Optional[sqlite3.Connection] = None
+        self._store_opened = False
+
+    @property
+    def _db(self) -> Optional[sqlite3.Connection]:
+        """Abre o arquivo de cache no primeiro acesso, não na importação do módulo."""
+        if not self._store_opened:
+            self._store_opened = True
+            self._store = self._open_store()
+        return self._store
+
+    def _open_store(self) -> Optional[sqlite3.Connection]:
+        """Abre o arquivo de cache e descarta entradas além do prazo de retenção."""
         try:
-            CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            self.store_file.parent.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(str(self.store_file), check_same_thread=False, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, timestamp REAL NOT NULL, kind TEXT NOT NULL, value TEXT NOT NULL)"
+            )
+            retention = max(CACHE_DURATION, CACHE_RETENTION)
+            db.execute("DELETE FROM entries WHERE timestamp < ?", (time.time() - retention,))
+            return db
         except Exception as e:
-            logger.error(f"Erro ao criar diretório de cache: {str(e)}")
-    
-    def _get_cache_path(self, key: str) -> Path:
-        """Retorna o caminho do arquivo de cache para a chave fornecida."""
-        # Sanitiza a chave para um nome de arquivo válido
-        safe_key = "".join(c if c.isalnum() else "_" for c in key)
-        return CACHE_DIR / f"{safe_key}.json"
-    
-    async def _check_size(self):
-        """Verifica e gerencia o tamanho do cache."""
-        if self.current_size > self.max_size:
-            async with self.lock:
-                # Remove itens mais antigos até atingir 80% do limite
-                target_size = int(self.max_size * 0.8)
-                items = sorted(
-                    self.cache.items(),
-                    key=lambda x: x[1]['timestamp']
-                )
-                
-                for key, _ in items:
-                    if self.current_size <= target_size:
-                        break
-                    await self.adelete(key)
-    
-    async def aget(self, key: str) -> Optional[Any]:
-        """Recupera dados do cache de forma assíncrona."""
-        async with self.lock:
-            if key in self.cache:
-                data = self.cache[key]
-                if time.time() - data['timestamp'] <= CACHE_DURATION:
-                    return data['value']
-                await self.adelete(key)
-            
-            cache_file = self._get_cache_path(key)
-            if cache_file.exists():
-                try:
-                    data = json.loads(cache_file.read_text())
-                    if time.time() - data['timestamp'] <= CACHE_DURATION:
-                        self.cache[key] = data
-                        self.current_size += len(json.dumps(data))
-                        await self._check_size()
-                        return data['value']
-                    cache_file.unlink()
-                except Exception as e:
-                    logger.error(f"Erro ao ler cache: {str(e)}")
-            
+            logger.error(f"Erro ao abrir cache em disco: {str(e)}")
             return None
-    
+
+    @staticmethod
+    def _make_entry(value: Any, timestamp: float) -> CacheEntry:
+        if isinstance(value, str):
+            return CacheEntry(timestamp, value, len(value), 'text', value)
+        payload = json.dumps(value)
+        return CacheEntry(timestamp, value, len(payload), 'json', payload)
+
+    def _insert(self, key: str, entry: CacheEntry):
+        old = self.cache.pop(key, None)
+        if old is not None:
+            self.current_size -= old.size
+        self.cache[key] = entry
+        self.current_size += entry.size
+        self._evict()
+
+    def _evict(self):
+        """Remove os itens menos usados da memória; eles continuam disponíveis no disco."""
+        while self.current_size > self.max_size and self.cache:
+            _, entry = self.cache.popitem(last=False)
+            self.current_size -= entry.size
+            self.evictions += 1
+
+    def resize(self, max_size: int):
+        """Ajusta o orçamento de memória do cache, liberando itens imediatamente se necessário."""
+        self.max_size = max_size
+        self._evict()
+
+    def _load_from_disk(self, key: str) -> Optional[CacheEntry]:
+        if key in self._pending_writes:
+            return self._pending_writes[key]
+        if self._db is None:
+            return None
+        try:
+            row = self._db.execute(
+                "SELECT timestamp, kind, value FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+        except Exception as e:
+            logger.error(f"Erro ao ler cache: {str(e)}")
+            return None
+        if row is None:
+            return None
+        timestamp, kind, payload = row
+        value = json.loads(payload) if kind == 'json' else payload
+        return CacheEntry(timestamp, value, len(payload), kind, payload)
+
+    @tracer.traced('cache.aget')
+    async def aget(self, key: str, max_age: Optional[float] = None) -> Optional[Any]:
+        """Recupera dados do cache de forma assíncrona.
+
+        `max_age` permite manter itens revalidáveis além de CACHE_DURATION.
+        """
+        entry = self.cache.get(key)
+        if entry is None:
+            entry = self._load_from_disk(key)
+            if entry is not None and entry.size <= self.max_size:
+                self.disk_hits += 1
+                self._insert(key, entry)
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        if time.time() - entry.timestamp > (max_age or CACHE_DURATION):
+            await self.adelete(key)
+            self.misses += 1
+            return None
+
+        if key in self.cache:
+            self.cache.move_to_end(key)
+        self.hits += 1
+        return entry.value
+
+    @tracer.traced('cache.aset')
     async def aset(self, key: str, value: Any):
         """Armazena dados no cache de forma assíncrona."""
-        async with self.lock:
-            cache_data = {
-                'timestamp': time.time(),
-                'value': value
-            }
-            
-            # Calcula tamanho dos dados
-            data_size = len(json.dumps(cache_data))
-            
-            # Verifica se os dados são muito grandes
-            if data_size > self.max_size:
-                logger.warning(f"Dados muito grandes para cache: {key}")
-                return
-            
-            # Remove item antigo se existir
-            if key in self.cache:
-                await self.adelete(key)
-            
-            # Adiciona novo item
-            self.cache[key] = cache_data
-            self.current_size += data_size
-            
-            # Persiste no disco
-            try:
-                cache_file = self._get_cache_path(key)
-                cache_file.write_text(json.dumps(cache_data))
-            except Exception as e:
-                logger.error(f"Erro ao gravar cache: {str(e)}")
-            
-            await self._check_size()
-    
+        entry = self._make_entry(value, time.time())
+
+        if entry.size > self.max_size:
+            logger.warning(f"Dados muito grandes para cache: {key}")
+            return
+
+        self._insert(key, entry)
+        self._pending_writes[key] = entry
+        self._maybe_flush()
+
     async def adelete(self, key: str):
         """Remove item do cache de forma assíncrona."""
-        if key in self.cache:
-            data_size = len(json.dumps(self.cache[key]))
-            del self.cache[key]
-            self.current_size -= data_size
-            
-            try:
-                cache_file = self._get_cache_path(key)
-                if cache_file.exists():
-                    cache_file.unlink()
-            except Exception as e:
-                logger.error(f"Erro ao remover cache: {str(e)}")
-    
+        entry = self.cache.pop(key, None)
+        if entry is not None:
+            self.current_size -= entry.size
+        self._pending_writes[key] = None
+        self._maybe_flush()
+
+    def _maybe_flush(self):
+        if (len(self._pending_writes) >= CACHE_FLUSH_BATCH or
+                time.monotonic() - self._last_flush >= CACHE_FLUSH_INTERVAL):
+            self.flush()
+
+    def flush(self):
+        """Grava em disco, em uma única transação, as alterações pendentes."""
+        self._last_flush = time.monotonic()
+        if not self._pending_writes or self._db is None:
+            self._pending_writes.clear()
+            return
+
+        writes = [(k, e.timestamp, e.kind, e.payload) for k, e in self._pending_writes.items() if e is not None]
+        deletes = [(k,) for k, e in self._pending_writes.items() if e is None]
+        self._pending_writes.clear()
+        try:
+            with self._db:
+                self._db.execute("BEGIN")
+                if writes:
+                    self._db.executemany(
+                        "INSERT OR REPLACE INTO entries (key, timestamp, kind, value) VALUES (?, ?, ?, ?)",
+                        writes
+                    )
+                if deletes:
+                    self._db.executemany("DELETE FROM entries WHERE key = ?", deletes)
+        except Exception as e:
+            logger.error(f"Erro ao gravar cache: {str(e)}")
+
+    async def aflush(self):
+        self.flush()
+
     async def aclear(self):
         """Limpa todo o cache de forma assíncrona."""
-        async with self.lock:
-            self.cache.clear()
-            self.current_size = 0
-            
-            try:
-                for cache_file in CACHE_DIR.glob("*.json"):
-                    cache_file.unlink()
-            except Exception as e:
-                logger.error(f"Erro ao limpar cache: {str(e)}")
\ No newline at end of file
+        self.cache.clear()
+        self.current_size = 0
+        self._pending_writes.clear()
+
+        try:
+            if self._db is not None:
+                self._db.execute("DELETE FROM entries")
+        except Exception as e:
+            logger.error(f"Erro ao limpar cache: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Contadores de uso do cache."""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'disk_hits': self.disk_hits,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'entries': len(self.cache),
+            'size': self.current_size,
+            'max_size': self.max_size
+        }
@@ -1,65 +1,214 @@
 import json
+import os
+import time
 from pathlib import Path
-from typing import Dict, Any
-from src.config.settings import CACHE_DIR
+from typing import Dict, Any, Optional
+from src.config.settings import (
+    CACHE_DIR, CHECKPOINT_FSYNC_BATCH, CHECKPOINT_FSYNC_INTERVAL, CHECKPOINT_COMPACT_EVERY
+)
+from src.models.search_result import SearchResult
 from src.utils.logger import setup_logger
+from src.utils.result_spool import ResultSpool
 
 logger = setup_logger()
 
 class CheckpointManager:
-    def __init__(self):
-        self.checkpoint_file = CACHE_DIR / "checkpoint.json"
+    """Checkpoint por job com journal append-only.
+
+    Cada job concluído é acrescentado ao journal e o resultado encontrado, se
+    houver, ao spool de resultados; o fsync é feito em lotes e, periodicamente, o
+    estado é compactado em um snapshot e o journal é truncado. As consultas usam
+    sets (O(1)).
+
+    O resultado chega ao sistema operacional antes da linha do job no journal, e
+    nos syncs o spool vai para o disco antes do journal. Linhas de jobs com
+    resultado são marcadas; se após uma queda de energia o resultado de um desses
+    jobs não estiver no spool, o job volta a ser processado.
+    """
+
+    def __init__(self, directory: Path = CACHE_DIR):
+        directory.mkdir(parents=True, exist_ok=True)
+        self.checkpoint_file = directory / "checkpoint.json"
+        self.journal_file = directory / "checkpoint.journal"
+        self.spool = ResultSpool(directory / "results.jsonl")
+        self._journal = None
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._journal_entries = 0
+        # Jobs do journal registrados com resultado, conferidos contra o spool na abertura
+        self._journal_results = set()
         self.current_state = self._load_checkpoint()
-    
+        self._verify_results(self.spool.recover(self.current_state['jobs_processed']))
+
+    @staticmethod
+    def _empty_state() -> Dict[str, Any]:
+        return {
+            'servers_processed': set(),
+            'jobs_processed': set(),
+            'last_server': None,
+            'last_job': None
+        }
+
     def _load_checkpoint(self) -> Dict[str, Any]:
-        """Carrega o último checkpoint salvo."""
+        """Carrega o último snapshot e reaplica o journal."""
+        state = self._empty_state()
         if self.checkpoint_file.exists():
             try:
-                return json.loads(self.checkpoint_file.read_text())
+                snapshot = json.loads(self.checkpoint_file.read_text())
+                state['servers_processed'] = set(snapshot.get('servers_processed', []))
+                state['jobs_processed'] = set(snapshot.get('jobs_processed', []))
+                state['last_server'] = snapshot.get('last_server')
+                state['last_job'] = snapshot.get('last_job')
             except Exception as e:
                 logger.error(f"Erro ao carregar checkpoint: {str(e)}")
-        return {
-            'servers_processed': [],
-            'jobs_processed': [],
-            'last_server': None,
-            'last_job': None
-        }
-    
-    def save_checkpoint(self, server: str = None, job: str = None):
-        """Salva o progresso atual."""
+
+        if self.journal_file.exists():
+            try:
+                valid_bytes = 0
+                with open(self.journal_file, 'rb') as journal:
+                    for line in journal:
+                        try:
+                            entry = json.loads(line)
+                        except ValueError:
+                            entry = None
+                        if entry is None or not line.endswith(b'\n'):
+                            # Última linha ficou incompleta em uma interrupção: descarta o trecho
+                            with open(self.journal_file, 'r+b') as f:
+                                f.truncate(valid_bytes)
+                            break
+                        self._apply(state, entry)
+                        if entry.get('result'):
+                            self._journal_results.add(entry['job'])
+                        self._journal_entries += 1
+                        valid_bytes += len(line)
+            except Exception as e:
+                logger.error(f"Erro ao carregar journal do checkpoint: {str(e)}")
+        return state
+
+    def _verify_results(self, recovered: set):
+        """Reabre jobs do journal cujo resultado não sobreviveu no spool."""
+        lost = self._journal_results - recovered
+        if lost:
+            logger.warning(f"{len(lost)} jobs registrados sem resultado no spool serão processados novamente")
+            self.current_state['jobs_processed'] -= lost
+        self._journal_results = set()
+
+    @staticmethod
+    def _apply(state: Dict[str, Any], entry: Dict[str, Any]):
+        if entry.get('server'):
+            state['servers_processed'].add(entry['server'])
+            state['last_server'] = entry['server']
+        if entry.get('job'):
+            state['jobs_processed'].add(entry['job'])
+            state['last_job'] = entry['job']
+
+    def _append(self, entry: Dict[str, Any], sync: bool = False):
+        if self._journal is None:
+            self._journal = open(self.journal_file, 'a', encoding='utf-8')
+        self._journal.write(json.dumps(entry) + '\n')
+        self._journal_entries += 1
+        self._unsynced += 1
+
+        if (sync or self._unsynced >= CHECKPOINT_FSYNC_BATCH or
+                time.monotonic() - self._last_sync >= CHECKPOINT_FSYNC_INTERVAL):
+            self.sync()
+        if self._journal_entries >= CHECKPOINT_COMPACT_EVERY:
+            self.compact()
+
+    def sync(self):
+        """Força a gravação do journal em disco."""
+        # O spool vai para o disco antes, para nenhum job registrado ficar sem resultado
+        self.spool.sync()
+        if self._journal is None:
+            return
+        self._journal.flush()
+        os.fsync(self._journal.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def compact(self):
+        """Grava o estado completo em um snapshot atômico e trunca o journal."""
+        try:
+            self.sync()
+            snapshot = {
+                'servers_processed': sorted(self.current_state['servers_processed']),
+                'jobs_processed': sorted(self.current_state['jobs_processed']),
+                'last_server': self.current_state['last_server'],
+                'last_job': self.current_state['last_job']
+            }
+            tmp_file = self.checkpoint_file.with_suffix('.tmp')
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(snapshot, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_file, self.checkpoint_file)
+
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+            self.journal_file.unlink(missing_ok=True)
+            self._journal_entries = 0
+            logger.debug("Checkpoint compactado")
+        except Exception as e:
+            logger.error(f"Erro ao compactar checkpoint: {str(e)}")
+
+    def save_checkpoint(self, server: str = None, job: str = None, result: Optional[SearchResult] = None):
+        """Registra o progresso atual no journal e o resultado do job no spool."""
         try:
+            entry = {}
             if server and server not in self.current_state['servers_processed']:
-                self.current_state['servers_processed'].append(server)
-                self.current_state['last_server'] = server
-            
+                entry['server'] = server
             if job and job not in self.current_state['jobs_processed']:
-                self.current_state['jobs_processed'].append(job)
-                self.current_state['last_job'] = job
-            
-            self.checkpoint_file.write_text(json.dumps(self.current_state))
+                entry['job'] = job
+                if result:
+                    # O resultado precisa chegar ao sistema antes da linha do journal que o referencia
+                    self.spool.append(result)
+                    self.spool.flush()
+                    entry['result'] = True
+            if not entry:
+                return
+
+            self._apply(self.current_state, entry)
+            # Conclusão de servidor é rara e importante: sincroniza imediatamente
+            self._append(entry, sync='server' in entry)
             logger.debug(f"Checkpoint salvo: Servidor={server}, Job={job}")
         except Exception as e:
             logger.error(f"Erro ao salvar checkpoint: {str(e)}")
-    
+
+    def close(self):
+        """Sincroniza o journal pendente e fecha o arquivo."""
+        try:
+            self.sync()
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+        except Exception as e:
+            logger.error(f"Erro ao fechar checkpoint: {str(e)}")
+        self.spool.close()
+
     def clear_checkpoint(self):
         """Limpa o checkpoint atual."""
         try:
-            if self.checkpoint_file.exists():
-                self.checkpoint_file.unlink()
-            self.current_state = self._load_checkpoint()
+            self.close()
+            self.spool.clear()
+            for path in (self.checkpoint_file, self.journal_file):
+                if path.exists():
+                    path.unlink()
+            self._journal_entries = 0
+            self.current_state = self._empty_state()
             logger.info("Checkpoint limpo com sucesso")
         except Exception as e:
             logger.error(f"Erro ao limpar checkpoint: {str(e)}")
-    
+
     def should_process_server(self, server: str) -> bool:
         """Verifica se o servidor deve ser processado."""
         return server not in self.current_state['servers_processed']
-    
+
     def should_process_job(self, job: str) -> bool:
         """Verifica se o job deve ser processado."""
         return job not in self.current_state['jobs_processed']
-    
+
     @property
     def has_checkpoint(self) -> bool:
         """Verifica se existe um checkpoint salvo."""
-        return bool(self.current_state['servers_processed'] or self.current_state['jobs_processed'])
\ No newline at end of file
+        return bool(self.current_state['servers_processed'] or self.current_state['jobs_processed'])
@@ -0,0 +1,294 @@
+import mmap
+import os
+import struct
+import time
+import zlib
+from pathlib import Path
+from typing import Dict, List, Optional
+from src.config.settings import (
+    CONTENT_STORE_DIR, CONTENT_SEGMENT_SIZE, CONTENT_COMPRESSION_LEVEL, CACHE_DURATION, CACHE_RETENTION
+)
+from src.utils.logger import setup_logger
+from src.utils.tracing import tracer
+
+logger = setup_logger()
+
+# Registro: marcador, hash SHA-1 do conteúdo, tamanho comprimido e tamanho original, seguidos dos dados
+RECORD_MAGIC = b'JSB1'
+RECORD_HEADER = struct.Struct('>4s20sII')
+# Localização no índice: número do segmento nos bits altos e offset do registro nos 40 bits baixos
+OFFSET_BITS = 40
+OFFSET_MASK = (1 << OFFSET_BITS) - 1
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem lock entre processos
+    fcntl = None
+
+class Segment:
+    """Arquivo de segmento lido via mmap; o mapeamento cresce conforme o arquivo recebe registros."""
+    __slots__ = ('number', 'path', 'file', 'map', 'scanned', 'mtime')
+
+    def __init__(self, number: int, path: Path):
+        self.number = number
+        self.path = path
+        self.file = open(path, 'rb')
+        self.map: Optional[mmap.mmap] = None
+        # Fim do último registro completo já indexado
+        self.scanned = 0
+        self.mtime = os.fstat(self.file.fileno()).st_mtime
+
+    def view(self, end: int) -> Optional[mmap.mmap]:
+        """Mapeamento que cobre ao menos até `end`, remapeando se o arquivo cresceu."""
+        if self.map is None or len(self.map) < end:
+            size = os.fstat(self.file.fileno()).st_size
+            if size < end:
+                return None
+            if self.map is not None:
+                self.map.close()
+            self.map = mmap.mmap(self.file.fileno(), size, access=mmap.ACCESS_READ)
+        return self.map
+
+    def close(self):
+        if self.map is not None:
+            self.map.close()
+            self.map = None
+        self.file.close()
+
+class ContentStore:
+    """Armazenamento endereçado por conteúdo para os config.xml baixados.
+
+    Cada conteúdo é gravado uma única vez, comprimido (zlib), e identificado pelo
+    SHA-1 que já é guardado nos metadados de cada URL (a associação URL → hash fica
+    no cache). Os registros são acrescentados a poucos segmentos grandes de até
+    CONTENT_SEGMENT_SIZE bytes e lidos via mmap. O índice hash → posição é montado
+    na abertura percorrendo apenas os cabeçalhos dos registros.
+
+    Cada processo grava em um segmento que mantém bloqueado (flock), então os
+    processos de varredura podem compartilhar o diretório; registros gravados por
+    outro processo são indexados quando procurados. Conteúdos lidos de segmentos
+    com mais da metade do prazo de retenção são copiados para o segmento atual,
+    e segmentos além do prazo são removidos na abertura.
+    """
+
+    def __init__(self, directory: Path = CONTENT_STORE_DIR, segment_size: int = CONTENT_SEGMENT_SIZE,
+                 level: int = CONTENT_COMPRESSION_LEVEL):
+        self.directory = directory
+        self.segment_size = segment_size
+        self.level = level
+        self.retention = max(CACHE_DURATION, CACHE_RETENTION)
+        self.index: Dict[bytes, int] = {}
+        self.segments: Dict[int, Segment] = {}
+        self._writer: Optional[int] = None
+        self._writer_number = 0
+        self._writer_size = 0
+        self._opened = False
+        self.stats = {'writes': 0, 'deduplicated': 0, 'reads': 0, 'bytes_in': 0, 'bytes_stored': 0, 'moved': 0}
+
+    def _segment_path(self, number: int) -> Path:
+        return self.directory / f"segment_{number:05d}.dat"
+
+    def _segment_numbers(self) -> List[int]:
+        numbers = []
+        for path in self.directory.glob('segment_*.dat'):
+            try:
+                numbers.append(int(path.stem.split('_', 1)[1]))
+            except ValueError:
+                continue
+        return sorted(numbers)
+
+    def _open(self):
+        """Abre o diretório no primeiro acesso, remove segmentos expirados e indexa os demais."""
+        if self._opened:
+            return
+        self._opened = True
+        self.directory.mkdir(parents=True, exist_ok=True)
+        expired_before = time.time() - self.retention
+        for number in self._segment_numbers():
+            path = self._segment_path(number)
+            try:
+                if path.stat().st_mtime < expired_before and self._try_remove(path):
+                    continue
+                self.segments[number] = Segment(number, path)
+            except OSError as e:
+                logger.error(f"Erro ao abrir segmento {path.name}: {str(e)}")
+        for segment in self.segments.values():
+            self._scan(segment)
+
+    @staticmethod
+    def _try_remove(path: Path) -> bool:
+        """Remove o segmento se nenhum processo estiver gravando nele."""
+        with open(path, 'rb+') as f:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    return False
+            path.unlink()
+        logger.debug(f"Segmento expirado removido: {path.name}")
+        return True
+
+    def _scan(self, segment: Segment) -> bool:
+        """Indexa os registros completos acrescentados desde a última leitura do segmento."""
+        status = os.fstat(segment.file.fileno())
+        size = status.st_size
+        segment.mtime = status.st_mtime
+        if size <= segment.scanned:
+            return False
+        view = segment.view(size)
+        offset = segment.scanned
+        found = False
+        while offset + RECORD_HEADER.size <= size:
+            magic, digest, stored, _ = RECORD_HEADER.unpack_from(view, offset)
+            end = offset + RECORD_HEADER.size + stored
+            if magic != RECORD_MAGIC or end > size:
+                # Registro incompleto: gravação em andamento em outro processo ou interrompida
+                break
+            self.index[digest] = segment.number << OFFSET_BITS | offset
+            found = True
+            offset = end
+        segment.scanned = offset
+        return found
+
+    def _refresh(self) -> bool:
+        """Indexa registros e segmentos gravados por outros processos desde a abertura."""
+        found = False
+        for number in self._segment_numbers():
+            if number not in self.segments:
+                try:
+                    self.segments[number] = Segment(number, self._segment_path(number))
+                except OSError:
+                    continue
+            if number != self._writer_number:
+                found = self._scan(self.segments[number]) or found
+        return found
+
+    def _acquire_writer(self):
+        """Escolhe um segmento com espaço que nenhum outro processo esteja usando, ou cria um novo."""
+        candidates = [n for n in self._segment_numbers() if n != self._writer_number]
+        next_number = max(candidates + [self._writer_number], default=0) + 1
+        # Segmentos recentes com espaço primeiro; depois um novo (outro processo pode criá-lo antes)
+        for number in candidates[-4:] + list(range(next_number, next_number + 16)):
+            path = self._segment_path(number)
+            fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_APPEND, 0o644)
+            if fcntl is not None:
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    os.close(fd)
+                    continue
+            status = os.fstat(fd)
+            size = status.st_size
+            # Segmentos antigos não recebem gravações, para poderem expirar
+            if size >= self.segment_size or time.time() - status.st_mtime > self.retention / 2:
+                os.close(fd)
+                continue
+            segment = self.segments.get(number)
+            if segment is None:
+                segment = self.segments[number] = Segment(number, path)
+            self._scan(segment)
+            if segment.scanned < size:
+                # Cauda de uma gravação interrompida: descartada antes de acrescentar
+                os.ftruncate(fd, segment.scanned)
+                size = segment.scanned
+            self._writer, self._writer_number, self._writer_size = fd, number, size
+            return
+        raise OSError("Nenhum segmento disponível para gravação")
+
+    def _append(self, record: bytes) -> int:
+        """Grava o registro no segmento atual e retorna sua localização."""
+        if self._writer is None or self._writer_size >= self.segment_size:
+            if self._writer is not None:
+                os.close(self._writer)
+                self._writer = None
+            self._acquire_writer()
+        offset = self._writer_size
+        os.write(self._writer, record)
+        self._writer_size += len(record)
+        segment = self.segments[self._writer_number]
+        segment.scanned = self._writer_size
+        segment.mtime = time.time()
+        return self._writer_number << OFFSET_BITS | offset
+
+    @tracer.traced('store.put')
+    def put(self, content_hash: str, text: str) -> bool:
+        """Grava o conteúdo se ainda não existir; retorna False em caso de erro."""
+        self._open()
+        digest = bytes.fromhex(content_hash)
+        if digest in self.index:
+            self.stats['deduplicated'] += 1
+            return True
+        try:
+            raw = text.encode('utf-8', 'surrogatepass')
+            data = zlib.compress(raw, self.level)
+            self.index[digest] = self._append(RECORD_HEADER.pack(RECORD_MAGIC, digest, len(data), len(raw)) + data)
+            self.stats['writes'] += 1
+            self.stats['bytes_in'] += len(raw)
+            self.stats['bytes_stored'] += len(data)
+            return True
+        except Exception as e:
+            logger.error(f"Erro ao gravar conteúdo no armazenamento: {str(e)}")
+            return False
+
+    @tracer.traced('store.get')
+    def get(self, content_hash: str) -> Optional[str]:
+        self._open()
+        digest = bytes.fromhex(content_hash)
+        location = self.index.get(digest)
+        if location is None:
+            if not self._refresh():
+                return None
+            location = self.index.get(digest)
+            if location is None:
+                return None
+        try:
+            segment = self.segments[location >> OFFSET_BITS]
+            offset = location & OFFSET_MASK
+            view = segment.view(offset + RECORD_HEADER.size)
+            _, stored_digest, stored, _ = RECORD_HEADER.unpack_from(view, offset)
+            if stored_digest != digest:
+                raise ValueError("hash do registro não confere")
+            start = offset + RECORD_HEADER.size
+            view = segment.view(start + stored)
+            raw = zlib.decompress(view[start:start + stored])
+        except Exception as e:
+            logger.error(f"Erro ao ler conteúdo {content_hash} do armazenamento: {str(e)}")
+            self.index.pop(digest, None)
+            return None
+        self.stats['reads'] += 1
+        if segment.number != self._writer_number and time.time() - segment.mtime > self.retention / 2:
+            self._move(digest, view[offset:start + stored])
+        return raw.decode('utf-8', 'surrogatepass')
+
+    def _move(self, digest: bytes, record: bytes):
+        """Copia um conteúdo ainda em uso para o segmento atual, antes que o antigo expire."""
+        try:
+            self.index[digest] = self._append(record)
+            self.stats['moved'] += 1
+        except Exception as e:
+            logger.error(f"Erro ao mover conteúdo no armazenamento: {str(e)}")
+
+    def disk_usage(self) -> int:
+        total = 0
+        for number in self._segment_numbers():
+            try:
+                total += self._segment_path(number).stat().st_size
+            except OSError:
+                continue
+        return total
+
+    def summary(self) -> str:
+        ratio = self.stats['bytes_stored'] / self.stats['bytes_in'] if self.stats['bytes_in'] else 0.0
+        return (
+            f"Armazenamento de config.xml: {len(self.index)} conteúdos em {len(self.segments)} segmentos "
+            f"({self.disk_usage() / 1024 / 1024:.1f} MB), {self.stats['writes']} gravados "
+            f"(comprimidos a {ratio:.0%}), {self.stats['deduplicated']} já existentes, {self.stats['reads']} lidos"
+        )
+
+    def close(self):
+        if self._writer is not None:
+            os.close(self._writer)
+            self._writer = None
+        for segment in self.segments.values():
+            segment.close()
+        self.segments.clear()
@@ -6,6 +6,9 @@ from src.config.settings import LOG_DIR, LOG_FILE, LOG_FORMAT, LOG_DATE_FORMAT,
 
 def setup_logger(name: str = __name__):
     logger = logging.getLogger(name)
+    # Vários módulos chamam setup_logger na importação: configura cada logger uma única vez
+    if logger.handlers:
+        return logger
     logger.setLevel(LOG_LEVEL)
     
     LOG_DIR.mkdir(parents=True, exist_ok=True)
@@ -16,11 +19,12 @@ def setup_logger(name: str = __name__):
     # Formatador para console - simplificado
     console_formatter = logging.Formatter('%(message)s')
     
-    # Handler para arquivo
+    # Handler para arquivo (aberto somente na primeira mensagem)
     file_handler = RotatingFileHandler(
         LOG_FILE,
         maxBytes=LOG_MAX_SIZE,
-        backupCount=LOG_BACKUP_COUNT
+        backupCount=LOG_BACKUP_COUNT,
+        delay=True
     )
     file_handler.setFormatter(file_formatter)
     file_handler.setLevel(logging.DEBUG)
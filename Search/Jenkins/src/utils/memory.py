@@ -1,67 +1,193 @@
 import gc
-import psutil
+import time
 import asyncio
-from typing import Optional
-from src.config.settings import MEMORY_LIMIT
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+from src.config.settings import (
+    MEMORY_LIMIT, MEMORY_SOFT_LIMIT, MEMORY_HARD_LIMIT, MEMORY_SAMPLE_INTERVAL
+)
 from src.utils.logger import setup_logger
+from src.utils.messages import MessageManager as msg
+from src.utils.tracing import tracer
 
 logger = setup_logger()
 
-class MemoryManager:
-    def __init__(self, threshold: float = 0.8):
-        self.threshold = threshold
+NORMAL, PRESSURE, CRITICAL = 'normal', 'pressão', 'crítico'
+# Fração do orçamento de cache e de concorrência mantida em cada nível
+LEVEL_FACTORS = {NORMAL: 1.0, PRESSURE: 0.5, CRITICAL: 0.1}
+# Histerese: só volta de nível quando o uso cai abaixo desta fração do limiar
+RECOVERY_MARGIN = 0.9
+
+class MemoryGovernor:
+    """Controla a admissão de jobs conforme o uso de memória do processo.
+
+    O RSS é amostrado em uma tarefa própria a cada MEMORY_SAMPLE_INTERVAL segundos,
+    fora do caminho de processamento. Perto do limite o governor reduz o cache e a
+    concorrência; no nível crítico a retirada de jobs da fila é pausada (a fila
+    cheia, por sua vez, pausa a enumeração). Tudo volta ao normal quando o uso cai.
+    """
+
+    def __init__(self, max_concurrency: int, cache=None, limit: int = MEMORY_LIMIT):
+        import psutil
         self.process = psutil.Process()
-        self._last_collection = 0
-        self._collection_interval = 60  # segundos
-    
-    def get_memory_usage(self) -> float:
+        self.cache = cache
+        self.cache_budget = cache.max_size if cache is not None else 0
+        self.max_concurrency = max_concurrency
+        self.concurrency = max_concurrency
+        self.soft_limit = int(limit * MEMORY_SOFT_LIMIT)
+        self.hard_limit = int(limit * MEMORY_HARD_LIMIT)
+        self.level = NORMAL
+        self.in_flight = 0
+        # Jobs aguardando ou em andamento e jobs em andamento, por servidor
+        self._demand: Dict[str, int] = {}
+        self._in_flight_by_key: Dict[str, int] = {}
+        self._condition: Optional[asyncio.Condition] = None
+        self.intake_open = True
+        self._task: Optional[asyncio.Task] = None
+        self._paused_at: Optional[float] = None
+        self.stats: Dict[str, float] = {
+            'samples': 0,
+            'peak_rss': 0,
+            'transitions': 0,
+            'pauses': 0,
+            'paused_seconds': 0.0,
+            'collections': 0
+        }
+
+    def get_memory_usage(self) -> int:
         """Retorna o uso atual de memória em bytes."""
         return self.process.memory_info().rss
-    
-    def get_memory_percent(self) -> float:
-        """Retorna o percentual de uso de memória."""
-        return self.process.memory_percent()
-    
-    async def force_collection(self):
-        """Força coleta de lixo e libera memória."""
-        logger.debug("Iniciando coleta de lixo forçada")
-        
-        # Coleta gerações mais antigas primeiro
-        gc.collect(2)
-        await asyncio.sleep(0)  # Permite que outras corotinas executem
-        
-        gc.collect(1)
-        await asyncio.sleep(0)
-        
-        gc.collect(0)
-        await asyncio.sleep(0)
-        
-        # Tenta liberar memória do sistema
-        if hasattr(psutil, "Process"):
+
+    def start(self):
+        self._condition = asyncio.Condition()
+        self._task = asyncio.create_task(self._sample_loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
             try:
-                self.process.memory_info()
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._condition is not None:
+            await self._apply_level(NORMAL, self.get_memory_usage())
+
+    async def _sample_loop(self):
+        while True:
+            try:
+                rss = self.get_memory_usage()
+                self.stats['samples'] += 1
+                self.stats['peak_rss'] = max(self.stats['peak_rss'], rss)
+                level = self._classify(rss)
+                if level != self.level:
+                    await self._apply_level(level, rss)
             except Exception as e:
-                logger.error(f"Erro ao liberar memória: {str(e)}")
-        
-        self._last_collection = asyncio.get_event_loop().time()
-        logger.debug("Coleta de lixo concluída")
-    
-    async def check_memory(self, force: bool = False):
-        """Verifica uso de memória e realiza coleta se necessário."""
-        current_time = asyncio.get_event_loop().time()
-        
-        # Verifica se deve realizar coleta
-        should_collect = (
-            force or
-            self.get_memory_usage() > MEMORY_LIMIT * self.threshold or
-            current_time - self._last_collection > self._collection_interval
+                logger.error(f"Erro ao amostrar memória: {str(e)}")
+            await asyncio.sleep(MEMORY_SAMPLE_INTERVAL)
+
+    def _classify(self, rss: int) -> str:
+        if rss >= self.hard_limit:
+            return CRITICAL
+        if self.level == CRITICAL and rss >= self.hard_limit * RECOVERY_MARGIN:
+            return CRITICAL
+        if rss >= self.soft_limit:
+            return PRESSURE
+        if self.level != NORMAL and rss >= self.soft_limit * RECOVERY_MARGIN:
+            return PRESSURE
+        return NORMAL
+
+    async def _apply_level(self, level: str, rss: int):
+        if level == self.level:
+            return
+        previous, self.level = self.level, level
+        self.stats['transitions'] += 1
+        factor = LEVEL_FACTORS[level]
+
+        if self.cache is not None:
+            self.cache.resize(int(self.cache_budget * factor))
+        async with self._condition:
+            self.concurrency = max(1, int(self.max_concurrency * factor))
+            self.intake_open = level != CRITICAL
+            self._condition.notify_all()
+
+        if level == CRITICAL:
+            self._paused_at = time.monotonic()
+            self.stats['pauses'] += 1
+            # Uma única coleta ao entrar no nível crítico, para liberar o que o cache soltou
+            gc.collect()
+            self.stats['collections'] += 1
+        elif self._paused_at is not None:
+            self.stats['paused_seconds'] += time.monotonic() - self._paused_at
+            self._paused_at = None
+
+        message = (
+            f"Memória {previous} -> {level}: {rss / 1024 / 1024:.0f} MB; "
+            f"concorrência {self.concurrency}, cache {self.cache.max_size / 1024 / 1024 if self.cache else 0:.0f} MB"
+            f"{', entrada de jobs pausada' if level == CRITICAL else ''}"
+        )
+        logger.info(message)
+        if level == NORMAL:
+            msg.info(message)
+        else:
+            msg.warning(message)
+
+    async def wait_for_intake(self):
+        """Bloqueia enquanto a entrada de novos jobs estiver pausada.
+
+        Com nada em andamento um job é liberado por vez, para a busca não travar
+        caso o uso de memória não caia abaixo do limite crítico.
+        """
+        if self._condition is None:
+            return
+        with tracer.span('memory.wait_intake'):
+            async with self._condition:
+                await self._condition.wait_for(lambda: self.intake_open or self.in_flight == 0)
+
+    def _fair_share(self) -> int:
+        """Vagas por servidor: a concorrência atual dividida entre os servidores ativos."""
+        return max(1, -(-self.concurrency // max(1, len(self._demand))))
+
+    @asynccontextmanager
+    async def slot(self, key: str = ''):
+        """Vaga de processamento limitada pela concorrência atual.
+
+        Cada `key` (servidor) fica limitada à sua fatia das vagas enquanto houver
+        outros servidores com jobs, para um controller lento não ocupar todas.
+        """
+        async with self._condition:
+            self._demand[key] = self._demand.get(key, 0) + 1
+            try:
+                with tracer.span('memory.slot_wait'):
+                    await self._condition.wait_for(
+                        lambda: self.in_flight < self.concurrency and
+                        self._in_flight_by_key.get(key, 0) < self._fair_share()
+                    )
+            except BaseException:
+                self._leave(key)
+                raise
+            self.in_flight += 1
+            self._in_flight_by_key[key] = self._in_flight_by_key.get(key, 0) + 1
+        try:
+            yield
+        finally:
+            async with self._condition:
+                self.in_flight -= 1
+                self._in_flight_by_key[key] -= 1
+                self._leave(key)
+
+    def _leave(self, key: str):
+        self._demand[key] -= 1
+        if not self._demand[key]:
+            # Servidor sem jobs pendentes libera sua fatia para os demais
+            del self._demand[key]
+            self._in_flight_by_key.pop(key, None)
+        self._condition.notify_all()
+
+    def summary(self) -> str:
+        stats = self.stats
+        return (
+            f"Memória: pico {stats['peak_rss'] / 1024 / 1024:.0f} MB em {stats['samples']} amostras, "
+            f"{stats['transitions']} mudanças de nível, {stats['pauses']} pausas "
+            f"({stats['paused_seconds']:.1f}s), {stats['collections']} coletas forçadas"
         )
-        
-        if should_collect:
-            memory_before = self.get_memory_usage()
-            await self.force_collection()
-            memory_after = self.get_memory_usage()
-            
-            memory_freed = memory_before - memory_after
-            if memory_freed > 0:
-                logger.info(f"Memória liberada: {memory_freed / 1024 / 1024:.2f} MB")
\ No newline at end of file
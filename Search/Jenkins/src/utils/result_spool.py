@@ -0,0 +1,105 @@
+import json
+import os
+from pathlib import Path
+from typing import Iterator, Optional, Set
+from src.config.settings import CACHE_DIR
+from src.models.search_result import SearchResult
+from src.utils.logger import setup_logger
+
+logger = setup_logger()
+
+class ResultSpool:
+    """Arquivo JSONL append-only com os resultados encontrados, um por linha.
+
+    Os resultados são gravados assim que produzidos e os relatórios são gerados
+    lendo o arquivo em streaming, então a memória não cresce com o número de
+    ocorrências. Cada resultado é enviado ao sistema operacional antes da linha
+    do seu job no journal do checkpoint, e o fsync do spool precede o do journal;
+    um job cujo resultado se perdeu em uma queda de energia entre dois fsyncs é
+    detectado na abertura e processado de novo.
+    """
+
+    def __init__(self, spool_file: Path = CACHE_DIR / "results.jsonl"):
+        spool_file.parent.mkdir(parents=True, exist_ok=True)
+        self.spool_file = spool_file
+        self._file = None
+        self.results_count = 0
+        self.matches_count = 0
+
+    def recover(self, completed_jobs: Set[str]) -> Set[str]:
+        """Descarta do final do spool resultados de jobs que não chegaram ao checkpoint.
+
+        Como cada resultado é gravado imediatamente antes do registro do seu job,
+        esses resultados ficam sempre no fim do arquivo e serão produzidos de novo.
+        Retorna as URLs dos jobs cujos resultados foram mantidos.
+        """
+        recovered: Set[str] = set()
+        if not self.spool_file.exists():
+            return recovered
+        valid_bytes = 0
+        try:
+            with open(self.spool_file, 'rb') as f:
+                for line in f:
+                    try:
+                        data = json.loads(line)
+                    except ValueError:
+                        break
+                    if not line.endswith(b'\n') or data.get('url') not in completed_jobs:
+                        break
+                    valid_bytes += len(line)
+                    recovered.add(data['url'])
+                    self.results_count += 1
+                    self.matches_count += len(data.get('matches', []))
+            if valid_bytes < self.spool_file.stat().st_size:
+                logger.warning("Descartando resultados sem checkpoint no final do spool")
+                with open(self.spool_file, 'r+b') as f:
+                    f.truncate(valid_bytes)
+        except Exception as e:
+            logger.error(f"Erro ao recuperar spool de resultados: {str(e)}")
+        return recovered
+
+    def append(self, result: SearchResult):
+        if self._file is None:
+            self._file = open(self.spool_file, 'a', encoding='utf-8')
+        self._file.write(json.dumps(result.to_dict()) + '\n')
+        self.results_count += 1
+        self.matches_count += len(result.matches)
+
+    def flush(self):
+        """Entrega ao sistema operacional os resultados em buffer (sobrevive à interrupção do processo)."""
+        if self._file is not None:
+            self._file.flush()
+
+    def sync(self):
+        if self._file is None:
+            return
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        try:
+            self.sync()
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+        except Exception as e:
+            logger.error(f"Erro ao fechar spool de resultados: {str(e)}")
+
+    def clear(self):
+        self.close()
+        self.spool_file.unlink(missing_ok=True)
+        self.results_count = 0
+        self.matches_count = 0
+
+    def __iter__(self) -> Iterator[SearchResult]:
+        """Lê os resultados do disco um a um."""
+        if self._file is not None:
+            self._file.flush()
+        if not self.spool_file.exists():
+            return
+        with open(self.spool_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                yield SearchResult.from_dict(json.loads(line))
+
+    def __len__(self) -> int:
+        return self.results_count
@@ -1,3 +1,4 @@
+import asyncio
 import time
 from functools import wraps
 from src.utils.logger import setup_logger
@@ -5,7 +6,17 @@ from src.utils.logger import setup_logger
 logger = setup_logger()
 
 def timer_decorator(func):
-    """Decorator para medir o tempo de execução das funções."""
+    """Decorator para medir o tempo de execução das funções (síncronas ou assíncronas)."""
+    if asyncio.iscoroutinefunction(func):
+        @wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            start_time = time.time()
+            logger.info(f"Iniciando {func.__name__}...")
+            result = await func(*args, **kwargs)
+            logger.info(f"Finalizado {func.__name__} em {time.time() - start_time:.2f} segundos")
+            return result
+        return async_wrapper
+
     @wraps(func)
     def wrapper(*args, **kwargs):
         start_time = time.time()
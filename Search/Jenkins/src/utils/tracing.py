@@ -0,0 +1,184 @@
+import asyncio
+import bisect
+import heapq
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+from functools import wraps
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from src.config.settings import LOG_DIR, TRACE_ENABLED, TRACE_FLUSH_BATCH, TRACE_SLOWEST_JOBS
+from src.utils.logger import setup_logger
+
+logger = setup_logger()
+
+# Limites (ms) dos intervalos dos histogramas de latência
+HISTOGRAM_BOUNDS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000, 60000)
+
+class Histogram:
+    """Histograma de latências em intervalos fixos; percentis aproximados pelo limite do intervalo."""
+
+    def __init__(self):
+        self.counts = [0] * (len(HISTOGRAM_BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, ms: float):
+        self.counts[bisect.bisect_left(HISTOGRAM_BOUNDS, ms)] += 1
+        self.count += 1
+        self.total += ms
+        if ms > self.max:
+            self.max = ms
+
+    def percentile(self, pct: float) -> float:
+        target = self.count * pct / 100
+        seen = 0
+        for idx, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= target:
+                return min(HISTOGRAM_BOUNDS[idx], self.max) if idx < len(HISTOGRAM_BOUNDS) else self.max
+        return self.max
+
+class Tracer:
+    """Spans da execução em formato Chrome Trace (chrome://tracing, Perfetto, speedscope).
+
+    Cada span alimenta o histograma do seu nome; com TRACE_ENABLED também vira um
+    evento "X" no arquivo de trace. Os eventos são gravados em lotes como um array
+    JSON aberto, formato que os visualizadores aceitam mesmo se a execução for
+    interrompida antes do fechamento. Cada tarefa asyncio aparece como uma linha
+    (tid) própria, para spans concorrentes não se sobreporem; a linha de uma tarefa
+    concluída é reaproveitada, então o total acompanha o pico de tarefas simultâneas.
+    """
+
+    def __init__(self):
+        self.histograms: Dict[str, Histogram] = defaultdict(Histogram)
+        self.slowest: List[Tuple[float, str]] = []
+        self.trace_file: Optional[Path] = None
+        self._file = None
+        self._events: List[Dict] = []
+        self._tids: Dict[int, int] = {}
+        self._free_tids: List[int] = []
+        self._next_tid = 1
+        self._origin = time.perf_counter()
+
+    def start(self, directory: Path = LOG_DIR):
+        if not TRACE_ENABLED or self._file is not None:
+            return
+        directory.mkdir(parents=True, exist_ok=True)
+        self.trace_file = directory / f"trace_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{os.getpid()}.json"
+        self._file = open(self.trace_file, 'w', encoding='utf-8')
+        self._file.write('[\n')
+        self._events.append({
+            'name': 'process_name', 'ph': 'M', 'pid': os.getpid(), 'tid': 0,
+            'args': {'name': 'jenkins-search'}
+        })
+
+    def _tid(self) -> int:
+        try:
+            task = asyncio.current_task()
+        except RuntimeError:
+            task = None
+        owner = id(task) if task is not None else threading.get_ident()
+        tid = self._tids.get(owner)
+        if tid is None:
+            if self._free_tids:
+                tid = heapq.heappop(self._free_tids)
+            else:
+                tid = self._next_tid
+                self._next_tid += 1
+            self._tids[owner] = tid
+            if task is not None:
+                task.add_done_callback(lambda _task: self._release_tid(owner))
+        return tid
+
+    def _release_tid(self, owner: int):
+        tid = self._tids.pop(owner, None)
+        if tid is not None:
+            heapq.heappush(self._free_tids, tid)
+
+    @contextmanager
+    def span(self, name: str, **args):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            self.histograms[name].add(elapsed * 1000)
+            if self._file is not None:
+                event = {
+                    'name': name, 'ph': 'X', 'pid': os.getpid(), 'tid': self._tid(),
+                    'ts': round((started - self._origin) * 1e6, 1), 'dur': round(elapsed * 1e6, 1)
+                }
+                if args:
+                    event['args'] = args
+                self._events.append(event)
+                if len(self._events) >= TRACE_FLUSH_BATCH:
+                    self._flush()
+
+    def traced(self, name: str):
+        """Decorador que envolve a função (síncrona ou assíncrona) em um span."""
+        def decorator(func):
+            if asyncio.iscoroutinefunction(func):
+                @wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    with self.span(name):
+                        return await func(*args, **kwargs)
+                return async_wrapper
+
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def record_job(self, elapsed: float, label: str):
+        """Mantém os TRACE_SLOWEST_JOBS jobs mais lentos da execução."""
+        if len(self.slowest) < TRACE_SLOWEST_JOBS:
+            heapq.heappush(self.slowest, (elapsed, label))
+        elif elapsed > self.slowest[0][0]:
+            heapq.heapreplace(self.slowest, (elapsed, label))
+
+    def _flush(self):
+        if self._file is None or not self._events:
+            return
+        try:
+            self._file.write(''.join(json.dumps(event) + ',\n' for event in self._events))
+            self._file.flush()
+        except OSError as e:
+            logger.error(f"Erro ao gravar trace: {str(e)}")
+        self._events.clear()
+
+    def close(self):
+        if self._file is None:
+            return
+        self._flush()
+        # Fecha o array com um evento final, já que cada linha termina em vírgula
+        self._file.write(json.dumps({
+            'name': 'trace_end', 'ph': 'i', 's': 'g', 'pid': os.getpid(), 'tid': 0,
+            'ts': round((time.perf_counter() - self._origin) * 1e6, 1)
+        }) + '\n]\n')
+        self._file.close()
+        self._file = None
+
+    def summary(self) -> List[str]:
+        lines = ["Latências (ms): span | chamadas | média | p50 | p95 | p99 | máx"]
+        for name, hist in sorted(self.histograms.items(), key=lambda item: -item[1].total):
+            lines.append(
+                f"  {name} | {hist.count} | {hist.total / hist.count:.1f} | {hist.percentile(50):.0f} | "
+                f"{hist.percentile(95):.0f} | {hist.percentile(99):.0f} | {hist.max:.0f}"
+            )
+        if self.slowest:
+            lines.append("Jobs mais lentos:")
+            for elapsed, label in sorted(self.slowest, reverse=True):
+                lines.append(f"  {elapsed:.2f}s {label}")
+        if self.trace_file:
+            lines.append(f"Trace gravado em {self.trace_file}")
+        return lines
+
+tracer = Tracer()
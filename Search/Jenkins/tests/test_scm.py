@@ -0,0 +1,97 @@
+"""Jobs "Pipeline script from SCM" sem o executável git no PATH.
+
+Executar a partir de Search/Jenkins: python -m pytest tests
+"""
+import asyncio
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+# As configurações são lidas na importação: cache, logs e resultados ficam em um diretório temporário
+HOME = Path(tempfile.mkdtemp(prefix='jenkins-search-test-'))
+shutil.copy(Path(__file__).resolve().parent.parent / 'settings.txt', HOME / 'settings.txt')
+os.environ['JENKINS_SEARCH_HOME'] = str(HOME)
+
+from src.main import JenkinsSearchApp  # noqa: E402
+from src.utils.checkpoint import CheckpointManager  # noqa: E402
+
+JOB_URL = 'https://jenkins.company.network/job/pipeline-scm/'
+CONFIG_XML = """<?xml version='1.1' encoding='UTF-8'?>
+<flow-definition plugin="workflow-job">
+  <description>deploy via gitauto</description>
+  <definition class="org.jenkinsci.plugins.workflow.cps.CpsScmFlowDefinition" plugin="workflow-cps">
+    <scm class="hudson.plugins.git.GitSCM" plugin="git">
+      <userRemoteConfigs>
+        <hudson.plugins.git.UserRemoteConfig>
+          <url>https://git.company.network/team/pipeline.git</url>
+        </hudson.plugins.git.UserRemoteConfig>
+      </userRemoteConfigs>
+      <branches>
+        <hudson.plugins.git.BranchSpec><name>*/main</name></hudson.plugins.git.BranchSpec>
+      </branches>
+    </scm>
+    <scriptPath>Jenkinsfile</scriptPath>
+  </definition>
+</flow-definition>
+"""
+
+
+class FakeClient:
+    async def get_config(self, url):
+        return SimpleNamespace(body=CONFIG_XML, matches=None, url=url)
+
+    async def store_matches(self, document, matches):
+        pass
+
+
+async def run_job(app: JenkinsSearchApp):
+    app.memory_governor.start()
+    try:
+        return await app.process_job('jenkins', {'name': 'pipeline-scm', 'url': JOB_URL}, FakeClient())
+    finally:
+        await app.memory_governor.stop()
+        app.matcher.close()
+
+
+def assert_checkpointed(result, directory: Path):
+    assert result is not None
+    assert [m.keyword for m in result.matches] == ['gitauto']
+    reopened = CheckpointManager(directory)
+    try:
+        assert not reopened.should_process_job(JOB_URL)
+        assert [r.url for r in reopened.spool] == [JOB_URL]
+    finally:
+        reopened.close()
+
+
+@pytest.fixture
+def checkpoint_dir(tmp_path):
+    return tmp_path / 'checkpoint'
+
+
+def test_scm_disabled_without_git(monkeypatch, checkpoint_dir):
+    monkeypatch.setenv('PATH', '')
+    checkpoint = CheckpointManager(checkpoint_dir)
+    app = JenkinsSearchApp(checkpoint=checkpoint)
+    assert app.scm is None
+
+    result = asyncio.run(run_job(app))
+    checkpoint.close()
+    assert_checkpointed(result, checkpoint_dir)
+
+
+def test_git_removed_after_startup(monkeypatch, checkpoint_dir):
+    checkpoint = CheckpointManager(checkpoint_dir)
+    app = JenkinsSearchApp(checkpoint=checkpoint)
+    assert app.scm is not None
+
+    # O spawn do git falha com FileNotFoundError, tratado como repositório inacessível
+    monkeypatch.setenv('PATH', '')
+    result = asyncio.run(run_job(app))
+    checkpoint.close()
+    assert app.scm.stats['errors'] == 1
+    assert_checkpointed(result, checkpoint_dir)